@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from desiteRuleCreator import Template
+from desiteRuleCreator.Filehandling import desite_export, rule_cache
+
+from benchmarks import synthetic
+
+BOQ_PSETS = [synthetic.IDENT_PSET, synthetic.OWN_PSET]
+
+
+def rule_objects(model: list) -> list:
+    return sorted((obj for obj in model if not obj.is_concept), key=lambda obj: obj.name)
+
+
+def test_render_rule(benchmark, model, rounds):
+    template = desite_export.load_template()
+    objects = rule_objects(model)
+    benchmark.pedantic(lambda: [desite_export.render_rule(template, obj) for obj in objects], rounds=rounds)
+
+
+def test_render_dispatcher(benchmark, model, rounds):
+    template = desite_export.load_template(Template.DISPATCHER_TEMPLATE)
+    benchmark.pedantic(desite_export.render_dispatcher, args=(template, rule_objects(model)), rounds=rounds)
+
+
+def test_lint_rules(benchmark, model, rounds):
+    template = desite_export.load_template()
+    rules = [(obj, obj.name, desite_export.render_rule(template, obj)) for obj in rule_objects(model)]
+    benchmark.pedantic(desite_export.lint_rules, args=(rules,), rounds=rounds)
+
+
+def test_lint_formats(benchmark, model, rounds):
+    benchmark.pedantic(desite_export.lint_formats, args=(model,), rounds=rounds)
+
+
+def test_write_modelcheck(benchmark, main_window, model, rounds, tmp_path):
+    path = str(tmp_path / "export.qa.xml")
+    benchmark.pedantic(desite_export.write_modelcheck, args=(path, main_window.project, None), rounds=rounds)
+
+
+def test_write_modelcheck_cached(benchmark, main_window, model, rounds, tmp_path):
+    """ export of an unchanged project, every checkrun comes from the rule cache"""
+    path = str(tmp_path / "export.qa.xml")
+    cache_file = rule_cache.cache_path(path)
+    desite_export.write_modelcheck(path, main_window.project, cache_file)
+    benchmark.pedantic(desite_export.write_modelcheck, args=(path, main_window.project, cache_file), rounds=rounds)
+
+
+def test_write_modelcheck_dispatcher(benchmark, main_window, model, rounds, tmp_path):
+    path = str(tmp_path / "export.qa.xml")
+    benchmark.pedantic(desite_export.write_modelcheck, args=(path, main_window.project, None, True), rounds=rounds)
+
+
+def test_write_bs(benchmark, main_window, model, rounds, tmp_path):
+    path = str(tmp_path / "export.bs.xml")
+    benchmark.pedantic(desite_export.write_bs, args=(path, main_window.project.author), rounds=rounds)
+
+
+def test_write_bookmarks(benchmark, model, rounds, tmp_path):
+    benchmark.pedantic(desite_export.write_bookmarks, args=(str(tmp_path / "export.bkxml"),), rounds=rounds)
+
+
+def test_export_boq_csv(benchmark, main_window, model, rounds, tmp_path):
+    benchmark.pedantic(desite_export.export_boq, args=(main_window, str(tmp_path / "boq.csv"), BOQ_PSETS),
+                       rounds=rounds)
+
+
+def test_export_boq_xlsx(benchmark, main_window, model, rounds, tmp_path):
+    benchmark.pedantic(desite_export.export_boq, args=(main_window, str(tmp_path / "boq.xlsx"), BOQ_PSETS),
+                       rounds=rounds)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from desiteRuleCreator.Filehandling import excel, open_file, save_file
+
+
+def test_import_data(benchmark, main_window, drcxml_path, rounds, replaces_model):
+    benchmark.pedantic(open_file.import_data, args=(main_window, drcxml_path), setup=main_window.clear_all,
+                       rounds=rounds)
+
+
+def test_save(benchmark, main_window, model, rounds, tmp_path):
+    benchmark.pedantic(save_file.save, args=(main_window, str(tmp_path / "project.DRCxml")), rounds=rounds)
+
+
+def test_excel_start(benchmark, main_window, excel_path, rounds, replaces_model):
+    benchmark.pedantic(excel.start, args=(main_window, excel_path), setup=main_window.clear_all, rounds=rounds)
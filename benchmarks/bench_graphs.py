@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from desiteRuleCreator.Filehandling import graph_export
+from desiteRuleCreator.Windows import graphs_window
+
+
+def test_buchheim(benchmark, model, rounds):
+    """ layout of the aggregation tree of the first Object, which aggregates all others"""
+    tree = graph_export.build_tree(model[0])
+    benchmark.pedantic(graphs_window.buchheim, args=(tree,), rounds=rounds)
@@ -0,0 +1,103 @@
+""" benchmarks of the file handling, the exports and the graph layout on synthetic projects
+
+    python -m pytest benchmarks                      # 1k, 10k and 100k Objects
+    python -m pytest benchmarks --scales 1000        # only 1k
+    python -m pytest benchmarks --benchmark-compare  # compare with the last stored run
+
+Every run is stored as JSON in .benchmarks/ (pytest-benchmark autosave, see pytest.ini).
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from benchmarks import synthetic
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.main_window import MainWindow
+
+SCALES = "1000,10000,100000"
+ROUNDS = {1000: 5, 10000: 3}  # larger projects run once
+
+_model: dict = dict()  # scale and Objects of the project in the registries
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption("--scales", default=SCALES, help="comma separated numbers of Objects")
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if "scale" in metafunc.fixturenames:
+        scales = [int(scale) for scale in metafunc.config.getoption("scales").split(",")]
+        metafunc.parametrize("scale", scales, ids=[f"{scale}" for scale in scales], scope="session")
+
+
+@pytest.fixture(scope="session")
+def main_window() -> MainWindow:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from desiteRuleCreator.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    return MainWindow(app)
+
+
+@pytest.fixture
+def rounds(scale: int) -> int:
+    return ROUNDS.get(scale, 1)
+
+
+def load_model(main_window: MainWindow, scale: int) -> list:
+    from desiteRuleCreator.data import classes
+
+    if _model.get("scale") != scale:
+        main_window.clear_all()
+        main_window.project = classes.Project(main_window, f"synthetic_{scale}", "benchmark")
+        _model["objects"] = synthetic.build(synthetic.ProjectShape(scale))
+        _model["scale"] = scale
+    return _model["objects"]
+
+
+@pytest.fixture
+def model(main_window: MainWindow, scale: int) -> list:
+    """ the registries hold the synthetic project of scale, it is only built again if another benchmark replaced
+    it"""
+    return load_model(main_window, scale)
+
+
+@pytest.fixture
+def replaces_model():
+    """ for benchmarks which load another project into the registries"""
+    yield
+    _model.clear()
+
+
+@pytest.fixture(scope="session")
+def files() -> dict[tuple[str, int], str]:
+    """ generated input files per (format, scale), written once per session"""
+    return dict()
+
+
+@pytest.fixture
+def drcxml_path(main_window: MainWindow, scale: int, files: dict, tmp_path_factory: pytest.TempPathFactory) -> str:
+    from desiteRuleCreator.Filehandling import save_file
+
+    key = ("DRCxml", scale)
+    if key not in files:
+        load_model(main_window, scale)
+        files[key] = str(tmp_path_factory.mktemp("projects") / f"synthetic_{scale}.DRCxml")
+        save_file.save(main_window, files[key])
+    return files[key]
+
+
+@pytest.fixture
+def excel_path(scale: int, files: dict, tmp_path_factory: pytest.TempPathFactory) -> str:
+    key = ("xlsx", scale)
+    if key not in files:
+        files[key] = str(tmp_path_factory.mktemp("projects") / f"synthetic_{scale}.xlsx")
+        synthetic.write_excel(synthetic.ProjectShape(scale), files[key])
+    return files[key]
@@ -0,0 +1,184 @@
+""" synthetic projects for the benchmarks
+
+    shape = ProjectShape(objects=10000, depth=5, psets=3, attributes=5, inheritance_fan_out=10,
+                         aggregation_fan_out=3)
+    objects = build(shape)          # fills the classes registries
+    write_excel(shape, path)        # the same project as input for excel.start
+
+Every Object gets an identifier PropertySet inherited from "Allgemeine Eigenschaften", one PropertySet of its own
+("Eigenschaften") and psets - 1 PropertySets inherited from predefined PropertySets, each predefined PropertySet is inherited by
+inheritance_fan_out Objects. Objects form a tree of depth levels and aggregate aggregation_fan_out other Objects, so
+the aggregations form one tree over all Objects. Identifiers are dotted paths like the excel import expects.
+"""
+from __future__ import annotations
+
+import math
+from typing import NamedTuple
+
+import openpyxl
+
+from desiteRuleCreator.data import classes, constants, identifiers, merkle
+
+IDENT_PSET = "Allgemeine Eigenschaften"
+IDENT_ATTRIBUTE = "bauteilKlassifikation"
+OWN_PSET = "Eigenschaften"  # the PropertySet every Object defines itself, the excel import names it like the Object
+EXCEL_BLOCKS_PER_COLUMN = 10000  # keeps the sheet below the row limit of excel
+EXCEL_DATA_TYPES = {constants.XS_STRING: "string", constants.XS_DOUBLE: "double", constants.XS_INT: "int",
+                    constants.XS_BOOL: "bool"}
+
+# (value type, data type, value) of the generated Attributes, used in turn
+ATTRIBUTE_KINDS = [
+    (constants.LIST, constants.XS_STRING, ["a", "b", "c"]),
+    (constants.LIST, constants.XS_STRING, []),
+    (constants.RANGE, constants.XS_DOUBLE, [["0", "10"], ["20", "30"]]),
+    (constants.FORMAT, constants.XS_STRING, ["^\\d+$", "^[A-Z]{2}\\d{3}$"]),
+    (constants.LIST, constants.XS_INT, ["1", "2"]),
+    (constants.LIST, constants.XS_BOOL, ["true"]),
+]
+
+
+class ProjectShape(NamedTuple):
+    objects: int
+    depth: int = 5  # levels of the Object tree
+    psets: int = 3  # PropertySets per Object besides the identifier PropertySet
+    attributes: int = 5  # Attributes per PropertySet
+    inheritance_fan_out: int = 10  # Objects inheriting the same predefined PropertySet
+    aggregation_fan_out: int = 3  # Objects aggregated by one Object
+
+    @property
+    def branching(self) -> int:
+        """ children per Object in the tree, so objects fill about depth levels"""
+        if self.depth <= 1:
+            return max(self.objects - 1, 1)
+        return max(2, math.ceil(self.objects ** (1 / (self.depth - 1))))
+
+    def parent_index(self, index: int) -> int | None:
+        return None if index == 0 else (index - 1) // self.branching
+
+    def aggregation_indexes(self, index: int) -> range:
+        start = index * self.aggregation_fan_out + 1
+        return range(min(start, self.objects), min(start + self.aggregation_fan_out, self.objects))
+
+    def predefined_index(self, index: int) -> int:
+        return index // self.inheritance_fan_out
+
+    @property
+    def predefined_count(self) -> int:
+        """ predefined PropertySets per inherited slot"""
+        return math.ceil(self.objects / self.inheritance_fan_out)
+
+
+def object_name(index: int) -> str:
+    return f"Object_{index}"
+
+
+def predefined_name(slot: int, index: int) -> str:
+    return f"Pset_{slot}_{index}"
+
+
+def object_idents(shape: ProjectShape) -> list[str]:
+    idents: list[str] = list()
+    for index in range(shape.objects):
+        parent = shape.parent_index(index)
+        idents.append(str(index) if parent is None else f"{idents[parent]}.{index}")
+    return idents
+
+
+def add_attributes(property_set: classes.PropertySet, count: int, offset: int = 0) -> None:
+    for number in range(count):
+        value_type, data_type, value = ATTRIBUTE_KINDS[(number + offset) % len(ATTRIBUTE_KINDS)]
+        classes.Attribute(property_set, f"Attribute_{number}", [list(item) if isinstance(item, list) else item
+                                                                for item in value], value_type, data_type)
+
+
+def reset() -> None:
+    """ empties the registries like MainWindow.clear_all, without touching any widget"""
+    classes.Object._registry = list()
+    classes.PropertySet._registry = list()
+    classes.Attribute._registry = list()
+    classes.Object.aggregation_graph = None
+    identifiers.reset()
+    merkle.reset()
+
+
+def build(shape: ProjectShape) -> list[classes.Object]:
+    """ adds the Objects of shape to the registries"""
+    ident_parent = classes.PropertySet(IDENT_PSET)
+    classes.Attribute(ident_parent, IDENT_ATTRIBUTE, [""], constants.LIST)
+    predefined: list[list[classes.PropertySet]] = list()
+    for slot in range(1, shape.psets):
+        property_sets = list()
+        for index in range(shape.predefined_count):
+            property_set = classes.PropertySet(predefined_name(slot, index))
+            add_attributes(property_set, shape.attributes, slot)
+            property_sets.append(property_set)
+        predefined.append(property_sets)
+
+    objects: list[classes.Object] = list()
+    for index, ident in enumerate(object_idents(shape)):
+        ident_pset = classes.PropertySet(IDENT_PSET)
+        ident_parent.add_child(ident_pset)
+        ident_attrib = ident_pset.get_attribute_by_name(IDENT_ATTRIBUTE)
+        ident_attrib.value = [ident]
+        obj = classes.Object(object_name(index), ident_attrib)
+        obj.add_property_set(ident_pset)
+        if shape.psets > 0:
+            own_pset = classes.PropertySet(OWN_PSET)
+            add_attributes(own_pset, shape.attributes)
+            obj.add_property_set(own_pset)
+        for property_sets in predefined:
+            parent = property_sets[shape.predefined_index(index)]
+            property_set = classes.PropertySet(parent.name)
+            parent.add_child(property_set)
+            obj.add_property_set(property_set)
+
+        parent_index = shape.parent_index(index)
+        if parent_index is not None:
+            objects[parent_index].add_child(obj)
+        objects.append(obj)
+
+    for index, obj in enumerate(objects):
+        for child in shape.aggregation_indexes(index):
+            obj.add_aggregation(objects[child])
+    return objects
+
+
+def write_excel(shape: ProjectShape, path: str) -> None:
+    """ the layout excel.start reads: one block per PropertySet and Object, starting with a "name" cell"""
+
+    def abbreviation(prefix: str, index: int) -> str:
+        return f"{prefix}{index}"
+
+    def attribute_rows(offset: int) -> list[list]:
+        rows = list()
+        for number in range(shape.attributes):
+            data_type = ATTRIBUTE_KINDS[(number + offset) % len(ATTRIBUTE_KINDS)][1]
+            rows.append([f"Attribute_{number}", None, EXCEL_DATA_TYPES[data_type]])
+        return rows
+
+    blocks: list[list[list]] = [[["name", IDENT_PSET, None], ["Kürzel", "AE"], [None, "-"], [None, "-"],
+                                 [IDENT_ATTRIBUTE, None, "string"]]]
+    for slot in range(1, shape.psets):
+        for index in range(shape.predefined_count):
+            blocks.append([["name", predefined_name(slot, index), None], ["Kürzel", abbreviation(f"P{slot}_", index)],
+                           [None, "-"], [None, "-"]] + attribute_rows(slot))
+    for index, ident in enumerate(object_idents(shape)):
+        parents = ["AE"] + [abbreviation(f"P{slot}_", shape.predefined_index(index)) for slot in range(1, shape.psets)]
+        children = [abbreviation("O", child) for child in shape.aggregation_indexes(index)]
+        blocks.append([["name", object_name(index), ident], ["Kürzel", abbreviation("O", index)],
+                       [None, "; ".join(parents)], [None, "; ".join(children) or "-"], [None]] +
+                      attribute_rows(0))
+
+    # blocks are stacked in columns of four, separated by an empty row
+    columns = [blocks[start:start + EXCEL_BLOCKS_PER_COLUMN] for start in
+               range(0, len(blocks), EXCEL_BLOCKS_PER_COLUMN)]
+    column_rows = [[row for block in column for row in block + [[None]]] for column in columns]
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet()
+    for number in range(max(len(rows) for rows in column_rows)):
+        line = list()
+        for rows in column_rows:
+            row = rows[number] if number < len(rows) else []
+            line += (list(row) + [None] * 4)[:4]
+        sheet.append(line)
+    book.save(path)
@@ -3,23 +3,30 @@ from __future__ import annotations
 import codecs
 import csv
 import datetime
+import hashlib
+import itertools
+import json
+import logging
 import os
 import uuid
 import xml.etree.ElementTree as ET
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ContextManager, Iterable, Iterator
 
 import jinja2
+import openpyxl
 from PySide6.QtWidgets import QFileDialog
 from jinja2 import Environment, FileSystemLoader
 from lxml import etree
 
 from desiteRuleCreator import Template
 from desiteRuleCreator.QtDesigns import ui_mainwindow
-from desiteRuleCreator.Windows import popups, graphs_window
-from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.Filehandling import rule_cache
+from desiteRuleCreator.Windows import popups
+from desiteRuleCreator.data import classes, constants, js_lint, rule_compiler
 
 if TYPE_CHECKING:
     from desiteRuleCreator.main_window import MainWindow
+    from desiteRuleCreator.Widgets.script_widget import ScriptLinter
 
 output_date_time = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 output_date = datetime.datetime.now().strftime("%Y-%m-%d")
@@ -39,18 +46,141 @@ def get_path(main_window: MainWindow, file_format: str) -> str:
     return path
 
 
-def handle_header(main_window: MainWindow, export_format: str) -> etree._Element:
+def handle_header(author: str, export_format: str) -> etree._Element:
     ET.register_namespace("xsi", "http://www.w3.org/2001/XMLSchema-instance")
     xml_header = etree.Element(f'{{http://www.w3.org/2001/XMLSchema-instance}}{export_format}')
-    xml_header.set("user", str(main_window.project.author))
+    xml_header.set("user", str(author))
     xml_header.set("date", str(output_date_time))
     xml_header.set("version", "3.0.1")  # TODO: Desite version hinzufügen
     return xml_header
 
 
+def load_template(name: str = Template.TEMPLATE) -> jinja2.Template:
+    path = Template.HOME_DIR
+    file_loader = FileSystemLoader(path)
+    env = Environment(loader=file_loader)
+    env.trim_blocks = True
+    env.lstrip_blocks = True
+    template = env.get_template(name)
+
+    return template
+
+
+def ident_property_name(obj: classes.Object) -> str:
+    """Transorms native IFC Attributes like IfcType into desite Attributes"""
+    pset_name = obj.ident_attrib.property_set.name
+    if pset_name == constants.IGNORE_PSET:
+        return obj.ident_attrib.name
+    else:
+        return f"{pset_name}:{obj.ident_attrib.name}"
+
+
+def render_rule(template: jinja2.Template, obj: classes.Object) -> str:
+    property_sets = obj.property_sets
+    ident_name = obj.ident_attrib.name
+    ident_property_set = obj.ident_attrib.property_set.name
+    if ident_property_set == constants.IGNORE_PSET:
+        ident_property_set = ""
+    else:
+        ident_property_set = f"{ident_property_set}:"
+
+    return template.render(psets=property_sets, object=obj, ident=ident_name,
+                           ident_pset=ident_property_set, constants=constants,
+                           range_literal=rule_compiler.range_literal, format_literal=rule_compiler.format_literal)
+
+
+def dispatcher_entry(obj: classes.Object) -> str:
+    """ rule data of obj for the dispatcher table: the same checks the template renders and the Scripts as
+    (name, code), as JSON. RANGE Attributes get their compiled bounds as sixth entry, FORMAT Attributes the source
+    of their merged regex"""
+    attributes = list()
+    for property_set in obj.property_sets:
+        pset_name = "" if property_set.name == constants.IGNORE_PSET else f"{property_set.name}:"
+        for attribute in property_set.attributes:
+            entry = [pset_name, attribute.name, attribute.data_type, attribute.value_type, attribute.value]
+            if attribute.value_type == constants.RANGE:
+                entry.append(rule_compiler.compile_range(rule_compiler.freeze_range(attribute.value))._asdict())
+            elif attribute.value_type == constants.FORMAT:
+                entry.append(rule_compiler.compile_format(attribute.value).source)
+            attributes.append(entry)
+    scripts = [[script.name, script.code or ""] for script in obj.scripts]
+    return json.dumps({"attributes": attributes, "scripts": scripts}, ensure_ascii=False)
+
+
+def render_dispatcher(template: jinja2.Template, objects: list[classes.Object]) -> str:
+    """ one script for all Objects. Each element reads its identifier once per identifier property and picks its
+    rule data from a lookup table, instead of Desite testing one filter per Object"""
+    table: dict[str, dict[str, str]] = dict()
+    for obj in objects:
+        values = table.setdefault(ident_property_name(obj), dict())
+        value = str(obj.ident_attrib.value[0]) if obj.ident_attrib.value else ""
+        if value in values:
+            logging.warning(f"[{obj.name}] Identifier {value} mehrfach vergeben, Regel wird nicht exportiert")
+            continue
+        values[value] = dispatcher_entry(obj)
+
+    table_text = "{\n" + ",\n".join(
+        f"{json.dumps(name, ensure_ascii=False)}: {{\n" + ",\n".join(
+            f"{json.dumps(value, ensure_ascii=False)}: {entry}" for value, entry in values.items()) + "}"
+        for name, values in table.items()) + "}"
+    stamp = hashlib.sha1(table_text.encode("utf-8")).hexdigest()
+    return template.render(table=table_text, stamp=stamp, constants=constants)
+
+
+def lint_rules(rules: list[tuple[classes.Object, str, str]],
+               mark_scripts: bool = True) -> dict[classes.Object, list[str]]:
+    """ syntax check of (object, rule name, code) triples, errors are logged. Returns the messages per Object.
+    mark_scripts=False skips marking the Script items, which may only be changed in the GUI thread"""
+    results = js_lint.check_all(code for _, _, code in rules)
+    messages: dict[classes.Object, list[str]] = dict()
+    for (obj, name, _), error in zip(rules, results):
+        if error is not None:
+            message = f"[{obj.name}] {name}: JavaScript Syntaxfehler {error}"
+            logging.error(message)
+            messages.setdefault(obj, list()).append(message)
+    if mark_scripts:
+        mark_scripts_of({obj for obj, _, _ in rules})
+    return messages
+
+
+def lint_formats(objects: Iterable[classes.Object]) -> list[str]:
+    """ logs the FORMAT patterns which can't be compiled, the export leaves them out of the merged regex"""
+    messages = list()
+    for obj in objects:
+        for property_set in obj.property_sets:
+            for attribute in property_set.attributes:
+                if attribute.value_type != constants.FORMAT:
+                    continue
+                for error in rule_compiler.compile_format(attribute.value).errors:
+                    message = f"[{obj.name}] {property_set.name}:{attribute.name}: {error}"
+                    logging.error(message)
+                    messages.append(message)
+    return messages
+
+
+def mark_scripts_of(objects: Iterable[classes.Object]) -> None:
+    for obj in objects:
+        for script in obj.scripts:
+            script.set_lint_error(js_lint.check(script.code))
+
+
 ##TODO add xs:bool
 
-def export_modelcheck(main_window: MainWindow) -> None:
+def export_modelcheck(main_window: MainWindow, dispatcher: bool = False) -> None:
+    """ dispatcher=False exports one filtered checkrun per Object, dispatcher=True a single checkrun for all"""
+    main_window.update_script()
+    path = get_path(main_window, "qa.xml")
+
+    if path:
+        write_modelcheck(path, main_window.project, rule_cache.cache_path(main_window.save_path or path), dispatcher,
+                         linter=main_window.script_linter)
+
+
+def write_modelcheck(path: str, project: classes.Project, cache_file: str | None, dispatcher: bool = False,
+                     objects: list[classes.Object] = None, mark_scripts: bool = True,
+                     linter: ScriptLinter = None) -> None:
+    """ headless part of export_modelcheck. objects defaults to all Objects, cache_file=None disables the rule
+    cache. With a linter the syntax check runs on its worker thread and the cache is saved once it is done"""
     def add_js_rule(parent: etree._Element, file: codecs.StreamReaderWriter) -> str | None:
         name = os.path.basename(file.name)
         if not name.endswith(".js"):
@@ -101,9 +231,9 @@ def export_modelcheck(main_window: MainWindow) -> None:
         return checkrun
 
     def init_xml() -> (etree._Element, etree._Element):
-        xml_qa_export = handle_header(main_window, "qaExport")
+        xml_qa_export = handle_header(project.author, "qaExport")
         xml_element_section = handle_element_section(xml_qa_export)
-        xml_container = handle_container(xml_element_section, main_window.project)
+        xml_container = handle_container(xml_element_section, project)
         return xml_container, xml_qa_export
 
     def handle_rule(xml_checkrun: etree._Element, rule_type: str) -> etree._Element:
@@ -120,18 +250,8 @@ def export_modelcheck(main_window: MainWindow) -> None:
         attribute_rule_list = etree.SubElement(xml_rule, "attributeRuleList")
         return attribute_rule_list
 
-    def handle_template() -> jinja2.Template:
-        path = Template.HOME_DIR
-        file_loader = FileSystemLoader(path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        template = env.get_template("template.txt")
-
-        return template
-
     def define_xml_elements(xml_container: etree._Element, name: str) -> (etree._Element, etree._Element):
-        xml_checkrun = handle_checkrun(xml_container, name=name, author=main_window.project.author)
+        xml_checkrun = handle_checkrun(xml_container, name=name, author=project.author)
         xml_rule = handle_rule(xml_checkrun, "Attributes")
         xml_attribute_rule_list = handle_attribute_rule_list(xml_rule)
         handle_rule(xml_checkrun, "UniquePattern")
@@ -157,59 +277,79 @@ def export_modelcheck(main_window: MainWindow) -> None:
         code = etree.SubElement(xml_rule_script, "code")
         return code
 
-    def handle_object_rules(xml_container: etree._Element, template: jinja2.Template) -> dict[
-        etree._Element, classes.Object]:
+    def handle_cached_checkrun(xml_container: etree._Element, fragment: str) -> etree._Element:
+        xml_checkrun = etree.fromstring(fragment)
+        for xml_code in xml_checkrun.iter("code"):
+            if xml_code.text is None:
+                xml_code.text = ""  # keeps <code></code> instead of <code/>
+        xml_checkrun.set("user", str(project.author))
+        xml_checkrun.set("date", str(output_date_time))
+        xml_container.append(xml_checkrun)
+        return xml_checkrun
+
+    def handle_object_rules(xml_container: etree._Element, template: jinja2.Template,
+                            cache: rule_cache.RuleCache) -> dict[etree._Element, classes.Object]:
         xml_object_dict: dict[etree._Element, classes.Object] = dict()
-        obj_sorted: list[classes.Object] = list(classes.Object)
+        obj_sorted: list[classes.Object] = list(objects)
 
         obj_sorted.sort(key=lambda x: x.name)
         for obj in obj_sorted:
             if not obj.is_concept:
-                xml_checkrun = handle_checkrun(xml_container, obj.name, main_window.project.author)
+                key = rule_cache.rule_key(obj)
+                entry = cache.get(key)
+                if entry is not None:  # unchanged since the last export
+                    fragment, messages = entry
+                    for message in messages:
+                        logging.error(message)
+                    xml_object_dict[handle_cached_checkrun(xml_container, fragment)] = obj
+                    continue
+
+                xml_checkrun = handle_checkrun(xml_container, obj.name, project.author)
                 xml_rule = handle_rule(xml_checkrun, "Attributes")
                 xml_attribute_rule_list = handle_attribute_rule_list(xml_rule)
                 xml_rule_script = handle_rule_script(xml_attribute_rule_list, name=obj.name)
                 xml_code = handle_code(xml_rule_script)
 
-                property_sets = obj.property_sets
-                ident_name = obj.ident_attrib.name
-                ident_property_set = obj.ident_attrib.property_set.name
-                if ident_property_set == constants.IGNORE_PSET:
-                    ident_property_set = ""
-                else:
-                    ident_property_set = f"{ident_property_set}:"
-
-                cdata_code = template.render(psets=property_sets, object=obj, ident=ident_name,
-                                             ident_pset=ident_property_set, constants=constants)
+                cdata_code = render_rule(template, obj)
                 xml_code.text = cdata_code
+                rules.append((obj, obj.name, cdata_code))
                 handle_rule(xml_checkrun, "UniquePattern")
 
                 for script in obj.scripts:
                     xml_rule_script = handle_rule_script(xml_attribute_rule_list, name=script.name)
                     xml_code = handle_code(xml_rule_script)
                     xml_code.text = script.code
+                    rules.append((obj, script.name, script.code))
 
                 xml_object_dict[xml_checkrun] = obj
+                rendered.append((obj, key, xml_checkrun))
         return xml_object_dict
 
-    def handle_data_section(xml_qa_export: etree._Element, xml_checkrun_first: etree._Element,
-                            xml_checkrun_obj: dict[etree._Element, classes.Object],
-                            xml_checkrun_last: etree._Element) -> None:
-        def get_name() -> str:
-            """Transorms native IFC Attributes like IfcType into desite Attributes"""
-
-            pset_name = obj.ident_attrib.property_set.name
-            if pset_name == "IFC":
-                return obj.ident_attrib.name
+    def handle_dispatcher_rules(xml_container: etree._Element) -> etree._Element:
+        rule_objects = sorted((obj for obj in objects if not obj.is_concept), key=lambda x: x.name)
+        xml_checkrun = handle_checkrun(xml_container, "rules", project.author)
+        xml_rule = handle_rule(xml_checkrun, "Attributes")
+        xml_attribute_rule_list = handle_attribute_rule_list(xml_rule)
+        xml_rule_script = handle_rule_script(xml_attribute_rule_list, name="dispatcher")
+        xml_code = handle_code(xml_rule_script)
+        xml_code.text = render_dispatcher(load_template(Template.DISPATCHER_TEMPLATE), rule_objects)
+        handle_rule(xml_checkrun, "UniquePattern")
 
-            else:
-                return f"{pset_name}:{obj.ident_attrib.name}"
+        # the rule data is plain JSON, so only the Scripts need a syntax check
+        for obj in rule_objects:
+            for script in obj.scripts:
+                rules.append((obj, script.name, script.code))
+        return xml_checkrun
 
+    def handle_data_section(xml_qa_export: etree._Element, xml_checkrun_first: etree._Element,
+                            xml_checkrun_obj: dict[etree._Element, classes.Object],
+                            xml_checkrun_last: etree._Element, xml_checkrun_all: list[etree._Element] = ()) -> None:
         xml_data_section = etree.SubElement(xml_qa_export, "dataSection")
 
-        check_run_data = etree.SubElement(xml_data_section, "checkRunData")
-        check_run_data.set("refID", str(xml_checkrun_first.attrib.get("ID")))
-        etree.SubElement(check_run_data, "checkSet")
+        for xml_checkrun in [xml_checkrun_first] + list(xml_checkrun_all):
+            check_run_data = etree.SubElement(xml_data_section, "checkRunData")
+            check_run_data.set("refID", str(xml_checkrun.attrib.get("ID")))
+            etree.SubElement(check_run_data, "checkSet")
 
         for xml_checkrun, obj in xml_checkrun_obj.items():
             check_run_data = etree.SubElement(xml_data_section, "checkRunData")
@@ -217,7 +357,7 @@ def export_modelcheck(main_window: MainWindow) -> None:
             filter_list = etree.SubElement(check_run_data, "filterList")
             xml_filter = etree.SubElement(filter_list, "filter")
 
-            xml_filter.set("name", get_name())
+            xml_filter.set("name", ident_property_name(obj))
             xml_filter.set("dt", "xs:string")
             pattern = f'"{obj.ident_attrib.value[0]}"'  # ToDO: ändern
             xml_filter.set("pattern", pattern)
@@ -244,147 +384,166 @@ def export_modelcheck(main_window: MainWindow) -> None:
         property_section = etree.SubElement(repository, "propertySection")
 
     def export(path: str) -> None:
-        template = handle_template()
+        template = load_template()
+        cache = rule_cache.RuleCache(cache_file)
         xml_container, xml_qa_export = init_xml()
         xml_checkrun_first, xml_attribute_rule_list = define_xml_elements(xml_container, "initial_tests")
         handle_js_rules(xml_attribute_rule_list, "start")
-        xml_checkrun_obj = handle_object_rules(xml_container, template)
+        if dispatcher:
+            xml_checkrun_obj = dict()
+            xml_checkrun_all = [handle_dispatcher_rules(xml_container)]
+        else:
+            xml_checkrun_obj = handle_object_rules(xml_container, template, cache)
+            xml_checkrun_all = list()
         xml_checkrun_last, xml_attribute_rule_list = define_xml_elements(xml_container, "untested")
         handle_js_rules(xml_attribute_rule_list, "end")
-        handle_data_section(xml_qa_export, xml_checkrun_first, xml_checkrun_obj, xml_checkrun_last)
+        handle_data_section(xml_qa_export, xml_checkrun_first, xml_checkrun_obj, xml_checkrun_last,
+                            xml_checkrun_all)
         handle_property_section(xml_qa_export)
+        lint_formats(obj for obj in objects if not obj.is_concept)
 
         tree = etree.ElementTree(xml_qa_export)
         with open(path, "wb") as f:
             tree.write(f, xml_declaration=True, pretty_print=True, encoding="utf-8", method="xml")
 
-    path = get_path(main_window, "qa.xml")
-
-    if path:
-        export(path)
-        pass
-
+        checkruns = [(obj, key, etree.tostring(xml_checkrun, encoding="unicode")) for obj, key, xml_checkrun in
+                     rendered]
 
-def export_bs(main_window: MainWindow):
-    def handle_elementsection(xml_parent: etree._Element):
+        def store(messages: dict[classes.Object, list[str]]) -> None:
+            if mark_scripts:
+                mark_scripts_of({obj for obj, _, _ in rules})
+            for obj, key, text in checkruns:
+                cache.put(key, text, messages.get(obj, ()))
+            cache.save()
 
-        def handle_section(node: graphs_window.Node, xml_item: etree._Element) -> None:
-
-            nonlocal id_dict
-            xml_child = etree.SubElement(xml_item, "section")
-            id = str(uuid.uuid4())
-            id_dict[node] = id
-            xml_child.set("ID", id)
-            xml_child.set("name", node.object.name)
-            xml_child.set("pre", "")
-            xml_child.set("type", "typeBsGroup")
-            xml_child.set("takt", "")
-
-            for child in node.children:
-                handle_section(child, xml_child)
-
-        ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-        xml_elementsection = etree.SubElement(xml_parent, "elementSection")
-        root = ui.tree.invisibleRootItem()
-        xml_root = etree.SubElement(xml_elementsection, "section")
-        xml_root.set("ID", str(uuid.uuid4()))
-        xml_root.set("name", "BS Autogenerated")
-        xml_root.set("pre", "")
-        xml_root.set("type", "typeBsContainer")
-        xml_root.set("takt", "")
-
-        root_objects: list[graphs_window.Node] = [node for node in graphs_window.Node._registry if
-                                                  node.parent_box is None]
-
-        id_dict = dict()
-        for node in root_objects:
-            handle_section(node, xml_root)
-
-        return xml_elementsection, id_dict
-
-    def handle_repository(xml_parent: etree._Element, id_dict: dict[graphs_window.Node, str]) -> None:
-        def handle_property_type_section() -> dict[str, int]:
-            xml_property_type_section = etree.SubElement(xml_repo, "propertyTypeSection")
-
-            attribute_dict = dict()
-
-            i = 1
+        if linter is None:
+            store(lint_rules(rules, mark_scripts=False))
+        else:
+            linter.run(lambda: lint_rules(rules, mark_scripts=False), store)
+
+    objects = list(classes.Object) if objects is None else objects
+    rules: list[tuple[classes.Object, str, str]] = list()
+    rendered: list[tuple[classes.Object, str, etree._Element]] = list()  # checkruns missing in the cache
+    export(path)
+
+
+def bs_roots(objects: Iterable[classes.Object] = None) -> list[classes.Object]:
+    """ like the graph window: Objects which aren't aggregated by another Object are the roots of the BS"""
+    objects = classes.Object if objects is None else objects
+    return sorted((obj for obj in objects if not obj.aggregates_from), key=lambda obj: obj.name)
+
+
+def write_bs(path: str, author: str, objects: list[classes.Object] = None) -> int:
+    """ writes the BS export without building the xml tree in memory and without the graph window. Returns the
+    number of sections"""
+
+    def section_attributes(name: str, section_type: str) -> dict[str, str]:
+        return {"ID": str(uuid.uuid4()), "name": name, "pre": "", "type": section_type, "takt": ""}
+
+    def write_sections(xf: etree.xmlfile, root: classes.Object, sections: list[tuple[str, classes.Object]]) -> None:
+        """ depth first with an explicit stack of open sections, so long aggregation chains don't hit the
+        recursion limit. Objects already on the path would lead to an endless cycle"""
+        on_path: set[classes.Object] = set()
+        stack: list[tuple[classes.Object, Iterator[classes.Object], ContextManager]] = list()
+
+        def open_section(obj: classes.Object) -> None:
+            attributes = section_attributes(obj.name, "typeBsGroup")
+            sections.append((attributes["ID"], obj))
+            element = xf.element("section", attributes)
+            element.__enter__()
+            on_path.add(obj)
+            stack.append((obj, iter(sorted(obj.aggregates_to, key=lambda item: item.name)), element))
+
+        open_section(root)
+        while stack:
+            obj, children, element = stack[-1]
+            child = next((child for child in children if child not in on_path), None)
+            if child is None:
+                stack.pop()
+                element.__exit__(None, None, None)
+                on_path.discard(obj)
+            else:
+                open_section(child)
+
+    def write_element_section(xf: etree.xmlfile) -> list[tuple[str, classes.Object]]:
+        sections: list[tuple[str, classes.Object]] = list()
+        with xf.element("elementSection"):
+            with xf.element("section", section_attributes("BS Autogenerated", "typeBsContainer")):
+                for obj in bs_roots(objects):
+                    write_sections(xf, obj, sections)
+        return sections
+
+    def write_property_type_section(xf: etree.xmlfile) -> dict[str, int]:
+        attribute_dict = dict()
+        with xf.element("propertyTypeSection"):
             for attribute in classes.Attribute:
                 # use attribute_text instead of attribute to remove duplicates
                 attribute_text = f"{attribute.property_set.name}:{attribute.name}"
                 if attribute_text not in attribute_dict:
-                    xml_ptype = etree.SubElement(xml_property_type_section, "ptype")
-                    xml_ptype.set("key", str(i))
-                    xml_ptype.set("name", attribute_text)
-                    xml_ptype.set("datatype", attribute.data_type)
-                    xml_ptype.set("unit", "")
-                    xml_ptype.set("inh", "false")
-                    attribute_dict[attribute_text] = i
-                    i += 1
-
-            return attribute_dict
-
-        def handle_property_section() -> None:
-            xml_property_section = etree.SubElement(xml_repo, "propertySection")
-
-            for node, ref_id in id_dict.items():
-                obj = node.object
+                    attribute_dict[attribute_text] = len(attribute_dict) + 1
+                    xf.write(etree.Element("ptype", key=str(attribute_dict[attribute_text]), name=attribute_text,
+                                           datatype=attribute.data_type, unit="", inh="false"))
+        return attribute_dict
+
+    def write_property_section(xf: etree.xmlfile, sections: list[tuple[str, classes.Object]],
+                               attribute_dict: dict[str, int]) -> None:
+        with xf.element("propertySection"):
+            for ref_id, obj in sections:
                 for property_set in obj.property_sets:
                     for attribute in property_set.attributes:
-                        attribute_text = f"{attribute.property_set.name}:{attribute.name}"
-                        ref_type = attribute_dict[attribute_text]
-                        xml_property = etree.SubElement(xml_property_section, "property")
-                        xml_property.set("refID", str(ref_id))
-                        xml_property.set("refType", str(ref_type))
+                        ref_type = attribute_dict[f"{property_set.name}:{attribute.name}"]
+                        xml_property = etree.Element("property", refID=ref_id, refType=str(ref_type))
                         if attribute == obj.ident_attrib:
-                            xml_property.text = attribute.value[0]
+                            xml_property.text = attribute.value[0] if attribute.value else ""
                         else:
                             xml_property.text = "füllen!"
+                        xf.write(xml_property)
+
+    def write_repository(xf: etree.xmlfile, sections: list[tuple[str, classes.Object]]) -> None:
+        with xf.element("repository"):
+            with xf.element("IDMapping"):
+                for i, (ref_id, _) in enumerate(sections):
+                    xf.write(etree.Element("ID", k=str(i + 1), v=ref_id))
+            attribute_dict = write_property_type_section(xf)
+            write_property_section(xf, sections, attribute_dict)
+
+    def write_relation_section(xf: etree.xmlfile) -> None:
+        with xf.element("relationSection"):
+            xf.write(etree.Element("IDMapping"))
+            xf.write(etree.Element("relation", name="default"))
+
+    namespace = "http://www.w3.org/2001/XMLSchema-instance"
+    header = {"user": str(author), "date": str(output_date_time), "version": "3.0.1"}
+    with etree.xmlfile(path, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element(f"{{{namespace}}}bsExport", header, nsmap={"xsi": namespace}):
+            sections = write_element_section(xf)
+            xf.write(etree.Element("linkSection"))
+            write_repository(xf, sections)
+            write_relation_section(xf)
+    return len(sections)
+
+
+def export_bs(main_window: MainWindow) -> None:
+    path = get_path(main_window, "bs.xml")
 
-        xml_repo = etree.SubElement(xml_parent, "repository")
-        xml_id_mapping = etree.SubElement(xml_repo, "IDMapping")
-
-        for i, (item, id_value) in enumerate(id_dict.items()):
-            xml_id = etree.SubElement(xml_id_mapping, "ID")
-            xml_id.set("k", str(i + 1))
-            xml_id.set("v", str(id_value))
-
-        attribute_dict = handle_property_type_section()
-        handle_property_section()
-
-    def handle_relation_section(xml_parent: etree._Element) -> None:
-        xml_relation_section = etree.SubElement(xml_parent, "relationSection")
-
-        xml_id_mapping = etree.SubElement(xml_relation_section, "IDMapping")
-        xml_relation = etree.SubElement(xml_relation_section, "relation")
-        xml_relation.set("name", "default")
-
-    def export() -> None:
-        xml_boq_export = handle_header(main_window, "bsExport")
-        xml_elementsection, id_dict = handle_elementsection(xml_boq_export)
-
-        xml_link_section = etree.SubElement(xml_boq_export, "linkSection")
-        xml_repository = handle_repository(xml_boq_export, id_dict)
-        handle_relation_section(xml_boq_export)
-
-        tree = etree.ElementTree(xml_boq_export)
+    if path:
+        write_bs(path, main_window.project.author)
 
-        with open(path, "wb") as f:
-            tree.write(f, xml_declaration=True, pretty_print=True, encoding="utf-8", method="xml")
 
-    path = get_path(main_window, "bs.xml")
+def export_bookmarks(main_window: MainWindow) -> None:
+    path = get_path(main_window, "bkxml")
 
     if path:
-        export()
-        pass
+        write_bookmarks(path)
 
 
-def export_bookmarks(main_window: MainWindow) -> None:
+def write_bookmarks(path: str, objects: list[classes.Object] = None) -> None:
     def handle_bookmark_list(xml_parent: etree._Element) -> None:
         xml_bookmark_list = etree.SubElement(xml_parent, "cBookmarkList")
 
         obj: classes.Object
-        for obj in classes.Object:
+        for obj in objects:
             xml_bookmark = etree.SubElement(xml_bookmark_list, "cBookmark")
             xml_bookmark.set("ID", str(obj.identifier))
 
@@ -417,54 +576,127 @@ def export_bookmarks(main_window: MainWindow) -> None:
         with open(path, "wb") as f:
             tree.write(f, xml_declaration=True, pretty_print=True, encoding="utf-8", method="xml")
 
-    path = get_path(main_window, "bkxml")
+    objects = list(classes.Object) if objects is None else objects
+    export()
+
+
+BoqIndex = dict[str, dict[str, classes.Attribute]]  # PropertySet name -> lower case Attribute name -> Attribute
+
+
+def boq_index(obj: classes.Object) -> BoqIndex:
+    """ name maps of obj, built once instead of searching the PropertySets and Attributes for every cell"""
+    index: BoqIndex = dict()
+    for property_set in obj.property_sets:
+        attributes = index.setdefault(property_set.name, dict())
+        for attribute in property_set.attributes:
+            attributes.setdefault(attribute.name.lower(), attribute)
+    return index
+
+
+def boq_columns(indexes: list[tuple[classes.Object, BoqIndex]],
+                pset_names: list[str] | None) -> tuple[list[tuple[str, str]], dict[str, str]]:
+    """ distinct (PropertySet name, Attribute name) columns in the order of pset_names, None exports all
+    PropertySets. Returns the columns and the data type of each column"""
+    columns: dict[tuple[str, str], None] = dict()
+    data_types: dict[str, str] = dict()
+    by_pset: dict[str, dict[str, None]] = {name: dict() for name in pset_names or []}
+    for obj, index in indexes:
+        for pset_name, attributes in index.items():
+            if pset_names is not None and pset_name not in by_pset:
+                continue
+            names = by_pset.setdefault(pset_name, dict())
+            for key, attribute in attributes.items():
+                if key not in names:
+                    names[key] = None
+                    columns[(pset_name, attribute.name)] = None
+                    data_types[f"{pset_name}:{attribute.name}"] = attribute.data_type
+    position = {pset_name: index for index, pset_name in enumerate(by_pset)}
+    return sorted(columns, key=lambda column: position[column[0]]), data_types
+
+
+def boq_value(attribute: classes.Attribute) -> str:
+    """ cell text of an Attribute, the pairs of a RANGE are written as from-to"""
+    if attribute.value_type == constants.RANGE:
+        return "|".join("-".join(str(item) for item in pair) if isinstance(pair, (list, tuple)) else str(pair)
+                        for pair in attribute.value)
+    return "|".join(str(item) for item in attribute.value)
+
+
+def boq_rows(indexes: list[tuple[classes.Object, BoqIndex]], columns: list[tuple[str, str]]) -> Iterator[list[str]]:
+    pset_names = {pset_name for pset_name, _ in columns}
+    keys = [(pset_name, attribute_name.lower()) for pset_name, attribute_name in columns]
+    for obj, index in indexes:
+        if pset_names.isdisjoint(index):
+            continue
+        ident = obj.ident_attrib
+        line = [f"{ident.property_set.name}:{ident.name}", ident.value[0] if ident.value else ""]
+        for pset_name, key in keys:
+            attribute = index.get(pset_name, dict()).get(key)
+            line.append("" if attribute is None else boq_value(attribute))
+        yield line
+
+
+def write_boq_csv(path: str, header: list[str], rows: Iterator[list[str]]) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(header)
+        while True:
+            chunk = list(itertools.islice(rows, constants.BOQ_CHUNK_SIZE))
+            if not chunk:
+                break
+            writer.writerows(chunk)
+
+
+def write_boq_xlsx(path: str, header: list[str], rows: Iterator[list[str]]) -> None:
+    """ write_only workbooks stream the rows to the file instead of keeping every cell in memory"""
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet("BoQ")
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    book.save(path)
+
+
+def export_boq(main_window: MainWindow, path: str | None = None, pset_names: list[str] | None = None) -> None:
+    """ exports the Attributes of the PropertySets pset_names as BoQ. A csv gets the matching Desite import
+    script, an xlsx path is written with openpyxl"""
+    if path is None:
+        directory = main_window.export_path if main_window.export_path is not None else ""
+        path = QFileDialog.getSaveFileName(main_window, "Save BoQ", directory,
+                                           "csv Files (*.csv);;xlsx Files (*.xlsx)")[0]
+        if not path:
+            return
+        words = list(dict.fromkeys(property_set.name for property_set in classes.PropertySet))
+        ok, pset_names = popups.req_boq_pset(main_window, words)
+        if not ok:
+            return
+
+    indexes = [(obj, boq_index(obj)) for obj in classes.Object if not obj.is_concept]
+    columns, data_types = boq_columns(indexes, pset_names)
+    if not columns:
+        logging.warning(f"BoQ Export: keine passenden PropertySets gefunden ({', '.join(pset_names or [])})")
+        return
+    header = ["Ident", "Object"] + [f"{pset_name}:{attribute_name}" for pset_name, attribute_name in columns]
+    rows = boq_rows(indexes, columns)
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        write_boq_xlsx(path, header, rows)
+    else:
+        write_boq_csv(path, header, rows)
+        write_boq_import_script(path, data_types)
 
-    if path:
-        export()
-        pass
-
-
-def export_boq(main_window: MainWindow):
-    def get_distinct_attributes(property_sets: list[classes.PropertySet]):
-        attribute_names = list()
-
-        for property_set in property_sets:
-            attribute: classes.Attribute
-            attribute_names += [attribute.name for attribute in property_set.attributes]
-
-        distinct_attribute_names = list(dict.fromkeys(attribute_names))
-
-        return distinct_attribute_names
-
-    path = get_path(main_window, "csv")
-    words = [property_set.name for property_set in classes.PropertySet]
-    words = list(dict.fromkeys(words))
-
-    ok, pset_name = popups.req_boq_pset(main_window, words)
-    if ok:
-        with open(path, "w", ) as file:
-            writer = csv.writer(file, delimiter=";")
-            property_sets = [property_set for property_set in classes.PropertySet if
-                             property_set.name == pset_name]
-            distinct_attribute_names = get_distinct_attributes(property_sets)
-            header = ["Ident", "Object"] + [f"{pset_name}:{name}" for name in distinct_attribute_names]
-            writer.writerow(header)
-            obj: classes.Object
-
-            objects = [obj for obj in classes.Object if
-                       pset_name in [pset.name for pset in obj.property_sets]]  # find objects with matching propertyset
-            for obj in objects:
-                property_set = obj.get_property_set_by_name(pset_name)
-                ident = obj.ident_attrib
-                line = [f"{ident.property_set.name}:{ident.name}", ident.value[0]]
-                for attribute_name in distinct_attribute_names:
-                    attribute: classes.Attribute = property_set.get_attribute_by_name(attribute_name)
-
-                    if attribute is not None:
-                        line.append("|".join(attribute.value))
-                    else:
-                        line.append("")
-                writer.writerow(line)
-            print(writer)
-
-    pass
+
+def boq_import_script_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + constants.BOQ_IMPORT_SUFFIX
+
+
+def write_boq_import_script(csv_path: str, data_types: dict[str, str]) -> str:
+    """ writes the Desite import script for the BoQ csv next to it. The script indexes all elements once by the
+    identifier properties of the csv, instead of filtering all elements for every line"""
+    template = load_template(Template.BOQ_IMPORT_TEMPLATE)
+    script = template.render(csv_name=os.path.basename(csv_path),
+                             csv_path=json.dumps(csv_path, ensure_ascii=False),
+                             data_types=json.dumps(data_types, ensure_ascii=False))
+    script_path = boq_import_script_path(csv_path)
+    with open(script_path, "w", encoding="utf-8") as file:
+        file.write(script)
+    return script_path
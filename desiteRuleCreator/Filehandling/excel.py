@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 import openpyxl
 from openpyxl.cell.cell import Cell
 from openpyxl.worksheet.worksheet import Worksheet
-from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.data import aggregation, classes, constants, identifiers
 from desiteRuleCreator.Filehandling import open_file
 if TYPE_CHECKING:
     pass
@@ -113,6 +113,7 @@ def create_object(sheet: Worksheet, cell: Cell, pset_dict: dict[str, (classes.Pr
     obj = classes.Object(name, ident_attrib)
     obj.add_property_set(ident_pset)
     obj.add_property_set(pset)
+    identifiers.check_unique(obj)
 
     aggregate_list = split_string(aggregate_children)
     if aggregate_list is None:
@@ -205,3 +206,4 @@ def start(main_window, path: str) -> None:
 
     build_tree(main_window)
     create_aggregation(pset_dict,aggregate_dict)
+    aggregation.report_cycles()
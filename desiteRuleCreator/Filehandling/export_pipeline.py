@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+
+from PySide6.QtWidgets import QFileDialog
+
+from desiteRuleCreator.Filehandling import desite_export, rule_cache
+from desiteRuleCreator.Windows import popups
+from desiteRuleCreator.data import classes, constants
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.main_window import MainWindow
+
+
+class ExportRecord(NamedTuple):
+    """ everything the sinks need of one Object, built once per export"""
+    obj: classes.Object
+    index: desite_export.BoqIndex
+
+
+class ExportSink(object):
+    """ one export format. add() receives the records in the order of the walk on the worker thread of the sink,
+    finish() writes the file after the last record"""
+    suffix = ""
+
+    def __init__(self, base_path: str) -> None:
+        self.path = base_path + self.suffix
+        self.error: Exception | None = None
+
+    def add(self, record: ExportRecord) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        pass
+
+
+class CollectingSink(ExportSink):
+    """ formats which need all Objects before the first byte can be written (ids, columns, hierarchy)"""
+
+    def __init__(self, base_path: str) -> None:
+        super(CollectingSink, self).__init__(base_path)
+        self.records: list[ExportRecord] = list()
+
+    def add(self, record: ExportRecord) -> None:
+        self.records.append(record)
+
+    @property
+    def objects(self) -> list[classes.Object]:
+        return [record.obj for record in self.records]
+
+
+class ModelCheckSink(CollectingSink):
+    suffix = ".qa.xml"
+
+    def __init__(self, base_path: str, project: classes.Project, cache_file: str | None,
+                 dispatcher: bool = False) -> None:
+        super(ModelCheckSink, self).__init__(base_path)
+        self.project = project
+        self.cache_file = cache_file
+        self.dispatcher = dispatcher
+
+    def finish(self) -> None:
+        # Script items are marked by the pipeline in the GUI thread
+        desite_export.write_modelcheck(self.path, self.project, self.cache_file, self.dispatcher, self.objects,
+                                       mark_scripts=False)
+
+
+class BsSink(CollectingSink):
+    suffix = ".bs.xml"
+
+    def __init__(self, base_path: str, author: str) -> None:
+        super(BsSink, self).__init__(base_path)
+        self.author = author
+
+    def finish(self) -> None:
+        desite_export.write_bs(self.path, self.author, self.objects)
+
+
+class BookmarkSink(CollectingSink):
+    suffix = ".bkxml"
+
+    def finish(self) -> None:
+        desite_export.write_bookmarks(self.path, self.objects)
+
+
+class BoqSink(CollectingSink):
+    suffix = ".csv"
+
+    def __init__(self, base_path: str, pset_names: list[str] | None) -> None:
+        super(BoqSink, self).__init__(base_path)
+        self.pset_names = pset_names
+
+    def add(self, record: ExportRecord) -> None:
+        if not record.obj.is_concept:
+            self.records.append(record)
+
+    def finish(self) -> None:
+        indexes = [(record.obj, record.index) for record in self.records]
+        columns, data_types = desite_export.boq_columns(indexes, self.pset_names)
+        if not columns:
+            logging.warning(f"BoQ Export: keine passenden PropertySets gefunden ({', '.join(self.pset_names or [])})")
+            return
+        header = ["Ident", "Object"] + [f"{pset_name}:{attribute_name}" for pset_name, attribute_name in columns]
+        desite_export.write_boq_csv(self.path, header, desite_export.boq_rows(indexes, columns))
+        desite_export.write_boq_import_script(self.path, data_types)
+
+
+class JsonSink(ExportSink):
+    """ plain dump of the Objects, written record by record"""
+    suffix = ".json"
+
+    def __init__(self, base_path: str) -> None:
+        super(JsonSink, self).__init__(base_path)
+        self.file = None
+        self.count = 0
+
+    @staticmethod
+    def entry(obj: classes.Object) -> dict:
+        ident = None
+        if not obj.is_concept:
+            ident = {"property": desite_export.ident_property_name(obj), "value": obj.ident_attrib.value}
+        return {
+            "identifier": str(obj.identifier),
+            "name": obj.name,
+            "ident": ident,
+            "parent": None if obj.parent is None else str(obj.parent.identifier),
+            "aggregates_to": sorted(str(child.identifier) for child in obj.aggregates_to),
+            "property_sets": {
+                property_set.name: {
+                    attribute.name: {"value_type": attribute.value_type, "data_type": attribute.data_type,
+                                     "value": attribute.value} for attribute in property_set.attributes}
+                for property_set in obj.property_sets},
+            "scripts": {script.name: script.code for script in obj.scripts},
+        }
+
+    def add(self, record: ExportRecord) -> None:
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.file.write("[")
+        self.file.write(",\n" if self.count else "\n")
+        json.dump(self.entry(record.obj), self.file, ensure_ascii=False)
+        self.count += 1
+
+    def finish(self) -> None:
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.file.write("[")
+        self.file.write("\n]\n")
+        self.file.close()
+        self.file = None
+
+
+class ExportPipeline(object):
+    """ walks the Objects once and hands the records to every sink
+
+    Each sink runs on its own thread behind a bounded queue, so slow formats don't hold up the walk and the files
+    are written at the same time. A sink that fails is drained until the end of the walk and reported by run().
+    """
+
+    def __init__(self, sinks: list[ExportSink]) -> None:
+        self.sinks = sinks
+
+    @staticmethod
+    def consume(sink: ExportSink, records: queue.Queue) -> None:
+        while True:
+            record = records.get()
+            if record is None:
+                break
+            if sink.error is not None:
+                continue
+            try:
+                sink.add(record)
+            except Exception as error:
+                sink.error = error
+        if sink.error is None:
+            try:
+                sink.finish()
+            except Exception as error:
+                sink.error = error
+
+    def run(self, objects: list[classes.Object] = None) -> list[ExportSink]:
+        """ returns the sinks that failed, their exception is stored in sink.error"""
+        objects = sorted(classes.Object if objects is None else objects, key=lambda obj: obj.name)
+        queues = [queue.Queue(maxsize=constants.EXPORT_QUEUE_SIZE) for _ in self.sinks]
+        threads = [threading.Thread(target=self.consume, args=(sink, records), daemon=True)
+                   for sink, records in zip(self.sinks, queues)]
+        for thread in threads:
+            thread.start()
+        try:
+            for obj in objects:
+                record = ExportRecord(obj, desite_export.boq_index(obj))
+                for records in queues:
+                    records.put(record)
+        finally:
+            for records in queues:
+                records.put(None)
+            for thread in threads:
+                thread.join()
+
+        if any(isinstance(sink, ModelCheckSink) for sink in self.sinks):
+            desite_export.mark_scripts_of(objects)
+        failed = [sink for sink in self.sinks if sink.error is not None]
+        for sink in failed:
+            logging.error(f"[{sink.path}] Export fehlgeschlagen: {sink.error}")
+        return failed
+
+
+def release_sinks(base_path: str, project: classes.Project, pset_names: list[str] | None,
+                  cache_file: str | None = None) -> list[ExportSink]:
+    """ all formats of a release: model check, BS, bookmarks, BoQ and the JSON dump"""
+    return [ModelCheckSink(base_path, project, cache_file), BsSink(base_path, project.author),
+            BookmarkSink(base_path), BoqSink(base_path, pset_names), JsonSink(base_path)]
+
+
+def export_all(main_window: MainWindow) -> None:
+    main_window.update_script()
+    directory = main_window.export_path if main_window.export_path is not None else ""
+    path = QFileDialog.getSaveFileName(main_window, "Export All", directory, "All Files (*)")[0]
+    if not path:
+        return
+    words = list(dict.fromkeys(property_set.name for property_set in classes.PropertySet))
+    ok, pset_names = popups.req_boq_pset(main_window, words)
+    if not ok:
+        return
+
+    base_path = os.path.splitext(path)[0]
+    cache_file = rule_cache.cache_path(main_window.save_path or base_path + ModelCheckSink.suffix)
+    ExportPipeline(release_sinks(base_path, main_window.project, pset_names, cache_file)).run()
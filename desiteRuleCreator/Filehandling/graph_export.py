@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, NamedTuple
+
+from PySide6.QtWidgets import QFileDialog
+from lxml import etree
+
+from desiteRuleCreator.Filehandling import open_file
+from desiteRuleCreator.Windows import graphs_window
+from desiteRuleCreator.data import classes, constants
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.main_window import MainWindow
+
+FORMATS = ("svg", "graphml", "dot")
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+GRAPHML_NAMESPACE = "http://graphml.graphdrawing.org/xmlns"
+TEXT_HEIGHT = 20
+
+
+class GraphItem(object):
+    """ Lightweight replacement for graphs_window.Node which can be laid out by buchheim without any widget"""
+
+    def __init__(self, obj: classes.Object, parent: GraphItem = None) -> None:
+        self.object = obj
+        self.parent = parent
+        self.children: list[GraphItem] = list()
+        self.x = 0.
+        self.y = 0.
+
+    def has_ancestor(self, obj: classes.Object) -> bool:
+        item = self
+        while item is not None:
+            if item.object == obj:
+                return True
+            item = item.parent
+        return False
+
+
+class SceneNode(NamedTuple):
+    name: str
+    identifier: str
+    property_sets: list[str]
+    x: float
+    y: float
+
+
+class SceneData(NamedTuple):
+    """ Plain copy of a laid out scene, so rendering doesn't touch the data model"""
+    title: str
+    nodes: list[SceneNode]
+    edges: list[tuple[int, int]]
+
+
+def build_tree(obj: classes.Object) -> GraphItem:
+    """ Expand the aggregations of obj like GraphWindow.construct_all_nodes does"""
+    root = GraphItem(obj)
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        for child_obj in sorted(item.object.aggregates_to, key=graphs_window.item_to_name):
+            if item.has_ancestor(child_obj):
+                continue
+            child = GraphItem(child_obj, item)
+            item.children.append(child)
+            stack.append(child)
+    return root
+
+
+def iter_items(root: GraphItem) -> Iterator[GraphItem]:
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        yield item
+        stack.extend(reversed(item.children))
+
+
+def layout_scene(obj: classes.Object) -> SceneData:
+    root = build_tree(obj)
+    registry_size = len(graphs_window.DrawTree._registry)
+    try:
+        draw_tree = graphs_window.buchheim(root)
+        stack = [draw_tree]
+        while stack:
+            draw_item = stack.pop()
+            draw_item.tree.x = draw_item.x * (constants.BOX_WIDHT + constants.BOX_MARGIN)
+            draw_item.tree.y = draw_item.y * (constants.BOX_HEIGHT + constants.BOX_MARGIN)
+            stack.extend(draw_item.children)
+    finally:
+        # DrawTree registers every instance, drop ours so the GraphItems and Objects don't stay alive after export
+        del graphs_window.DrawTree._registry[registry_size:]
+
+    items = list(iter_items(root))
+    index_dict = {item: index for index, item in enumerate(items)}
+    nodes = list()
+    edges = list()
+    for item in items:
+        obj = item.object
+        identifier = "" if obj.is_concept else "|".join(str(value) for value in obj.ident_attrib.value)
+        property_sets = [property_set.name for property_set in obj.property_sets]
+        nodes.append(SceneNode(obj.name, identifier, property_sets, item.x, item.y))
+        for child in item.children:
+            edges.append((index_dict[item], index_dict[child]))
+
+    return SceneData(graphs_window.item_to_name(root.object), nodes, edges)
+
+
+def connection_points(top: SceneNode, bottom: SceneNode) -> list[tuple[float, float]]:
+    """ same path as graphs_window.Connection.points"""
+    mid_y = top.y + constants.BOX_HEIGHT + constants.BOX_BOTTOM_DISTANCE
+    bottom_x = bottom.x + constants.BOX_WIDHT / 2
+    top_x = top.x + constants.BOX_WIDHT / 2
+    return [(bottom_x, bottom.y), (bottom_x, mid_y), (top_x, mid_y), (top_x, top.y + constants.BOX_HEIGHT)]
+
+
+def to_svg(scene: SceneData) -> bytes:
+    width = max(node.x for node in scene.nodes) + constants.BOX_WIDHT
+    height = max(node.y for node in scene.nodes) + constants.BOX_HEIGHT
+
+    xml_svg = etree.Element(f"{{{SVG_NAMESPACE}}}svg", nsmap={None: SVG_NAMESPACE})
+    xml_svg.set("width", str(width))
+    xml_svg.set("height", str(height))
+    xml_svg.set("viewBox", f"0 0 {width} {height}")
+    xml_title = etree.SubElement(xml_svg, "title")
+    xml_title.text = scene.title
+
+    for top_index, bottom_index in scene.edges:
+        points = connection_points(scene.nodes[top_index], scene.nodes[bottom_index])
+        xml_line = etree.SubElement(xml_svg, "polyline")
+        xml_line.set("points", " ".join(f"{x},{y}" for x, y in points))
+        xml_line.set("fill", "none")
+        xml_line.set("stroke", "black")
+
+    for node in scene.nodes:
+        xml_group = etree.SubElement(xml_svg, "g")
+        xml_rect = etree.SubElement(xml_group, "rect")
+        xml_rect.set("x", str(node.x))
+        xml_rect.set("y", str(node.y))
+        xml_rect.set("width", str(constants.BOX_WIDHT))
+        xml_rect.set("height", str(constants.BOX_HEIGHT))
+        xml_rect.set("fill", "white")
+        xml_rect.set("stroke", "black")
+
+        lines = [node.name, node.identifier] + node.property_sets
+        max_lines = int(constants.BOX_HEIGHT / TEXT_HEIGHT) - 1
+        for line_number, text in enumerate(lines[:max_lines]):
+            xml_text = etree.SubElement(xml_group, "text")
+            xml_text.set("x", str(node.x + 8))
+            xml_text.set("y", str(node.y + (line_number + 1) * TEXT_HEIGHT))
+            if line_number == 0:
+                xml_text.set("font-weight", "bold")
+            xml_text.text = text
+
+    return etree.tostring(xml_svg, pretty_print=True, xml_declaration=True, encoding="utf-8")
+
+
+def to_graphml(scene: SceneData) -> bytes:
+    xml_graphml = etree.Element(f"{{{GRAPHML_NAMESPACE}}}graphml", nsmap={None: GRAPHML_NAMESPACE})
+    keys = {"name": "string", "identifier": "string", "property_sets": "string", "x": "double", "y": "double"}
+    for key, attr_type in keys.items():
+        xml_key = etree.SubElement(xml_graphml, "key")
+        xml_key.set("id", key)
+        xml_key.set("for", "node")
+        xml_key.set("attr.name", key)
+        xml_key.set("attr.type", attr_type)
+
+    xml_graph = etree.SubElement(xml_graphml, "graph")
+    xml_graph.set("id", scene.title)
+    xml_graph.set("edgedefault", "directed")
+
+    for index, node in enumerate(scene.nodes):
+        xml_node = etree.SubElement(xml_graph, "node")
+        xml_node.set("id", f"n{index}")
+        values = {"name": node.name, "identifier": node.identifier, "property_sets": "|".join(node.property_sets),
+                  "x": str(node.x), "y": str(node.y)}
+        for key, value in values.items():
+            xml_data = etree.SubElement(xml_node, "data")
+            xml_data.set("key", key)
+            xml_data.text = value
+
+    for index, (top_index, bottom_index) in enumerate(scene.edges):
+        xml_edge = etree.SubElement(xml_graph, "edge")
+        xml_edge.set("id", f"e{index}")
+        xml_edge.set("source", f"n{top_index}")
+        xml_edge.set("target", f"n{bottom_index}")
+
+    return etree.tostring(xml_graphml, pretty_print=True, xml_declaration=True, encoding="utf-8")
+
+
+def to_dot(scene: SceneData) -> bytes:
+    def quote(text: str) -> str:
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    lines = [f"digraph {quote(scene.title)} {{", "    node [shape=box];"]
+    for index, node in enumerate(scene.nodes):
+        label = quote(f"{node.name}\n{node.identifier}" if node.identifier else node.name).replace("\n", "\\n")
+        lines.append(f'    n{index} [label={label}, pos="{node.x},{-node.y}!"];')
+    for top_index, bottom_index in scene.edges:
+        lines.append(f"    n{top_index} -> n{bottom_index};")
+    lines.append("}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+RENDERERS = {"svg": to_svg, "graphml": to_graphml, "dot": to_dot}
+
+
+def write_scene(scene: SceneData, base_path: str, file_format: str) -> str:
+    path = f"{base_path}.{file_format}"
+    with open(path, "wb") as f:
+        f.write(RENDERERS[file_format](scene))
+    return path
+
+
+def export_scenes(folder: str, formats: tuple[str] = FORMATS, max_workers: int = None) -> list[str]:
+    """ Write every aggregation scene in each format to folder. The layout runs serially, once per root, only
+    rendering and writing are spread over a thread pool"""
+
+    root_objects = [obj for obj in classes.Object if not obj.aggregates_from and obj.aggregates_to]
+    root_objects.sort(key=graphs_window.item_to_name)
+    scenes = [layout_scene(obj) for obj in root_objects]
+
+    jobs = list()
+    used_names = dict()
+    for scene in scenes:
+        file_name = re.sub(r'[<>:"/\\|?*]', "_", scene.title)
+        count = used_names.get(file_name, 0)
+        used_names[file_name] = count + 1
+        if count:
+            file_name = f"{file_name}_{count}"
+        for file_format in formats:
+            jobs.append((scene, os.path.join(folder, file_name), file_format))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = list(executor.map(lambda job: write_scene(*job), jobs))
+    return paths
+
+
+def export_graphs(main_window: MainWindow) -> None:
+    base_path = os.path.dirname(main_window.export_path) if main_window.export_path is not None else ""
+    folder = QFileDialog.getExistingDirectory(main_window, "Export Graphs", base_path)
+    if folder:
+        export_scenes(folder)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the aggregation graphs of a DRCxml file")
+    parser.add_argument("path", help="DRCxml file")
+    parser.add_argument("folder", help="output folder")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    open_file.load_file(args.path)
+    os.makedirs(args.folder, exist_ok=True)
+    for path in export_scenes(args.folder, tuple(args.formats), args.workers):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
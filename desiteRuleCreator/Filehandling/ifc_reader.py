@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from desiteRuleCreator.data import classes, constants, rule_engine
+from desiteRuleCreator.data.rule_compiler import number_text
+
+# only these entities are read, everything else in the file is skipped by the regex engine
+ENTITY = re.compile(rb"#(\d+)\s*=\s*(IFCPROPERTYSINGLEVALUE|IFCPROPERTYSET|IFCRELDEFINESBYPROPERTIES)\s*\(")
+# rest of an entity up to its closing semicolon, semicolons inside strings don't count
+ENTITY_END = re.compile(rb"(?:[^';]|'(?:[^']|'')*')*;")
+TOKEN = re.compile(rb"\s*(?:'((?:[^']|'')*)'|#(\d+)|([A-Z][A-Z0-9_]*)\s*\(|(\()|(\))|(,)|(\.[A-Z0-9_]*\.)|([$*])|"
+                   rb"([^\s,()']+))")
+STRING_ESCAPE = re.compile(r"\\X2\\((?:[0-9A-F]{4})*)\\X0\\|\\X4\\((?:[0-9A-F]{8})*)\\X0\\|\\X\\([0-9A-F]{2})|"
+                           r"\\S\\(.)|\\P[A-I]\\|\\\\", re.IGNORECASE)
+REF_ID = re.compile(rb"#(\d+)")
+
+# the usual layout of the three entities, read without the tokenizer. Anything else falls back to parse_arguments
+_STRING = rb"'(?:[^']|'')*'"
+_OPTIONAL = rb"(?:\$|" + _STRING + rb")"
+_REF = rb"(?:\$|\*|#\d+)"
+_NEXT = rb"\s*,\s*"
+SINGLE_VALUE = re.compile(rb"\s*'((?:[^']|'')*)'" + _NEXT + _OPTIONAL + _NEXT +
+                          rb"(?:([A-Z][A-Z0-9_]*)\s*\(\s*(?:'((?:[^']|'')*)'|([^\s()',]+))\s*\)|\$)" + _NEXT + _REF +
+                          rb"\s*\)\s*;")
+PROPERTY_SET = re.compile(rb"\s*" + _STRING + _NEXT + _REF + _NEXT + rb"'((?:[^']|'')*)'" + _NEXT + _OPTIONAL + _NEXT +
+                          rb"\(([^()']*)\)\s*\)\s*;")
+RELATION = re.compile(rb"\s*" + _STRING + _NEXT + _REF + _NEXT + _OPTIONAL + _NEXT + _OPTIONAL + _NEXT +
+                      rb"\(([^()']*)\)" + _NEXT + rb"#(\d+)\s*\)\s*;")
+
+INTEGER_TYPES = ("IFCINTEGER", "IFCCOUNTMEASURE", "IFCTIMESTAMP")
+ENUMS = {".T.": True, ".F.": False, ".U.": None}
+
+
+class Ref(int):
+    """ #id of another entity"""
+
+
+def decode_string(raw: bytes) -> str:
+    """ STEP string: '' is a quote, \\X2\\, \\X4\\ and \\X\\ encode unicode and latin-1 characters"""
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    text = text.replace("''", "'")
+    if "\\" not in text:
+        return text
+
+    def replace(match: re.Match) -> str:
+        if match.group(1) is not None:
+            return "".join(chr(int(match.group(1)[i:i + 4], 16)) for i in range(0, len(match.group(1)), 4))
+        if match.group(2) is not None:
+            return "".join(chr(int(match.group(2)[i:i + 8], 16)) for i in range(0, len(match.group(2)), 8))
+        if match.group(3) is not None:
+            return chr(int(match.group(3), 16))
+        if match.group(4) is not None:
+            return chr(ord(match.group(4)) + 128)
+        if match.group() == "\\\\":
+            return "\\"
+        return ""  # \P.\ code page switch
+
+    return STRING_ESCAPE.sub(replace, text)
+
+
+def raw_value(raw: bytes):
+    """ unquoted STEP value: .T. .F. .U. and other enums, numbers"""
+    if raw.startswith(b"."):
+        enum = raw.decode("latin-1")
+        return ENUMS.get(enum, enum.strip("."))
+    try:
+        return float(raw)
+    except ValueError:
+        return raw.decode("latin-1")
+
+
+def parse_arguments(text: bytes) -> list:
+    """ argument list of an entity: strings, Ref, float, bool/None for .T. .F. .U., None for $ and *, lists and
+    (type, value) tuples for typed values like IFCLABEL('x')"""
+    stack: list[list] = [list()]
+    types: list[str | None] = [None]
+    for match in TOKEN.finditer(text):
+        string, ref, typed, opening, closing, _, enum, unset, raw = match.groups()
+        current = stack[-1]
+        if string is not None:
+            current.append(decode_string(string))
+        elif ref is not None:
+            current.append(Ref(ref))
+        elif typed is not None or opening is not None:
+            stack.append(list())
+            types.append(typed.decode() if typed is not None else None)
+        elif closing is not None:
+            if len(stack) == 1:
+                break
+            items = stack.pop()
+            type_name = types.pop()
+            stack[-1].append(items if type_name is None else (type_name, items[0] if items else None))
+        elif enum is not None or raw is not None:
+            current.append(raw_value(enum if enum is not None else raw))
+        elif unset is not None:
+            current.append(None)
+    return stack[0]
+
+
+def property_value(nominal_value) -> tuple[str | None, str | None]:
+    """ (text, data type) of the NominalValue of an IfcPropertySingleValue like Desite reads it"""
+    if not isinstance(nominal_value, tuple):
+        return None, None
+    type_name, value = nominal_value
+    if isinstance(value, bool):
+        return ("true" if value else "false"), "xs:boolean"
+    if isinstance(value, float):
+        return number_text(value), ("xs:int" if type_name in INTEGER_TYPES else constants.DATATYPE_NUMBER)
+    if isinstance(value, str):
+        return value, "xs:string"
+    return None, None
+
+
+class IfcProperties(object):
+    """ the properties of an IFC file in flat arrays, one block per entity type. Lists of references are stored
+    flat with the end position of every entity"""
+
+    def __init__(self) -> None:
+        # IfcPropertySingleValue
+        self.value_ids = array("q")
+        self.value_names: list[str] = list()
+        self.value_texts: list[str | None] = list()
+        self.value_types: list[str | None] = list()
+        # IfcPropertySet
+        self.pset_ids = array("q")
+        self.pset_names: list[str] = list()
+        self.pset_ends = array("q")
+        self.pset_members = array("q")
+        # IfcRelDefinesByProperties
+        self.rel_psets = array("q")
+        self.rel_ends = array("q")
+        self.rel_objects = array("q")
+
+    def add_value(self, step_id: int, name: str, nominal_value) -> None:
+        text, data_type = property_value(nominal_value)
+        self.value_ids.append(step_id)
+        self.value_names.append(sys.intern(name))
+        self.value_texts.append(text)
+        self.value_types.append(data_type)
+
+    def add_pset(self, step_id: int, name: str, members: Iterable[int]) -> None:
+        self.pset_ids.append(step_id)
+        self.pset_names.append(sys.intern(name))
+        self.pset_members.extend(members)
+        self.pset_ends.append(len(self.pset_members))
+
+    def add_relation(self, pset_id: int, objects: Iterable[int]) -> None:
+        self.rel_psets.append(pset_id)
+        self.rel_objects.extend(objects)
+        self.rel_ends.append(len(self.rel_objects))
+
+    def add(self, step_id: int, entity: bytes, arguments: list) -> None:
+        """ entity from the argument list of parse_arguments"""
+        if entity == b"IFCPROPERTYSINGLEVALUE":
+            self.add_value(step_id, str(arguments[0]), arguments[2] if len(arguments) > 2 else None)
+        elif entity == b"IFCPROPERTYSET":
+            members = arguments[4] if len(arguments) > 4 and isinstance(arguments[4], list) else []
+            self.add_pset(step_id, str(arguments[2]), (member for member in members if isinstance(member, Ref)))
+        elif len(arguments) > 5 and isinstance(arguments[5], Ref):
+            objects = arguments[4] if isinstance(arguments[4], list) else []
+            self.add_relation(arguments[5], (obj for obj in objects if isinstance(obj, Ref)))
+
+    def read(self, step_id: int, entity: bytes, data: bytes | mmap.mmap, position: int) -> bool:
+        """ reads the arguments of an entity starting at position, False at a truncated entity"""
+        if entity == b"IFCPROPERTYSINGLEVALUE":
+            match = SINGLE_VALUE.match(data, position)
+            if match is not None:
+                name, type_name, string, raw = match.groups()
+                if type_name is None:
+                    nominal_value = None
+                else:
+                    value = decode_string(string) if string is not None else raw_value(raw)
+                    nominal_value = (type_name.decode(), value)
+                self.add_value(step_id, decode_string(name), nominal_value)
+                return True
+        elif entity == b"IFCPROPERTYSET":
+            match = PROPERTY_SET.match(data, position)
+            if match is not None:
+                self.add_pset(step_id, decode_string(match.group(1)), map(int, REF_ID.findall(match.group(2))))
+                return True
+        else:
+            match = RELATION.match(data, position)
+            if match is not None:
+                self.add_relation(int(match.group(2)), map(int, REF_ID.findall(match.group(1))))
+                return True
+
+        rest = ENTITY_END.match(data, position)
+        if rest is None:
+            return False
+        self.add(step_id, entity, parse_arguments(rest.group()))
+        return True
+
+    def extend(self, other: IfcProperties) -> None:
+        """ appends the entities of the following chunk"""
+        self.value_ids.extend(other.value_ids)
+        self.value_names += other.value_names
+        self.value_texts += other.value_texts
+        self.value_types += other.value_types
+        offset = len(self.pset_members)
+        self.pset_ids.extend(other.pset_ids)
+        self.pset_names += other.pset_names
+        self.pset_ends.extend(end + offset for end in other.pset_ends)
+        self.pset_members.extend(other.pset_members)
+        offset = len(self.rel_objects)
+        self.rel_psets.extend(other.rel_psets)
+        self.rel_ends.extend(end + offset for end in other.rel_ends)
+        self.rel_objects.extend(other.rel_objects)
+
+    def to_dump(self, dump: rule_engine.PropertyDump = None) -> rule_engine.PropertyDump:
+        """ "pset:property" values per element, elements are named by their #id"""
+        dump = rule_engine.PropertyDump() if dump is None else dump
+        values = {step_id: index for index, step_id in enumerate(self.value_ids)}
+        psets = {step_id: index for index, step_id in enumerate(self.pset_ids)}
+        rel_start = 0
+        for pset_id, rel_end in zip(self.rel_psets, self.rel_ends):
+            elements = [f"#{obj}" for obj in self.rel_objects[rel_start:rel_end]]
+            rel_start = rel_end
+            pset = psets.get(pset_id)
+            if pset is None:
+                continue
+            member_start = self.pset_ends[pset - 1] if pset else 0
+            for member in self.pset_members[member_start:self.pset_ends[pset]]:
+                value = values.get(member)
+                if value is None:
+                    continue
+                name = f"{self.pset_names[pset]}:{self.value_names[value]}"
+                for element in elements:
+                    dump.add(element, name, self.value_texts[value], self.value_types[value])
+        return dump
+
+
+def parse_chunk(path: str, start: int, end: int) -> IfcProperties:
+    """ reads the entities starting between start and end, runs inside the worker processes"""
+    properties = IfcProperties()
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for match in ENTITY.finditer(data, start, end):
+            if not properties.read(int(match.group(1)), match.group(2), data, match.end()):
+                break
+    return properties
+
+
+def chunk_bounds(path: str, size: int, chunk_size: int) -> list[tuple[int, int]]:
+    """ splits the file at line starts of entities, so no entity is cut in two"""
+    starts = [0]
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = chunk_size
+        while position < size:
+            found = data.find(b"\n#", max(position, starts[-1] + 1))
+            if found == -1:
+                break
+            starts.append(found + 1)
+            position = found + 1 + chunk_size
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def read_properties(path: str, max_workers: int = None) -> IfcProperties:
+    """ the file is memory mapped, so only the pages the regex engine is scanning are in memory. Files larger than
+    constants.IFC_CHUNK_SIZE are split and parsed in worker processes"""
+    size = os.path.getsize(path)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if size == 0:
+        return IfcProperties()
+    if size <= constants.IFC_CHUNK_SIZE or max_workers == 1:
+        return parse_chunk(path, 0, size)
+
+    bounds = chunk_bounds(path, size, constants.IFC_CHUNK_SIZE)
+    properties = IfcProperties()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in executor.map(parse_chunk, [path] * len(bounds), *zip(*bounds)):
+            properties.extend(chunk)
+    return properties
+
+
+def read_ifc(path: str, max_workers: int = None) -> rule_engine.PropertyDump:
+    return read_properties(path, max_workers).to_dump()
+
+
+def coverage_lines(coverage: dict[classes.Object, rule_engine.Coverage]) -> list[str]:
+    lines = list()
+    for obj, (elements, properties) in coverage.items():
+        lines.append(f"{obj.name}: {elements} elements")
+        for property_name, count in properties.items():
+            percent = count / elements * 100 if elements else 0.
+            lines.append(f"    {property_name}: {count}/{elements} ({percent:.0f} %)")
+    return lines
+
+
+def main() -> None:
+    from desiteRuleCreator.Filehandling import open_file, property_dump
+
+    parser = argparse.ArgumentParser(description="Check the rules of a DRCxml file against the properties of an "
+                                                 "IFC file without Desite")
+    parser.add_argument("path", help="DRCxml file")
+    parser.add_argument("ifc", help="IFC file")
+    parser.add_argument("--results", help="write the check result of every element to this csv file")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    open_file.load_file(args.path)
+    dump = read_ifc(args.ifc, args.workers)
+    engine = rule_engine.RuleEngine()
+    for line in coverage_lines(engine.coverage(dump)):
+        print(line)
+    if args.results:
+        results = engine.evaluate(dump)
+        property_dump.write_results(args.results, results)
+        print(", ".join(f"{state}: {count}" for state, count in rule_engine.summary(results).items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, NamedTuple
+
+from PySide6.QtWidgets import QFileDialog
+from lxml import etree
+
+from desiteRuleCreator.Filehandling.open_file import string_to_bool, transform_new_values
+from desiteRuleCreator.Widgets import property_widget
+from desiteRuleCreator.Windows import popups
+from desiteRuleCreator.data import bulk_edit, classes, constants, identifiers, merkle, undo
+from desiteRuleCreator.data.merkle import freeze
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.main_window import MainWindow
+
+MISSING = object()  # field of an item that doesn't exist in the common ancestor
+
+
+class AttributeRecord(NamedTuple):
+    identifier: str
+    name: str
+    value: tuple
+    value_type: str
+    data_type: str
+    child_inherits_values: bool
+    parent: str | None
+
+
+class PropertySetRecord(NamedTuple):
+    identifier: str
+    name: str
+    parent: str | None
+    attributes: dict[str, AttributeRecord]
+
+
+class ObjectRecord(NamedTuple):
+    identifier: str
+    name: str
+    parent: str | None
+    ident: str | None  # identifier of the ident Attribute, None for concepts
+    property_sets: dict[str, PropertySetRecord]
+    scripts: dict[str, str]
+    aggregates: frozenset[str]
+
+
+class Snapshot(NamedTuple):
+    """ plain copy of a project, keyed by identifier, which can be compared without creating any classes"""
+    predefined: dict[str, PropertySetRecord]
+    objects: dict[str, ObjectRecord]
+
+
+class Conflict(NamedTuple):
+    path: str
+    field: str
+    base: object
+    ours: object
+    theirs: object
+
+    def __str__(self) -> str:
+        def text(value):
+            return "-" if value is MISSING else repr(value)
+        return f"[{self.path}] {self.field}: lokal {text(self.ours)}, neu {text(self.theirs)}, Basis {text(self.base)}"
+
+
+OBJECT_FIELDS = ("name", "parent", "ident")
+PROPERTY_SET_FIELDS = ("name",)
+ATTRIBUTE_FIELDS = ("name", "value", "value_type", "data_type", "child_inherits_values")
+DELETED = "gelöscht"
+
+
+def thaw(value: tuple) -> list:
+    return [list(item) if isinstance(item, tuple) else item for item in value]
+
+
+def parent_identifier(item: classes.Hirarchy) -> str | None:
+    return None if item.parent is None else str(item.parent.identifier)
+
+
+def xml_parent(xml_item: etree._Element) -> str | None:
+    parent = xml_item.attrib.get(constants.PARENT)
+    return None if parent in (None, constants.NONE) else parent
+
+
+# snapshots
+
+def attribute_record(attribute: classes.Attribute) -> AttributeRecord:
+    return AttributeRecord(str(attribute.identifier), attribute.name, freeze(attribute.value), attribute.value_type,
+                           attribute.data_type, bool(attribute.child_inherits_values), parent_identifier(attribute))
+
+
+def property_set_record(property_set: classes.PropertySet) -> PropertySetRecord:
+    attributes = {str(attribute.identifier): attribute_record(attribute) for attribute in property_set.attributes}
+    return PropertySetRecord(str(property_set.identifier), property_set.name, parent_identifier(property_set),
+                             attributes)
+
+
+def object_record(obj: classes.Object) -> ObjectRecord:
+    ident = None if obj.is_concept else str(obj.ident_attrib.identifier)
+    property_sets = {str(pset.identifier): property_set_record(pset) for pset in obj.property_sets}
+    scripts = {script.name: script.code for script in obj.scripts}
+    aggregates = frozenset(str(child.identifier) for child in obj.aggregates_to)
+    return ObjectRecord(str(obj.identifier), obj.name, parent_identifier(obj), ident, property_sets, scripts,
+                        aggregates)
+
+
+def snapshot_of_project() -> Snapshot:
+    predefined = {str(pset.identifier): property_set_record(pset) for pset in classes.PropertySet
+                  if pset.is_predefined}
+    objects = {str(obj.identifier): object_record(obj) for obj in classes.Object}
+    return Snapshot(predefined, objects)
+
+
+def read_property_set(xml_property_set: etree._Element) -> tuple[PropertySetRecord, str | None]:
+    """ returns the record and the identifier of its ident Attribute"""
+    attributes = dict()
+    ident = None
+    for xml_attribute in xml_property_set:
+        if xml_attribute.tag != constants.ATTRIBUTE:
+            continue
+        attribs = xml_attribute.attrib
+        identifier = attribs.get(constants.IDENTIFIER)
+        attributes[identifier] = AttributeRecord(
+            identifier, attribs.get(constants.NAME), freeze(transform_new_values(xml_attribute)),
+            attribs.get(constants.VALUE_TYPE), attribs.get(constants.DATA_TYPE),
+            bool(string_to_bool(attribs.get(constants.CHILD_INHERITS_VALUE))), xml_parent(xml_attribute))
+        if attribs.get(constants.IS_IDENTIFIER) == str(True):
+            ident = identifier
+    attribs = xml_property_set.attrib
+    record = PropertySetRecord(attribs.get(constants.IDENTIFIER), attribs.get(constants.NAME),
+                               xml_parent(xml_property_set), attributes)
+    return record, ident
+
+
+def read_snapshot(projekt_xml: etree._Element) -> Snapshot:
+    predefined = dict()
+    objects = dict()
+    for xml_item in projekt_xml:
+        if xml_item.tag == constants.PREDEFINED_PSET:
+            record, _ = read_property_set(xml_item)
+            predefined[record.identifier] = record
+        elif xml_item.tag == constants.OBJECT:
+            property_sets = dict()
+            scripts = dict()
+            aggregates = set()
+            ident = None
+            for xml_child in xml_item:
+                if xml_child.tag == constants.PROPERTY_SET:
+                    record, pset_ident = read_property_set(xml_child)
+                    property_sets[record.identifier] = record
+                    ident = pset_ident or ident
+                elif xml_child.tag == constants.SCRIPT:
+                    scripts[xml_child.attrib.get(constants.NAME)] = xml_child.text or ""
+                elif xml_child.tag == constants.AGGREGATE:
+                    aggregates.add(xml_child.attrib.get(constants.AGGREGATES_TO))
+            identifier = xml_item.attrib.get(constants.IDENTIFIER)
+            objects[identifier] = ObjectRecord(identifier, xml_item.attrib.get(constants.NAME), xml_parent(xml_item),
+                                               ident, property_sets, scripts, frozenset(aggregates))
+    return Snapshot(predefined, objects)
+
+
+def load_snapshot(path: str) -> Snapshot | None:
+    projekt_xml = etree.parse(path).getroot()
+    if projekt_xml.attrib.get(constants.VERSION) is None:
+        logging.error(f"[{path}] Dateien ohne Version können nicht zusammengeführt werden")
+        return None
+    return read_snapshot(projekt_xml)
+
+
+# merging
+
+class Merge(object):
+    """ Three-way merge of another project into the loaded one
+
+    Objects, PropertySets and Attributes are matched by identifier through dictionaries, so the merge is linear in
+    the number of items. A field changes if only the other project changed it compared to the common ancestor.
+    Without ancestor every difference counts as conflict. Conflicts keep the local state and are collected in
+    conflicts. Everything is recorded into a BulkEdit, so the merge becomes a single undo step. Predefined
+    PropertySets are never removed, Objects are only removed if nothing else depends on them.
+    """
+
+    def __init__(self, theirs: Snapshot, base: Snapshot | None = None) -> None:
+        self.theirs = theirs
+        self.base = base
+        self.ours = snapshot_of_project()
+        self.conflicts: list[Conflict] = list()
+        self.items: dict[str, classes.Hirarchy] = dict()  # identifier -> local or newly created item
+        for obj in classes.Object:
+            self.items[str(obj.identifier)] = obj
+            for property_set in obj.property_sets:
+                self.add_items(property_set)
+        for property_set in classes.PropertySet:
+            if property_set.is_predefined:
+                self.add_items(property_set)
+
+        self._new_predefined: list[PropertySetRecord] = list()
+        self._new_objects: list[ObjectRecord] = list()
+        self._new_property_sets: list[tuple[classes.Object, PropertySetRecord, str | None]] = list()
+        self._new_attributes: list[tuple[classes.PropertySet, AttributeRecord]] = list()
+        self._new_scripts: list[tuple[classes.Object, str, str]] = list()
+        self._aggregations: dict[tuple[str, str], bool] = dict()
+        self._parents: dict[classes.Object, str | None] = dict()  # parent identifier of moved Objects
+
+    def add_items(self, property_set: classes.PropertySet) -> None:
+        self.items[str(property_set.identifier)] = property_set
+        for attribute in property_set.attributes:
+            self.items[str(attribute.identifier)] = attribute
+
+    def conflict(self, path: str, field: str, base, ours, theirs) -> None:
+        self.conflicts.append(Conflict(path, field, base, ours, theirs))
+
+    def merge_fields(self, path: str, fields: tuple[str, ...], base, ours, theirs) -> dict:
+        """ returns the fields which have to be taken from theirs"""
+        changes = dict()
+        for field in fields:
+            our_value = getattr(ours, field)
+            their_value = getattr(theirs, field)
+            if our_value == their_value:
+                continue
+            base_value = MISSING if base is None else getattr(base, field)
+            if base_value == our_value:
+                changes[field] = their_value
+            elif base_value != their_value:
+                self.conflict(path, field, base_value, our_value, their_value)
+        return changes
+
+    def split(self, path: str, base: dict | None, ours: dict, theirs: dict) -> tuple[list, list, list]:
+        """ sorts the identifiers of a level into matched, added by theirs and removed by theirs"""
+        matched = list()
+        added = list()
+        removed = list()
+        for identifier, their_record in theirs.items():
+            if identifier in ours:
+                matched.append(identifier)
+            elif base is not None and identifier in base:
+                if base[identifier] != their_record:  # deleted locally but changed in the other project
+                    self.conflict(f"{path}{their_record.name}", DELETED, base[identifier], MISSING, their_record)
+            else:
+                added.append(identifier)
+        if base is not None:
+            for identifier, our_record in ours.items():
+                if identifier in theirs or identifier not in base:
+                    continue
+                if base[identifier] == our_record:
+                    removed.append(identifier)
+                else:
+                    self.conflict(f"{path}{our_record.name}", DELETED, base[identifier], our_record, MISSING)
+        return matched, added, removed
+
+    def run(self, edit: bulk_edit.BulkEdit) -> list[Conflict]:
+        base = self.base
+        base_predefined = None if base is None else base.predefined
+        base_objects = None if base is None else base.objects
+
+        matched, added, _ = self.split("", base_predefined, self.ours.predefined, self.theirs.predefined)
+        self._new_predefined = [self.theirs.predefined[identifier] for identifier in added]
+        for identifier in matched:
+            self.merge_property_set(edit, "", None, base_predefined, identifier)
+
+        matched, added, removed = self.split("", base_objects, self.ours.objects, self.theirs.objects)
+        self._new_objects = [self.theirs.objects[identifier] for identifier in added]
+        for identifier in added:
+            for child in self.theirs.objects[identifier].aggregates:
+                self._aggregations[(identifier, child)] = True
+        for identifier in matched:
+            self.merge_object(edit, identifier)
+        self.remove_objects(edit, removed)
+        edit.create(self.create)
+        return self.conflicts
+
+    def merge_object(self, edit: bulk_edit.BulkEdit, identifier: str) -> None:
+        obj: classes.Object = self.items[identifier]
+        ours = self.ours.objects[identifier]
+        theirs = self.theirs.objects[identifier]
+        base = None if self.base is None else self.base.objects.get(identifier)
+        path = f"{ours.name} : "
+
+        changes = self.merge_fields(ours.name, OBJECT_FIELDS, base, ours, theirs)
+        if "name" in changes:
+            edit.rename(obj, changes["name"])
+        if "parent" in changes:
+            parent = changes["parent"]
+            self._parents[obj] = parent
+            if parent is None or parent in self.items:
+                edit.set_parent([obj], None if parent is None else self.items[parent])
+        if "ident" in changes:
+            self.conflict(ours.name, "ident", MISSING if base is None else base.ident, ours.ident, theirs.ident)
+
+        base_psets = None if base is None else base.property_sets
+        matched, added, removed = self.split(path, base_psets, ours.property_sets, theirs.property_sets)
+        for pset_identifier in added:
+            record = theirs.property_sets[pset_identifier]
+            self._new_property_sets.append((obj, record, theirs.ident if theirs.ident in record.attributes else None))
+        for pset_identifier in matched:
+            self.merge_property_set(edit, path, ours, base_psets, pset_identifier)
+        for pset_identifier in removed:
+            property_set: classes.PropertySet = self.items[pset_identifier]
+            if not obj.is_concept and obj.ident_attrib in property_set.attributes:
+                self.conflict(f"{path}{property_set.name}", DELETED, MISSING, property_set.name, MISSING)
+            else:
+                edit.remove(property_set)
+
+        self.merge_scripts(edit, obj, path, base, ours, theirs)
+
+        base_aggregates = frozenset() if base is None else base.aggregates
+        for child in theirs.aggregates - ours.aggregates:
+            if base is None or child not in base_aggregates:
+                self._aggregations[(identifier, child)] = True
+        if base is not None:
+            for child in (ours.aggregates & base_aggregates) - theirs.aggregates:
+                self._aggregations[(identifier, child)] = False
+
+    def merge_property_set(self, edit: bulk_edit.BulkEdit, path: str, obj_record: ObjectRecord | None,
+                           base_psets: dict | None, identifier: str) -> None:
+        property_set: classes.PropertySet = self.items[identifier]
+        pset_container = self.ours.predefined if obj_record is None else obj_record.property_sets
+        ours = pset_container[identifier]
+        theirs = (self.theirs.predefined if obj_record is None
+                  else self.theirs.objects[obj_record.identifier].property_sets)[identifier]
+        base = None if base_psets is None else base_psets.get(identifier)
+        path = f"{path}{ours.name}"
+
+        changes = self.merge_fields(path, PROPERTY_SET_FIELDS, base, ours, theirs)
+        if "name" in changes:
+            edit.rename(property_set, changes["name"])
+
+        base_attributes = None if base is None else base.attributes
+        path = f"{path} : "
+        matched, added, removed = self.split(path, base_attributes, ours.attributes, theirs.attributes)
+        for attribute_identifier in added:
+            self._new_attributes.append((property_set, theirs.attributes[attribute_identifier]))
+        for attribute_identifier in matched:
+            attribute: classes.Attribute = self.items[attribute_identifier]
+            our_attribute = ours.attributes[attribute_identifier]
+            base_attribute = None if base_attributes is None else base_attributes.get(attribute_identifier)
+            changes = self.merge_fields(f"{path}{our_attribute.name}", ATTRIBUTE_FIELDS, base_attribute,
+                                        our_attribute, theirs.attributes[attribute_identifier])
+            for field, value in changes.items():
+                if field == "name":
+                    edit.rename(attribute, value)
+                elif field == "value":
+                    edit.set_value(attribute, thaw(value))
+                else:
+                    edit.set_field(attribute, field, value)
+        for attribute_identifier in removed:
+            attribute: classes.Attribute = self.items[attribute_identifier]
+            obj = property_set.object
+            if attribute.children or (obj is not None and obj.ident_attrib is attribute):
+                self.conflict(f"{path}{attribute.name}", DELETED, MISSING, attribute.name, MISSING)
+            else:
+                edit.remove(attribute)
+
+    def merge_scripts(self, edit: bulk_edit.BulkEdit, obj: classes.Object, path: str, base: ObjectRecord | None,
+                      ours: ObjectRecord, theirs: ObjectRecord) -> None:
+        scripts = {script.name: script for script in obj.scripts}
+        base_scripts = dict() if base is None else base.scripts
+        for name, code in theirs.scripts.items():
+            if name not in ours.scripts:
+                if name not in base_scripts:
+                    self._new_scripts.append((obj, name, code))
+                continue
+            our_code = ours.scripts[name]
+            if our_code == code:
+                continue
+            base_code = base_scripts.get(name, MISSING)
+            if base_code == our_code:
+                edit.set_field(scripts[name], "code", code)
+            elif base_code != code:
+                self.conflict(f"{path}{name}", "code", base_code, our_code, code)
+
+    def remove_objects(self, edit: bulk_edit.BulkEdit, identifiers_: list[str]) -> None:
+        """ Objects removed by theirs, as long as no remaining Object depends on them"""
+        removed = {self.items[identifier] for identifier in identifiers_}
+
+        def is_free(obj: classes.Object) -> bool:
+            return all(child in removed or child in self._parents for child in obj.children) and all(
+                item in removed for item in obj.aggregates_from)
+
+        blocked = [obj for obj in removed if not is_free(obj)]
+        while blocked:
+            for obj in blocked:
+                removed.discard(obj)
+                self.conflict(obj.name, DELETED, MISSING, obj.name, MISSING)
+            blocked = [obj for obj in removed if not is_free(obj)]
+
+        def depth(obj: classes.Object) -> int:
+            level = 0
+            while obj.parent is not None:
+                obj = obj.parent
+                level += 1
+            return level
+
+        for obj in sorted(removed, key=depth, reverse=True):  # children first
+            for child in obj.aggregates_to:
+                self._aggregations[(str(obj.identifier), str(child.identifier))] = False
+            edit.remove(obj)
+
+    # creating new items, runs inside BulkEdit.commit
+
+    def create_attribute(self, property_set: classes.PropertySet, record: AttributeRecord) -> classes.Attribute:
+        children = property_set.children
+        property_set._children = list()  # inheriting PropertySets get their own copies from the other project
+        attribute = classes.Attribute(property_set, record.name, thaw(record.value), record.value_type,
+                                      record.data_type, record.child_inherits_values, record.identifier)
+        property_set._children = children
+        self.items[record.identifier] = attribute
+        return attribute
+
+    def create_property_set(self, record: PropertySetRecord) -> classes.PropertySet:
+        property_set = classes.PropertySet(record.name, obj=None, identifier=record.identifier)
+        self.items[record.identifier] = property_set
+        for attribute_record in record.attributes.values():
+            self.create_attribute(property_set, attribute_record)
+        return property_set
+
+    def link(self, record: AttributeRecord | PropertySetRecord | ObjectRecord) -> None:
+        parent = self.items.get(record.parent) if record.parent is not None else None
+        item = self.items[record.identifier]
+        if parent is not None and item.parent is None:
+            parent.add_child(item)
+
+    def create(self) -> list[undo.Change]:
+        new_predefined = [self.create_property_set(record) for record in self._new_predefined]
+        new_property_sets = list()
+        for obj, record, ident in self._new_property_sets:
+            property_set = self.create_property_set(record)
+            obj.add_property_set(property_set)
+            new_property_sets.append(property_set)
+        new_attributes = [self.create_attribute(property_set, record) for property_set, record in
+                          self._new_attributes]
+
+        new_objects = list()
+        for record in self._new_objects:
+            property_sets = [self.create_property_set(pset_record) for pset_record in record.property_sets.values()]
+            ident = self.items.get(record.ident) if record.ident is not None else None
+            obj = classes.Object(record.name, ident, identifier=record.identifier)
+            self.items[record.identifier] = obj
+            for property_set in property_sets:
+                obj.add_property_set(property_set)
+            for name, code in record.scripts.items():
+                classes.Script(name, obj).code = code
+            identifiers.check_unique(obj)
+            new_objects.append(obj)
+
+        # same order as open_file.link_parents: Objects, Attributes, PropertySets
+        for record in self._new_objects:
+            self.link(record)
+        attribute_records = [record for _, record in self._new_attributes]
+        pset_records = list(self._new_predefined) + [record for _, record, _ in self._new_property_sets]
+        for record in self._new_objects:
+            pset_records += record.property_sets.values()
+        for pset_record in pset_records:
+            attribute_records += pset_record.attributes.values()
+        for record in attribute_records:
+            self.link(record)
+        for record in pset_records:
+            self.link(record)
+
+        changes: list[undo.Change] = list()
+        for obj, parent_identifier_ in self._parents.items():
+            if parent_identifier_ is None or parent_identifier_ not in self.items or parent_identifier_ in \
+                    self.ours.objects:
+                continue  # existing parents are handled by BulkEdit.set_parent
+            parent = self.items[parent_identifier_]
+            if not classes.ObjectModel.is_ancestor(obj, parent):
+                change = undo.ParentChange(obj, obj.parent, parent)
+                change.redo()
+                changes.append(change)
+        changes += [undo.PropertySetAdded(None, property_set) for property_set in new_predefined]
+        changes += [undo.PropertySetAdded(property_set.object, property_set) for property_set in new_property_sets]
+        changes += [undo.AttributeAdded(attribute) for attribute in new_attributes]
+        changes += [undo.ObjectAdded(obj) for obj in new_objects]
+        for obj, name, code in self._new_scripts:
+            script = classes.Script(name, obj)
+            script.code = code
+            changes.append(undo.ScriptAdded(script))
+
+        for (identifier, child_identifier), aggregated in self._aggregations.items():
+            obj = self.items.get(identifier)
+            child = self.items.get(child_identifier)
+            if obj is None or child is None or (child in obj.aggregates_to) == aggregated:
+                continue
+            change = undo.AggregationChange(obj, child, aggregated)
+            change.redo()
+            changes.append(change)
+        return changes
+
+
+def merge(theirs: Snapshot, base: Snapshot | None = None, model: classes.ObjectModel = None,
+          undo_stack: undo.UndoStack = None) -> list[Conflict]:
+    with bulk_edit.BulkEdit(model, undo_stack, "Merge") as edit:
+        conflicts = Merge(theirs, base).run(edit)
+    for conflict in conflicts:
+        logging.warning(f"Konflikt beim Zusammenführen {conflict}")
+    return conflicts
+
+
+def merge_files(main_window: MainWindow, path: str, base_path: str = None) -> list[Conflict] | None:
+    theirs = load_snapshot(path)
+    if theirs is None:
+        return None
+    base = load_snapshot(base_path) if base_path else None
+    if base_path and base is None:
+        return None
+    conflicts = merge(theirs, base, main_window.object_model, main_window.undo_stack)
+    main_window.project.changed = True
+    return conflicts
+
+
+def merge_new_file(main_window: MainWindow, path: str = "") -> None:
+    if not path:
+        path = QFileDialog.getOpenFileName(main_window, "Merge File", os.getcwd(), "xml Files (*.xml *.DRCxml)")[0]
+    if not path:
+        return
+    base_path = QFileDialog.getOpenFileName(main_window, "Common Ancestor (optional)", os.path.dirname(path),
+                                            "xml Files (*.xml *.DRCxml)")[0]
+    conflicts = merge_files(main_window, path, base_path)
+    if conflicts is None:
+        return
+    property_widget.reload(main_window)
+    main_window.ui.tree.resizeColumnToContents(0)
+    main_window.load_graph(show=False)
+    if conflicts:
+        popups.msg_merge_conflicts(conflicts)
+
+
+def diff_files(old_path: str, new_path: str) -> list[merkle.Difference] | None:
+    old = load_snapshot(old_path)
+    new = load_snapshot(new_path)
+    if old is None or new is None:
+        return None
+    return merkle.diff(merkle.SnapshotTree(old), merkle.SnapshotTree(new))
+
+
+def compare_file(main_window: MainWindow) -> None:
+    """ differences between a DRCxml file and the loaded project"""
+    path = QFileDialog.getOpenFileName(main_window, "Compare with File", os.getcwd(), "xml Files (*.xml *.DRCxml)")[0]
+    if not path:
+        return
+    snapshot = load_snapshot(path)
+    if snapshot is None:
+        return
+    popups.msg_differences(merkle.diff(merkle.SnapshotTree(snapshot), merkle.ProjectTree()))
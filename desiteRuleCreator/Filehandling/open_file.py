@@ -8,7 +8,7 @@ from lxml import etree
 
 from desiteRuleCreator.Windows.popups import msg_delete_or_merge
 from desiteRuleCreator.Windows.popups import msg_unsaved
-from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.data import aggregation, classes, constants, identifiers
 
 if TYPE_CHECKING:
     from desiteRuleCreator.main_window import MainWindow
@@ -24,63 +24,63 @@ def string_to_bool(text: str) -> bool | None:
 
 
 def fill_tree(main_window: MainWindow) -> None:
-    item_dict: dict[classes.Object, classes.CustomTreeItem] = {obj: main_window.add_object_to_tree(obj)
-                                                               for obj in classes.Object}
-    for obj in classes.Object:
-        tree_item = item_dict[obj]
-        if obj.parent is not None:
-            parent_item = item_dict[obj.parent]
-            root = tree_item.treeWidget().invisibleRootItem()
-            item = root.takeChild(root.indexOfChild(tree_item))
-            parent_item.addChild(item)
+    main_window.object_model.reset()
+
+
+def load_file(path: str) -> etree._Element:
+    """Fill the classes registries from a DRCxml file without touching any widget"""
+    tree = etree.parse(path)
+    projekt_xml = tree.getroot()
+
+    if projekt_xml.attrib.get("version") is None:  # OLD FILES
+        import_old(projekt_xml)
+    else:
+        import_new(projekt_xml)
+    aggregation.report_cycles()
+    return projekt_xml
 
 
 def import_data(main_window: MainWindow, path: str = False) -> None:
     if path:
         main_window.clear_object_input()
 
-        tree = etree.parse(path)
-        projekt_xml = tree.getroot()
+        projekt_xml = load_file(path)
         author = projekt_xml.attrib.get(constants.AUTHOR)
         name = projekt_xml.attrib.get("name")
+        main_window.project = classes.Project(main_window, name,author)
 
-        if projekt_xml.attrib.get("version") is None:  # OLD FILES
-            import_old(projekt_xml)
-            main_window.project = classes.Project(main_window, name,author)
-        else:
-            import_new(projekt_xml)
-            main_window.project = classes.Project(main_window, name,author)
+        if projekt_xml.attrib.get("version") is not None:
             main_window.project.version = projekt_xml.attrib.get("version")
         fill_tree(main_window)
 
 
-def import_new(projekt_xml: etree._Element) -> None:
-    def import_attributes(xml_object: etree._Element, property_set: classes.PropertySet) -> classes.Attribute | None:
+def transform_new_values(xml_attribute: etree._Element) -> list[str]:
+    def empty_text(xml_value):
+        if xml_value.text is None:
+            return ""
+        else:
+            return xml_value.text
+    value_type = xml_attribute.attrib.get("value_type")
+    value = list()
 
-        def transform_new_values(xml_attribute: etree._Element) -> list[str]:
-            def empty_text(xml_value):
-                if xml_value.text is None:
-                    return ""
-                else:
-                    return xml_value.text
-            value_type = xml_attribute.attrib.get("value_type")
-            value = list()
-
-            if value_type != constants.RANGE:
-                for xml_value in xml_attribute:
-                    value.append(empty_text(xml_value))
-
-            else:
-                for xml_range in xml_attribute:
-                    from_to_list = list()
-                    for xml_value in xml_range:
-                        if xml_value.tag == "From":
-                            from_to_list.append(empty_text(xml_value))
-                        if xml_value.tag == "To":
-                            from_to_list.append(empty_text(xml_value))
-                    value.append(from_to_list)
-            return value
+    if value_type != constants.RANGE:
+        for xml_value in xml_attribute:
+            value.append(empty_text(xml_value))
 
+    else:
+        for xml_range in xml_attribute:
+            from_to_list = list()
+            for xml_value in xml_range:
+                if xml_value.tag == "From":
+                    from_to_list.append(empty_text(xml_value))
+                if xml_value.tag == "To":
+                    from_to_list.append(empty_text(xml_value))
+            value.append(from_to_list)
+    return value
+
+
+def import_new(projekt_xml: etree._Element) -> None:
+    def import_attributes(xml_object: etree._Element, property_set: classes.PropertySet) -> classes.Attribute | None:
         ident_attrib = None
         for xml_attribute in xml_object:
             if xml_attribute.tag == "Attribute":
@@ -191,6 +191,7 @@ def import_new(projekt_xml: etree._Element) -> None:
         property_sets, ident_attrib = import_property_sets(xml_property_sets)
         name, parent, identifer, is_concept = get_obj_data(xml_object)
         obj = classes.Object(name, ident_attrib, identifier=identifer)
+        identifiers.check_unique(obj)
 
         for property_set in property_sets:
             obj.add_property_set(property_set)
@@ -224,17 +225,12 @@ def open_file_dialog(main_window: MainWindow, path: str = ""):
             main_window.clear_all()
             main_window.open_file(path)
         else:
-            main_window.merge_new_file()
-            main_window.open_file(path)
+            main_window.merge_new_file(path)
 
     else:
         main_window.open_file(path)
 
 
-def merge_new_file(main_window):
-    print("MERGE NEEDS TO BE PROGRAMMED")  # TODO: Write Merge
-
-
 ## deprecated
 def import_old(projekt_xml):
     def handle_identifier(obj: classes.Object):
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Iterable
+
+from PySide6.QtWidgets import QFileDialog
+
+from desiteRuleCreator.Filehandling import ifc_reader
+from desiteRuleCreator.Windows import popups
+from desiteRuleCreator.data import constants, rule_engine
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.main_window import MainWindow
+
+# accepted column names of the long table: element id, "pset:attribute", value and an optional data type
+COLUMN_NAMES = {
+    "element": ("id", "element", "element_id", "guid"),
+    "property": ("property", "name", "attribute"),
+    "value": ("value", "wert"),
+    "data_type": ("data_type", "datatype", "dt"),
+}
+
+
+def column_positions(header: Iterable[str]) -> dict[str, int] | None:
+    lowered = [name.strip().lower() for name in header]
+    positions = dict()
+    for field, names in COLUMN_NAMES.items():
+        for name in names:
+            if name in lowered:
+                positions[field] = lowered.index(name)
+                break
+    if not {"element", "property", "value"} <= set(positions):
+        return None
+    return positions
+
+
+def read_rows(dump: rule_engine.PropertyDump, header: list[str], rows: Iterable[list], path: str) -> bool:
+    positions = column_positions(header)
+    if positions is None:
+        logging.error(f"[{path}] Spalten id, property und value nicht gefunden: {header}")
+        return False
+    element, property_name, value = positions["element"], positions["property"], positions["value"]
+    data_type = positions.get("data_type")
+    for row in rows:
+        if len(row) <= max(positions.values()):
+            continue
+        text = row[value]
+        dump.add(str(row[element]), str(row[property_name]), None if text is None else str(text),
+                 None if data_type is None or row[data_type] is None else str(row[data_type]))
+    return True
+
+
+def read_csv(path: str) -> rule_engine.PropertyDump | None:
+    dump = rule_engine.PropertyDump()
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=";,\t").delimiter
+        except csv.Error:
+            delimiter = ";"
+        reader = csv.reader(file, delimiter=delimiter)
+        header = next(reader, [])
+        if not read_rows(dump, header, reader, path):
+            return None
+    return dump
+
+
+def read_json(path: str) -> rule_engine.PropertyDump | None:
+    """ either a list of {"id", "property", "value"} records or {element id: {property: value}}"""
+    dump = rule_engine.PropertyDump()
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        for element, properties in data.items():
+            for property_name, value in properties.items():
+                dump.add(str(element), property_name, None if value is None else str(value))
+        return dump
+    header = list(data[0]) if data else ["id", "property", "value"]
+    if not read_rows(dump, header, ([record.get(name) for name in header] for record in data), path):
+        return None
+    return dump
+
+
+def read_parquet(path: str) -> rule_engine.PropertyDump | None:
+    try:
+        import pandas
+    except ImportError:
+        logging.error(f"[{path}] Parquet Dateien können nur mit installiertem pandas (und pyarrow) gelesen werden")
+        return None
+    frame = pandas.read_parquet(path)
+    frame = frame.astype(object).where(frame.notna(), None)
+    dump = rule_engine.PropertyDump()
+    if not read_rows(dump, [str(name) for name in frame.columns], frame.itertuples(index=False, name=None), path):
+        return None
+    return dump
+
+
+def load(path: str) -> rule_engine.PropertyDump | None:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        return read_json(path)
+    if extension in (".parquet", ".pq"):
+        return read_parquet(path)
+    if extension == ".ifc":
+        return ifc_reader.read_ifc(path)
+    return read_csv(path)
+
+
+def write_results(path: str, results: Iterable[rule_engine.ElementResult]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(["Element", "Object", "Check_State", "zu_pruefende_eigenschaften",
+                         "fehlerhafte_eigenschaften", "Fehler", "Meldungen"])
+        for result in results:
+            writer.writerow([result.element, result.object or "", result.state, result.checked, result.failed,
+                             ",".join(str(code) for code in result.codes), " | ".join(result.messages)])
+
+
+def check_property_dump(main_window: MainWindow) -> None:
+    """ evaluates the rules against a property dump and writes <dump>_result.csv next to it"""
+    main_window.update_script()
+    directory = main_window.export_path if main_window.export_path is not None else ""
+    path = QFileDialog.getOpenFileName(main_window, "Check Property Dump", directory,
+                                       "Property Dump (*.csv *.json *.parquet *.ifc);; All files (*.*)")[0]
+    if not path:
+        return
+    dump = load(path)
+    if dump is None:
+        return
+    results = rule_engine.RuleEngine().evaluate(dump)
+    result_path = os.path.splitext(path)[0] + constants.DUMP_RESULT_SUFFIX
+    write_results(result_path, results)
+    popups.msg_check_results(rule_engine.summary(results), result_path)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+
+from desiteRuleCreator import Template
+from desiteRuleCreator.data import classes, constants, merkle, rule_compiler
+
+# increase whenever the exported xml changes without a change of the templates or of rule_compiler, e.g. when
+# desite_export renders a checkrun differently
+CACHE_VERSION = 1
+
+
+def template_hash() -> str:
+    """ hash over the rule template, the JavaScript library and rule_compiler, which turns RANGE and FORMAT values
+    into rule data. A change of any of them invalidates the whole cache"""
+    hasher = hashlib.blake2b(digest_size=merkle.DIGEST_SIZE)
+    hasher.update(str(CACHE_VERSION).encode())
+    folder = os.path.join(Template.HOME_DIR, constants.FILEPATH_JS)
+    for path in [os.path.join(Template.HOME_DIR, Template.TEMPLATE), rule_compiler.__file__] + sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)):
+        hasher.update(os.path.basename(path).encode())
+        with open(path, "rb") as file:
+            hasher.update(file.read())
+    return hasher.hexdigest()
+
+
+def rule_key(obj: classes.Object, kind: str = "checkrun", hash_cache: merkle.HashCache = None) -> str:
+    """ Merkle hash of obj plus everything else the rendered rule depends on: the order of PropertySets and
+    Attributes, the identifier and the Scripts"""
+    hash_cache = merkle.get_cache() if hash_cache is None else hash_cache
+    hasher = hashlib.blake2b(digest_size=merkle.DIGEST_SIZE)
+    hasher.update(kind.encode())
+    hasher.update(hash_cache.digest(obj))
+    for property_set in obj.property_sets:
+        hasher.update(hash_cache.digest(property_set))
+        for attribute in property_set.attributes:
+            hasher.update(hash_cache.digest(attribute))
+    ident: classes.Attribute = obj.ident_attrib
+    for text in [ident.property_set.name, ident.name, str(ident.value)]:
+        hasher.update(merkle.SEPARATOR + text.encode())
+    for script in obj.scripts:
+        for text in [script.name, script.code or ""]:
+            hasher.update(merkle.SEPARATOR + text.encode())
+    return hasher.hexdigest()
+
+
+def cache_path(base_path: str) -> str:
+    return os.path.splitext(base_path)[0] + constants.RULE_CACHE_SUFFIX
+
+
+class RuleCache(object):
+    """ Persistent cache of exported rule fragments, keyed by rule_key
+
+    Entries hold the serialized fragment and the syntax errors which were logged when it was rendered. The cache
+    is stored as JSON next to the project and discarded completely if the templates changed. Only entries used
+    by the last export are written back, so it doesn't grow with every edit.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self.salt = template_hash()
+        self._entries: dict[str, dict] = dict()
+        self._used: dict[str, dict] = dict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as error:
+            logging.warning(f"[{self.path}] Regel-Cache konnte nicht gelesen werden: {error}")
+            return
+        if data.get("salt") == self.salt:
+            self._entries = data.get("entries", dict())
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump({"salt": self.salt, "entries": self._used}, file)
+        except OSError as error:
+            logging.warning(f"[{self.path}] Regel-Cache konnte nicht gespeichert werden: {error}")
+
+    def get(self, key: str) -> tuple[str, list[str]] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[key] = entry
+        return entry["fragment"], entry["errors"]
+
+    def put(self, key: str, fragment: str, errors: list[str] = ()) -> None:
+        entry = {"fragment": fragment, "errors": list(errors)}
+        self._entries[key] = entry
+        self._used[key] = entry
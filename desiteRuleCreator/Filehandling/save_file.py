@@ -116,6 +116,7 @@ def save(main_window:MainWindow, path:str) -> None:
             else:
                 xml_value.text = str(value)
 
+    main_window.update_script()
     main_window.save_path = path
 
     xml_project = etree.Element(constants.PROJECT)
@@ -136,6 +137,7 @@ def save(main_window:MainWindow, path:str) -> None:
 
 
 def close_event(main_window:MainWindow, event):
+    main_window.update_script()
     status = main_window.project.changed
     if status:
         reply = popups.msg_close()
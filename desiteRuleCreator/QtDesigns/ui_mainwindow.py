@@ -20,7 +20,7 @@ from PySide6.QtWidgets import (QAbstractItemView, QApplication, QGridLayout, QHB
     QHeaderView, QLabel, QLineEdit, QListWidget,
     QListWidgetItem, QMainWindow, QMenu, QMenuBar,
     QPushButton, QSizePolicy, QSpacerItem, QSplitter,
-    QStatusBar, QTabWidget, QTableWidget, QTableWidgetItem,
+    QStatusBar, QTabWidget, QTableView,
     QTextEdit, QTreeWidget, QTreeWidgetItem, QVBoxLayout,
     QWidget)
 
@@ -42,8 +42,16 @@ class Ui_MainWindow(object):
         self.action_desite_Settings.setObjectName(u"action_desite_Settings")
         self.action_desite_export = QAction(MainWindow)
         self.action_desite_export.setObjectName(u"action_desite_export")
+        self.action_desite_export_dispatcher = QAction(MainWindow)
+        self.action_desite_export_dispatcher.setObjectName(u"action_desite_export_dispatcher")
+        self.action_export_all = QAction(MainWindow)
+        self.action_export_all.setObjectName(u"action_export_all")
+        self.action_check_dump = QAction(MainWindow)
+        self.action_check_dump.setObjectName(u"action_check_dump")
         self.action_show_list = QAction(MainWindow)
         self.action_show_list.setObjectName(u"action_show_list")
+        self.action_file_compare = QAction(MainWindow)
+        self.action_file_compare.setObjectName(u"action_file_compare")
         self.action_settings = QAction(MainWindow)
         self.action_settings.setObjectName(u"action_settings")
         self.action_export_bs = QAction(MainWindow)
@@ -54,6 +62,8 @@ class Ui_MainWindow(object):
         self.action_show_graphs.setObjectName(u"action_show_graphs")
         self.action_export_boq = QAction(MainWindow)
         self.action_export_boq.setObjectName(u"action_export_boq")
+        self.action_export_graphs = QAction(MainWindow)
+        self.action_export_graphs.setObjectName(u"action_export_graphs")
         self.verticalLayout_main = QWidget(MainWindow)
         self.verticalLayout_main.setObjectName(u"verticalLayout_main")
         self.verticalLayout = QVBoxLayout(self.verticalLayout_main)
@@ -137,6 +147,12 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_objects.addLayout(self.gridLayout_objects)
 
+        self.lineEdit_search = QLineEdit(self.layoutWidget)
+        self.lineEdit_search.setObjectName(u"lineEdit_search")
+        self.lineEdit_search.setClearButtonEnabled(True)
+
+        self.verticalLayout_objects.addWidget(self.lineEdit_search)
+
         self.tree = QTreeWidget(self.layoutWidget)
         self.tree.setObjectName(u"tree")
         self.tree.setEnabled(True)
@@ -166,21 +182,7 @@ class Ui_MainWindow(object):
         sizePolicy2.setHeightForWidth(self.splitter_2.sizePolicy().hasHeightForWidth())
         self.splitter_2.setSizePolicy(sizePolicy2)
         self.splitter_2.setOrientation(Qt.Horizontal)
-        self.tableWidget_inherited = QTableWidget(self.splitter_2)
-        if (self.tableWidget_inherited.columnCount() < 2):
-            self.tableWidget_inherited.setColumnCount(2)
-        __qtablewidgetitem = QTableWidgetItem()
-        self.tableWidget_inherited.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.tableWidget_inherited.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        if (self.tableWidget_inherited.rowCount() < 1):
-            self.tableWidget_inherited.setRowCount(1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.tableWidget_inherited.setVerticalHeaderItem(0, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.tableWidget_inherited.setItem(0, 0, __qtablewidgetitem3)
-        __qtablewidgetitem4 = QTableWidgetItem()
-        self.tableWidget_inherited.setItem(0, 1, __qtablewidgetitem4)
+        self.tableWidget_inherited = QTableView(self.splitter_2)
         self.tableWidget_inherited.setObjectName(u"tableWidget_inherited")
         sizePolicy3 = QSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
         sizePolicy3.setHorizontalStretch(0)
@@ -197,17 +199,7 @@ class Ui_MainWindow(object):
         self.tableWidget_inherited.horizontalHeader().setProperty("showSortIndicator", True)
         self.tableWidget_inherited.verticalHeader().setVisible(False)
         self.tableWidget_inherited.verticalHeader().setCascadingSectionResizes(False)
-        self.attribute_widget = QTableWidget(self.splitter_2)
-        if (self.attribute_widget.columnCount() < 4):
-            self.attribute_widget.setColumnCount(4)
-        __qtablewidgetitem5 = QTableWidgetItem()
-        self.attribute_widget.setHorizontalHeaderItem(0, __qtablewidgetitem5)
-        __qtablewidgetitem6 = QTableWidgetItem()
-        self.attribute_widget.setHorizontalHeaderItem(1, __qtablewidgetitem6)
-        __qtablewidgetitem7 = QTableWidgetItem()
-        self.attribute_widget.setHorizontalHeaderItem(2, __qtablewidgetitem7)
-        __qtablewidgetitem8 = QTableWidgetItem()
-        self.attribute_widget.setHorizontalHeaderItem(3, __qtablewidgetitem8)
+        self.attribute_widget = QTableView(self.splitter_2)
         self.attribute_widget.setObjectName(u"attribute_widget")
         self.attribute_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.splitter_2.addWidget(self.attribute_widget)
@@ -422,13 +414,18 @@ class Ui_MainWindow(object):
         self.menuFile.addAction(self.action_file_Open)
         self.menuFile.addAction(self.action_file_Save)
         self.menuFile.addAction(self.action_file_Save_As)
+        self.menuFile.addAction(self.action_file_compare)
         self.menuFile.addAction(self.action_settings)
         self.menuDesite.addAction(self.action_desite_export)
+        self.menuDesite.addAction(self.action_desite_export_dispatcher)
         self.menuDesite.addAction(self.action_export_bs)
         self.menuDesite.addAction(self.action_export_bookmarks)
         self.menuDesite.addAction(self.action_export_boq)
+        self.menuDesite.addAction(self.action_export_all)
+        self.menuDesite.addAction(self.action_check_dump)
         self.menuPredefined_Psets.addAction(self.action_show_list)
         self.menuShow_Graphs.addAction(self.action_show_graphs)
+        self.menuShow_Graphs.addAction(self.action_export_graphs)
 
         self.retranslateUi(MainWindow)
 
@@ -446,45 +443,28 @@ class Ui_MainWindow(object):
         self.action_file_Open.setText(QCoreApplication.translate("MainWindow", u"Open", None))
         self.action_desite_Settings.setText(QCoreApplication.translate("MainWindow", u"Settings", None))
         self.action_desite_export.setText(QCoreApplication.translate("MainWindow", u"Export Modelcheck", None))
+        self.action_desite_export_dispatcher.setText(QCoreApplication.translate("MainWindow", u"Export Modelcheck (single Checkrun)", None))
+        self.action_export_all.setText(QCoreApplication.translate("MainWindow", u"Export All ...", None))
+        self.action_check_dump.setText(QCoreApplication.translate("MainWindow", u"Check Property Dump ...", None))
         self.action_show_list.setText(QCoreApplication.translate("MainWindow", u"Show List", None))
+        self.action_file_compare.setText(QCoreApplication.translate("MainWindow", u"Compare with File ...", None))
         self.action_settings.setText(QCoreApplication.translate("MainWindow", u"Settings", None))
         self.action_export_bs.setText(QCoreApplication.translate("MainWindow", u"Export BS", None))
         self.action_export_bookmarks.setText(QCoreApplication.translate("MainWindow", u"Export Bookmarks", None))
         self.action_show_graphs.setText(QCoreApplication.translate("MainWindow", u"Show", None))
         self.action_export_boq.setText(QCoreApplication.translate("MainWindow", u"Export  for BoQ", None))
+        self.action_export_graphs.setText(QCoreApplication.translate("MainWindow", u"Export", None))
         self.lineEdit_ident_pSet.setPlaceholderText(QCoreApplication.translate("MainWindow", u"PropertySet", None))
         self.lineEdit_ident_value.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Value", None))
         self.lineEdit_ident_attribute.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Attribute", None))
         self.label_object_name.setText(QCoreApplication.translate("MainWindow", u"Object", None))
         self.label_Ident.setText(QCoreApplication.translate("MainWindow", u"Ident", None))
         self.lineEdit_object_name.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Name", None))
+        self.lineEdit_search.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Search", None))
         self.button_objects_add.setText(QCoreApplication.translate("MainWindow", u"Add", None))
         ___qtreewidgetitem = self.tree.headerItem()
         ___qtreewidgetitem.setText(1, QCoreApplication.translate("MainWindow", u"Identifier", None));
         ___qtreewidgetitem.setText(0, QCoreApplication.translate("MainWindow", u"Objects", None));
-        ___qtablewidgetitem = self.tableWidget_inherited.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("MainWindow", u"PropertySet", None));
-        ___qtablewidgetitem1 = self.tableWidget_inherited.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("MainWindow", u"InheritedBy", None));
-        ___qtablewidgetitem2 = self.tableWidget_inherited.verticalHeaderItem(0)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("MainWindow", u"Test", None));
-
-        __sortingEnabled = self.tableWidget_inherited.isSortingEnabled()
-        self.tableWidget_inherited.setSortingEnabled(False)
-        ___qtablewidgetitem3 = self.tableWidget_inherited.item(0, 0)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("MainWindow", u"BestandsdatenqVerkehrsanlagen", None));
-        ___qtablewidgetitem4 = self.tableWidget_inherited.item(0, 1)
-        ___qtablewidgetitem4.setText(QCoreApplication.translate("MainWindow", u"Verkehrsanlagen", None));
-        self.tableWidget_inherited.setSortingEnabled(__sortingEnabled)
-
-        ___qtablewidgetitem5 = self.attribute_widget.horizontalHeaderItem(0)
-        ___qtablewidgetitem5.setText(QCoreApplication.translate("MainWindow", u"Name", None));
-        ___qtablewidgetitem6 = self.attribute_widget.horizontalHeaderItem(1)
-        ___qtablewidgetitem6.setText(QCoreApplication.translate("MainWindow", u"Data Format", None));
-        ___qtablewidgetitem7 = self.attribute_widget.horizontalHeaderItem(2)
-        ___qtablewidgetitem7.setText(QCoreApplication.translate("MainWindow", u"Format", None));
-        ___qtablewidgetitem8 = self.attribute_widget.horizontalHeaderItem(3)
-        ___qtablewidgetitem8.setText(QCoreApplication.translate("MainWindow", u"Value", None));
         self.label_pSet_name.setText(QCoreApplication.translate("MainWindow", u"Name", None))
         self.button_Pset_add.setText(QCoreApplication.translate("MainWindow", u"Add", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_property_set), QCoreApplication.translate("MainWindow", u"PropertySet", None))
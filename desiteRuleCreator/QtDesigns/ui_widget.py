@@ -18,7 +18,7 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
 from PySide6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox, QComboBox,
     QGridLayout, QHBoxLayout, QHeaderView, QLabel,
     QLineEdit, QPushButton, QSizePolicy, QSpacerItem,
-    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+    QTableView, QVBoxLayout, QWidget)
 
 class Ui_layout_main(object):
     def setupUi(self, layout_main):
@@ -119,27 +119,7 @@ class Ui_layout_main(object):
 
         self.horizontalLayout.addLayout(self.layout_grid)
 
-        self.table_widget = QTableWidget(layout_main)
-        if (self.table_widget.columnCount() < 4):
-            self.table_widget.setColumnCount(4)
-        __qtablewidgetitem = QTableWidgetItem()
-        self.table_widget.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.table_widget.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.table_widget.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.table_widget.setHorizontalHeaderItem(3, __qtablewidgetitem3)
-        if (self.table_widget.rowCount() < 5):
-            self.table_widget.setRowCount(5)
-        __qtablewidgetitem4 = QTableWidgetItem()
-        self.table_widget.setItem(0, 0, __qtablewidgetitem4)
-        __qtablewidgetitem5 = QTableWidgetItem()
-        self.table_widget.setItem(0, 1, __qtablewidgetitem5)
-        __qtablewidgetitem6 = QTableWidgetItem()
-        self.table_widget.setItem(0, 2, __qtablewidgetitem6)
-        __qtablewidgetitem7 = QTableWidgetItem()
-        self.table_widget.setItem(0, 3, __qtablewidgetitem7)
+        self.table_widget = QTableView(layout_main)
         self.table_widget.setObjectName(u"table_widget")
         sizePolicy3 = QSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Expanding)
         sizePolicy3.setHorizontalStretch(0)
@@ -154,7 +134,6 @@ class Ui_layout_main(object):
         self.table_widget.setIconSize(QSize(10, 10))
         self.table_widget.setShowGrid(True)
         self.table_widget.setCornerButtonEnabled(True)
-        self.table_widget.setRowCount(5)
         self.table_widget.horizontalHeader().setCascadingSectionResizes(False)
         self.table_widget.horizontalHeader().setMinimumSectionSize(50)
         self.table_widget.horizontalHeader().setDefaultSectionSize(70)
@@ -185,19 +164,5 @@ class Ui_layout_main(object):
         self.combo_data_type.setItemText(1, QCoreApplication.translate("layout_main", u"xs:int", None))
         self.combo_data_type.setItemText(2, QCoreApplication.translate("layout_main", u"xs:bool", None))
         self.combo_data_type.setItemText(3, QCoreApplication.translate("layout_main", u"xs:double", None))
-
-        ___qtablewidgetitem = self.table_widget.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("layout_main", u"Name", None));
-        ___qtablewidgetitem1 = self.table_widget.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("layout_main", u"Data Format", None));
-        ___qtablewidgetitem2 = self.table_widget.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("layout_main", u"Format", None));
-        ___qtablewidgetitem3 = self.table_widget.horizontalHeaderItem(3)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("layout_main", u"Values", None));
-
-        __sortingEnabled = self.table_widget.isSortingEnabled()
-        self.table_widget.setSortingEnabled(False)
-        self.table_widget.setSortingEnabled(__sortingEnabled)
-
     # retranslateUi
 
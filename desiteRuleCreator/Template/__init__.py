@@ -2,3 +2,5 @@ import os
 
 HOME_DIR = os.path.dirname(__file__)
 TEMPLATE = "template.txt"
+DISPATCHER_TEMPLATE = "dispatcher.txt"
+BOQ_IMPORT_TEMPLATE = "import_boq.txt"
@@ -1,6 +1,7 @@
-function check_format(name, pSet, return_format, format_list) {
+function check_format(name, pSet, return_format, format_list, compiled) {
 
     //Kontrolle ob pSet+name dem Format format entsprechen
+    //compiled -> optional, alle gültigen Formate als ein RegExp, null wenn keines gültig ist
     //Ausgabetexte
 
 
@@ -31,13 +32,20 @@ function check_format(name, pSet, return_format, format_list) {
     }
 
 
-    for (i in format_list) {
+    if (compiled !== undefined) {
+        //Kontrolle, ob eines der Formate eingehalten ist
+        if (compiled == null || !compiled.test(value)) {
+            return_value += 1;
+        }
+    } else {
+        for (i in format_list) {
 
-        format = new RegExp(format_list[i], "i")
+            format = new RegExp(format_list[i], "i")
 
-        //Kontrolle, ob Format eingehalten ist
-        if (!format.test(value)) {
-            return_value += 1;
+            //Kontrolle, ob Format eingehalten ist
+            if (!format.test(value)) {
+                return_value += 1;
+            }
         }
     }
 
@@ -14,11 +14,42 @@ function check_for_single(value, range) {
     return treffer
 }
 
-function check_range(name, pSet, return_format, range) {
+function range_hits(value, compiled) {
+    // Anzahl der Wertebereiche, die value enthalten, per binärer Suche über die vorsortierten Grenzen
+
+    var number = (typeof value == "number") ? value : Number(value);
+    var treffer = 0;
+    if (!isNaN(number)) {
+        var low = 0;
+        var high = compiled.bounds.length;
+        while (low < high) {
+            var middle = (low + high) >> 1;
+            if (compiled.bounds[middle] < number) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        if (low < compiled.bounds.length && compiled.bounds[low] == number) {
+            treffer = compiled.counts[2 * low + 1];
+        } else {
+            treffer = compiled.counts[2 * low];
+        }
+    }
+    var singles = (typeof value == "number") ? compiled.numbers : compiled.texts;
+    var key = String(value);
+    if (singles.hasOwnProperty(key)) {
+        treffer += singles[key];
+    }
+    return treffer
+}
+
+function check_range(name, pSet, return_format, range, compiled) {
     //Kontrolliert, ob sich 	 pSet+name in einem Bestimmten Wertebereich bewegen
 
     //range[*][0] -> untere Grenze
     //range[*][1] -> obere Grenze
+    //compiled -> optional, range als sortierte Grenzen (siehe range_hits)
     
     //Ausgabetext	
     var text1 = 'Eigenschaft "';
@@ -59,14 +90,18 @@ function check_range(name, pSet, return_format, range) {
         if (desiteAPI.getPropertyUnit(svalue, return_format) == "m") {
             value = value / 1000
         }
-        treffer += check_for_single(value, range)
+        if (compiled != undefined) {
+            treffer = range_hits(value, compiled)
+        } else {
+            treffer += check_for_single(value, range)
 
-        for (i = 0; i < range.length; i++) {
-            var untere_grenze = parseFloat(range[i][0].replace(",", "."));
-            var obere_grenze = parseFloat(range[i][1].replace(",", "."));
+            for (i = 0; i < range.length; i++) {
+                var untere_grenze = parseFloat(range[i][0].replace(",", "."));
+                var obere_grenze = parseFloat(range[i][1].replace(",", "."));
 
-            if (value >= untere_grenze && value <= obere_grenze) {
-                treffer += 1
+                if (value >= untere_grenze && value <= obere_grenze) {
+                    treffer += 1
+                }
             }
         }
     }
@@ -1,11 +1,11 @@
-from PySide6.QtCore import QPoint, Qt, QCoreApplication
-from PySide6.QtGui import QShortcut, QKeySequence
-from PySide6.QtWidgets import QMenu, QTreeWidget, QAbstractItemView, QTreeWidgetItem
+from PySide6.QtCore import QPoint, Qt, QModelIndex, QItemSelectionModel
+from PySide6.QtGui import QShortcut, QKeySequence, QStandardItemModel, QStandardItem
+from PySide6.QtWidgets import QMenu, QAbstractItemView, QCompleter
 
 from desiteRuleCreator.QtDesigns import ui_mainwindow
 from desiteRuleCreator.Widgets import script_widget, property_widget
 from desiteRuleCreator.Windows import popups
-from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.data import bulk_edit, classes, constants, identifiers, search_index, undo
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -13,7 +13,7 @@ if TYPE_CHECKING:
 
 
 def init(main_window):
-    def init_tree(tree: classes.CustomTree):
+    def init_tree(tree: classes.ObjectTree):
         # Design Tree
         tree.setObjectName(u"treeWidget_objects")
         tree.setDragDropMode(QAbstractItemView.InternalMove)
@@ -25,22 +25,36 @@ def init(main_window):
         tree.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         tree.setContextMenuPolicy(Qt.CustomContextMenu)
         tree.viewport().setAcceptDrops(True)
+        tree.setModel(main_window.object_model)
 
-        ___qtreewidgetitem = tree.headerItem()
-        ___qtreewidgetitem.setText(1, QCoreApplication.translate("MainWindow", u"Identifier", None))
-        ___qtreewidgetitem.setText(0, QCoreApplication.translate("MainWindow", u"Objects", None))
+    def init_search(main_window):
+        main_window.search_index = search_index.SearchIndex()
+        main_window.search_index.attach()
+        main_window.search_index.rebuild()
+        completer = QCompleter(QStandardItemModel(main_window), main_window)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setMaxVisibleItems(20)
+        main_window.ui.lineEdit_search.setCompleter(completer)
 
     def connect_items(main_window):
         ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-        ui.tree.itemClicked.connect(main_window.object_clicked)
+        ui.tree.clicked.connect(main_window.object_clicked)
         ui.tree.customContextMenuRequested.connect(main_window.right_click)
         ui.button_objects_add.clicked.connect(main_window.add_object)
         main_window.grpSc.activated.connect(main_window.rc_group)
         main_window.delSc.activated.connect(main_window.delete_object)
+        main_window.undoSc.activated.connect(main_window.undo)
+        main_window.redoSc.activated.connect(main_window.redo)
+        main_window.object_model.object_moved.connect(main_window.object_moved)
+        ui.lineEdit_search.textEdited.connect(main_window.search)
+        for line_edit in main_window.obj_line_edit_list:
+            line_edit.returnPressed.connect(main_window.apply_multi_selection)
+        ui.lineEdit_search.completer().activated[QModelIndex].connect(main_window.search_result_activated)
 
     main_window.ui.verticalLayout_objects.removeWidget(main_window.ui.tree)
     main_window.ui.tree.close()
-    main_window.ui.tree = classes.CustomTree(main_window.ui.verticalLayout_main)
+    main_window.object_model = classes.ObjectModel(main_window)
+    main_window.ui.tree = classes.ObjectTree()
     main_window.ui.verticalLayout_objects.addWidget(main_window.ui.tree)
     init_tree(main_window.ui.tree)
 
@@ -52,14 +66,18 @@ def init(main_window):
                                       main_window.ui.lineEdit_ident_pSet, ]
     main_window.delSc = QShortcut(QKeySequence('Ctrl+X'), main_window)
     main_window.grpSc = QShortcut(QKeySequence('Ctrl+G'), main_window)
+    main_window.undoSc = QShortcut(QKeySequence.Undo, main_window)
+    main_window.redoSc = QShortcut(QKeySequence.Redo, main_window)
+    main_window.undo_stack = undo.UndoStack()
+    init_search(main_window)
     connect_items(main_window)
 
 
-def selected_object(main_window):
-    tree: classes.CustomTree = main_window.ui.tree
-    sel_items = tree.selectedItems()
-    if len(sel_items) == 1:
-        return sel_items[0]
+def selected_object(main_window) -> classes.Object | None:
+    tree: classes.ObjectTree = main_window.ui.tree
+    sel_objects = tree.selected_objects()
+    if len(sel_objects) == 1:
+        return sel_objects[0]
     else:
         return None
 
@@ -81,15 +99,50 @@ def clear_object_input(main_window):
 def clear_all(main_window):
     # Clean Widget
     clear_object_input(main_window)
-    main_window.ui.tree.clear()
+    main_window.object_model.clear()
 
     # Delete Attributes & Objects
-    for obj in classes.Object:
+    for obj in list(classes.Object):
         obj.delete()
 
 
 
 
+def search(main_window, text: str):
+    completer: QCompleter = main_window.ui.lineEdit_search.completer()
+    model: QStandardItemModel = completer.model()
+    model.clear()
+    for item in main_window.search_index.search(text):
+        row = QStandardItem(search_index.describe(item))
+        row.setData(item, Qt.UserRole)
+        model.appendRow(row)
+    if model.rowCount():
+        completer.complete()
+
+
+def search_result_activated(main_window, index: QModelIndex):
+    item: classes.Hirarchy = index.data(Qt.UserRole)
+    obj = search_index.object_of(item)
+    if obj is None:
+        return
+
+    tree: classes.ObjectTree = main_window.ui.tree
+    tree_index = main_window.object_model.load(obj)
+    tree.setCurrentIndex(tree_index)
+    tree.scrollTo(tree_index)
+    single_click(main_window, tree_index)
+
+    property_set = item.property_set if isinstance(item, classes.Attribute) else item
+    if isinstance(property_set, classes.PropertySet):
+        pset_model: classes.PropertySetModel = main_window.pset_model
+        source_index = pset_model.index(pset_model.row_of(property_set), 0)
+        pset_index = main_window.pset_table.model().mapFromSource(source_index)
+        if pset_index.isValid():
+            main_window.pset_table.selectionModel().select(pset_index, QItemSelectionModel.ClearAndSelect |
+                                                           QItemSelectionModel.Rows)
+            property_widget.left_click(main_window, pset_index)
+
+
 def right_click(main_window, position: QPoint):
     menu = QMenu()
     main_window.action_group_objects = menu.addAction("Group")
@@ -106,27 +159,26 @@ def right_click(main_window, position: QPoint):
     menu.exec(main_window.ui.tree.viewport().mapToGlobal(position))
 
 def rc_rename(main_window):
-    item_list = [item for item in main_window.ui.tree.selectedItems()]
-    if len(item_list)==1:
-        item: classes.CustomTreeItem = item_list[0]
-        obj: classes.Object = item.object
-        name, fulfilled = popups.req_new_name(main_window, item.text(0))
+    obj_list = main_window.ui.tree.selected_objects()
+    if len(obj_list)==1:
+        obj: classes.Object = obj_list[0]
+        name, fulfilled = popups.req_new_name(main_window, obj.name)
 
         if fulfilled:
-            obj.name = name
-            item.setText(0, name)
+            main_window.undo_stack.apply(undo.NameChange(obj, name), "Rename")
+            main_window.object_model.object_changed(obj)
     else:
         popups.msg_select_only_one()
         return
 
-def rc_collapse(tree: QTreeWidget):
-    for item in tree.selectedItems():
-        tree.collapseItem(item)
+def rc_collapse(tree: classes.ObjectTree):
+    for index in tree.selectionModel().selectedRows(0):
+        tree.collapse(index)
 
 
-def rc_expand(tree: QTreeWidget):
-    for item in tree.selectedIndexes():
-        tree.expandRecursively(item)
+def rc_expand(tree: classes.ObjectTree):
+    for index in tree.selectionModel().selectedRows(0):
+        tree.expandRecursively(index)
 
 
 def rc_group_items(main_window):
@@ -134,12 +186,9 @@ def rc_group_items(main_window):
     [group_name, ident_pset, ident_attrib, ident_value]= input_fields
 
     if group_name:
-        selected_items = main_window.ui.tree.selectedItems()
-        parent_classes = [item for item in selected_items if item.parent() not in selected_items]
-        parent = parent_classes[0].parent()
-
-        if parent is None:
-            parent: QTreeWidgetItem = main_window.ui.tree.invisibleRootItem()
+        selected_objects = main_window.ui.tree.selected_objects()
+        parent_classes = [obj for obj in selected_objects if obj.parent not in selected_objects]
+        parent: classes.Object | None = parent_classes[0].parent
 
         if is_concept:
             group_obj = classes.Object(group_name,"Group" )
@@ -155,25 +204,24 @@ def rc_group_items(main_window):
                 group_obj = classes.Object(group_name, identifier)
                 group_obj.add_property_set(pset)
 
-        group_item: classes.CustomTreeItem = main_window.add_object_to_tree(group_obj, parent)
+        with main_window.undo_stack.record("Group"):
+            main_window.add_object_to_tree(group_obj, parent)
+            main_window.undo_stack.push(undo.ObjectAdded(group_obj))
+            for obj in parent_classes:
+                main_window.object_model.move_object(obj, group_obj)
 
-        for item in parent_classes:
-            child: classes.CustomTreeItem = parent.takeChild(parent.indexOfChild(item))
-            group_obj.add_child(child.object)
-            group_item.addChild(child)
 
-
-def single_click(main_window, item: classes.CustomTreeItem):
+def single_click(main_window, index: QModelIndex):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     property_widget.clear_attribute_table(main_window)
 
 
-    if len(main_window.ui.tree.selectedItems())>1:
+    if len(main_window.ui.tree.selected_objects())>1:
         main_window.multi_selection()
 
     else:
 
-        obj: classes.Object = item.object
+        obj: classes.Object = classes.ObjectModel.object_of(index)
         main_window.active_object = obj
         property_widget.fill_table(main_window, obj)
         script_widget.show(main_window)
@@ -182,6 +230,67 @@ def single_click(main_window, item: classes.CustomTreeItem):
         ui.lineEdit_object_name.setText(obj.name)
         fill_line_inputs(main_window,obj)
 
+def apply_multi_selection(main_window):
+    """ write the object inputs to every selected Object, '*' keeps the differing values"""
+    def read(line_edit) -> str | None:
+        text = line_edit.text().strip()
+        if text in ("", "*"):
+            return None
+        return text
+
+    objects = main_window.ui.tree.selected_objects()
+    if len(objects) < 2:
+        return
+
+    ui: ui_mainwindow.Ui_MainWindow = main_window.ui
+    name = read(ui.lineEdit_object_name)
+    ident_pset = read(ui.lineEdit_ident_pSet)
+    ident_attribute = read(ui.lineEdit_ident_attribute)
+    ident_value = read(ui.lineEdit_ident_value)
+
+    if ident_value is not None and len([obj for obj in objects if not obj.is_concept]) > 1:
+        values = {tuple(obj.ident_attrib.value) for obj in objects if not obj.is_concept}
+        if values != {tuple(classes.Attribute.normalize_value([ident_value]))}:
+            popups.msg_identical_identifier()
+            return
+
+    with bulk_edit.BulkEdit(main_window.object_model, main_window.undo_stack, "Edit Objects") as edit:
+        if name is not None:
+            edit.rename_objects([obj for obj in objects if obj.name != name], name)
+        edit.set_identifier(objects, ident_pset, ident_attribute, None if ident_value is None else [ident_value])
+        changed = not edit.is_empty
+
+    if changed:
+        main_window.project.changed = True
+    multi_selection(main_window)
+
+
+def object_moved(main_window, obj: classes.Object, old_parent: classes.Object | None,
+                 new_parent: classes.Object | None):
+    main_window.undo_stack.push(undo.ParentChange(obj, old_parent, new_parent), "Move")
+
+
+def undo_step(main_window, redo: bool = False):
+    stack: undo.UndoStack = main_window.undo_stack
+    if not (stack.can_redo if redo else stack.can_undo):
+        return
+    model: classes.ObjectModel = main_window.object_model
+    model.begin_layout_change()
+    if redo:
+        stack.redo()
+    else:
+        stack.undo()
+    model.end_layout_change()
+    main_window.project.changed = True
+    classes.AttributeModel.reload_all()
+    if main_window.active_object is not None and main_window.active_object not in classes.Object:
+        main_window.active_object = None  # its creation was undone
+        main_window.set_right_window_enable(False)
+        return
+    property_widget.reload(main_window)
+    script_widget.reload(main_window)
+
+
 def fill_line_inputs(main_window, obj:classes.Object):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     ui.lineEdit_object_name.setText(obj.name)
@@ -211,9 +320,9 @@ def set_ident_line_enable(main_window, value: bool):
 def multi_selection(main_window):
     main_window.set_right_window_enable(False)
 
-    items = main_window.ui.tree.selectedItems()
+    objects = main_window.ui.tree.selected_objects()
 
-    is_concept = [item.object for item in items if item.object.is_concept]
+    is_concept = [obj for obj in objects if obj.is_concept]
     if is_concept:
         main_window.clear_object_input()
         if all_equal(is_concept):
@@ -222,10 +331,10 @@ def multi_selection(main_window):
     else:
 
         main_window.set_ident_line_enable(True)
-        object_names = [item.object.name for item in items]
-        ident_psets = [item.object.ident_attrib.property_set.name for item in items if isinstance(item.object.ident_attrib,classes.Attribute)]
-        ident_attributes = [item.object.ident_attrib.name for item in items]
-        ident_values = [item.object.ident_attrib.value for item in items]
+        object_names = [obj.name for obj in objects]
+        ident_psets = [obj.ident_attrib.property_set.name for obj in objects if isinstance(obj.ident_attrib,classes.Attribute)]
+        ident_attributes = [obj.ident_attrib.name for obj in objects]
+        ident_values = [obj.ident_attrib.value for obj in objects]
 
         line_assignment = {
             main_window.ui.lineEdit_object_name: object_names,
@@ -258,15 +367,7 @@ def add_object(main_window):
         return False
 
     def already_exists(new_list):
-        obj:classes.Object
-        for obj in classes.Object:
-            ident:classes.Attribute = obj.ident_attrib
-            if not obj.is_concept:
-                ident_list = [ident.property_set.name,ident.name,ident.value]
-                if ident_list == new_list:
-                    return True
-
-        return False
+        return identifiers.exists(*new_list)
 
     def create_ident(property_set, ident_name, ident_value) -> classes.Attribute:
         ident: classes.Attribute = property_set.get_attribute_by_name(ident_name)
@@ -291,7 +392,7 @@ def add_object(main_window):
             if not already_exists(input_list[1:]):
 
                 parent = None
-                if p_set_name in property_widget.predefined_pset_list(main_window):  # if PropertySet allready predefined
+                if property_widget.is_predefined_name(main_window, p_set_name):  # if PropertySet allready predefined
                     result = popups.req_merge_pset()  # ask if you want to merge
                     if result:
                         parent = property_widget.get_parent_by_name(main_window.active_object, p_set_name)
@@ -306,6 +407,7 @@ def add_object(main_window):
                 obj = classes.Object(name, ident)
                 obj.add_property_set(ident.property_set)
                 main_window.add_object_to_tree(obj)
+                main_window.undo_stack.push(undo.ObjectAdded(obj), "Add Object")
                 main_window.clear_object_input()
 
             else:
@@ -318,43 +420,34 @@ def add_object(main_window):
         popups.msg_missing_input()
 
 
-def add_object_to_tree(main_window, obj: classes.Object, parent=None):
-    if parent is None:
-        item = classes.CustomTreeItem(main_window.ui.tree, obj)
-
-    else:
-        item = classes.CustomTreeItem(parent, obj)
-    return item
+def add_object_to_tree(main_window, obj: classes.Object, parent: classes.Object = None) -> QModelIndex:
+    model: classes.ObjectModel = main_window.object_model
+    model.insert_object(obj, parent)
+    return model.index_of(obj)
 
 
 def delete_object(main_window):
-    string_list = [item.object.name for item in main_window.ui.tree.selectedItems()]
+    objects = main_window.ui.tree.selected_objects()
+    string_list = [obj.name for obj in objects]
 
 
     delete_request = popups.msg_del_items(string_list)
 
     if delete_request:
-
-        root: QTreeWidgetItem = main_window.ui.tree.invisibleRootItem()
-        for item in main_window.ui.tree.selectedItems():
-            obj: classes.Object = item.object
-            obj.delete()
-            children = item.takeChildren()
-            root.addChildren(children)
-            (item.parent() or root).removeChild(item)
-            main_window.project.changed = True
+        # children move to the top level and aggregations are dropped in the same undo step as the deletion
+        with bulk_edit.BulkEdit(main_window.object_model, main_window.undo_stack, "Delete Object") as edit:
+            for obj in objects:
+                edit.set_parent(obj.children, None)
+                for child in obj.aggregates_to:
+                    edit.set_aggregation(obj, child, False)
+                for parent in obj.aggregates_from:
+                    edit.set_aggregation(parent, obj, False)
+                edit.remove(obj)
+        main_window.project.changed = True
 
 
 def reload_tree(main_window):
-    def loop(item: classes.CustomTreeItem):
-        for i in range(item.childCount()):
-            child = item.child(i)
-            child.update()
-            loop(child)
-
-    ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-    root = ui.tree.invisibleRootItem()
-    loop(root)
+    main_window.object_model.refresh()
 
 def reload(main_window):
     reload_tree(main_window)
@@ -1,13 +1,13 @@
 from __future__ import annotations
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QTableWidgetItem, QListWidgetItem, QAbstractScrollArea,QMenu,QCompleter
+from PySide6.QtCore import Qt, QModelIndex, QSortFilterProxyModel
+from PySide6.QtWidgets import QAbstractScrollArea,QMenu,QCompleter
 
 from desiteRuleCreator.QtDesigns import ui_mainwindow
 from desiteRuleCreator.Windows import popups
 from desiteRuleCreator.Windows.popups import msg_del_ident_pset, req_pset_name,msg_del_items
 from desiteRuleCreator.Windows.propertyset_window import PropertySetWindow,fill_attribute_table
-from desiteRuleCreator.data import classes, constants
-from desiteRuleCreator.data.classes import PropertySet, CustomTreeItem
+from desiteRuleCreator.data import classes, constants, undo
+from desiteRuleCreator.data.classes import PropertySet
 from desiteRuleCreator import icons
 from typing import TYPE_CHECKING
 
@@ -31,9 +31,22 @@ def get_parent_by_name(active_object: classes.Object, name: str):
 def init(main_window:MainWindow):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
 
-    main_window.pset_table.itemClicked.connect(main_window.list_object_clicked)
-    main_window.pset_table.itemDoubleClicked.connect(main_window.list_object_double_clicked)
-    main_window.ui.attribute_widget.itemDoubleClicked.connect(main_window.attribute_double_clicked)
+    main_window.pset_model = classes.PropertySetModel(main_window)
+    proxy_model = QSortFilterProxyModel(main_window)
+    proxy_model.setSourceModel(main_window.pset_model)
+    main_window.pset_table.setModel(proxy_model)
+
+    main_window.pset_name_model = classes.PropertySetNameModel(main_window)
+    main_window.pset_name_filter = classes.PropertySetNameFilter(main_window.pset_name_model, main_window)
+    completer = QCompleter(main_window.pset_name_filter, main_window)
+    ui.lineEdit_ident_pSet.setCompleter(completer)
+    ui.lineEdit_pSet_name.setCompleter(completer)
+    main_window.attribute_model = classes.AttributeModel(main_window)
+    ui.attribute_widget.setModel(main_window.attribute_model)
+
+    main_window.pset_table.clicked.connect(main_window.list_object_clicked)
+    main_window.pset_table.doubleClicked.connect(main_window.list_object_double_clicked)
+    main_window.ui.attribute_widget.doubleClicked.connect(main_window.attribute_double_clicked)
     main_window.pset_table.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
 
     ui.button_Pset_add.clicked.connect(main_window.add_pset)
@@ -55,18 +68,22 @@ def open_menu(main_window, position):
 
 
 def predefined_pset_list(main_window) -> set[str]:
-    property_list = {x.name for x in PropertySet if x.object is None}
+    update_completer(main_window)
+    return main_window.pset_name_filter.names()
 
-    def iterate_parents(parent:classes.Object):
-        if parent is not None:
-            for property_set in parent.property_sets:
-                property_list.add(property_set.name)
-            iterate_parents(parent.parent)
-    if main_window.active_object is not None:
-        iterate_parents(main_window.active_object.parent)
-        completer = QCompleter(property_list)
-        main_window.ui.lineEdit_pSet_name.setCompleter(completer)
-    return property_list
+
+def is_predefined_name(main_window, name: str) -> bool:
+    update_completer(main_window)
+    return main_window.pset_name_filter.contains(name)
+
+
+def update_completer(main_window):
+    main_window.pset_name_filter.set_scope(main_window.active_object)
+
+
+def selected_property_sets(main_window) -> list[PropertySet]:
+    indexes = main_window.pset_table.selectionModel().selectedRows(0)
+    return [classes.PropertySetModel.property_set_of(index) for index in indexes]
 
 
 def modify_title(self, tab, text=None):
@@ -74,13 +91,8 @@ def modify_title(self, tab, text=None):
 
 
 def clear_all(main_window):
-    ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-    for row in range(main_window.pset_table.rowCount()):
-        main_window.pset_table.removeRow(row)
-
-    for row in range(ui.attribute_widget.rowCount()):
-        print(row)
-        ui.attribute_widget.removeRow(row)
+    main_window.pset_model.set_object(None)
+    main_window.attribute_model.set_property_set(None)
     main_window.ui.lineEdit_pSet_name.clear()
     main_window.set_right_window_enable(False)
     modify_title(main_window, main_window.ui.tab_code, "Code")
@@ -88,55 +100,46 @@ def clear_all(main_window):
 
 
 def delete(main_window):
-    list_item = main_window.pset_table.selectedItems()
+    property_sets = selected_property_sets(main_window)
     obj = main_window.active_object
 
-    string_list = [x.data(constants.DATA_POS).name for x in list_item if x.column() ==0]
+    string_list = [property_set.name for property_set in property_sets]
 
     delete_request = msg_del_items(string_list)
 
     if delete_request:
 
-        if not bool([el for el in list_item if
-                     el.data(
-                         constants.DATA_POS) == obj.ident_attrib.property_set]):
+        if not bool([property_set for property_set in property_sets if
+                     property_set == obj.ident_attrib.property_set]):
                             #wenn sich der Identifier nicht im Pset befindet
 
-            el: QTableWidgetItem
-            for el in list_item:
-                if el.column() == 0:
-                    property_set: PropertySet = el.data(constants.DATA_POS)
-
-                    if property_set.is_child:
-                        property_set.parent.remove_child(property_set)
-                    else:
-                        property_set.delete()
-                    main_window.pset_table.selectRow(el.row())
-
-            for i in sorted(main_window.pset_table.selectionModel().selectedRows()):
-                main_window.pset_table.removeRow(i.row())
+            with main_window.undo_stack.record("Delete PropertySet"):
+                for property_set in property_sets:
+                    change = undo.PropertySetRemoved(obj, property_set)
+                    main_window.pset_model.remove_property_set(property_set)
+                    main_window.undo_stack.push(change)
+            main_window.attribute_model.set_property_set(None)
 
         else:
             msg_del_ident_pset()
 
 
 def rename(main_window:MainWindow):
-    list_item = main_window.pset_table.selectedItems()[0]
-    selected_pset: PropertySet = list_item.data(constants.DATA_POS)
+    selected_pset: PropertySet = selected_property_sets(main_window)[0]
     return_str = popups.req_new_name(main_window,selected_pset.name)
     if return_str[1]:
         new_name = return_str[0]
         if new_name in [pset.name for pset in main_window.active_object.property_sets]:
             popups.msg_already_exists()
             return
-        list_item.setText(new_name)
+        main_window.undo_stack.apply(undo.NameChange(selected_pset, new_name), "Rename PropertySet")
+        main_window.pset_model.property_set_changed(selected_pset)
         main_window.pset_table.resizeColumnsToContents()
-        selected_pset.name = new_name
         main_window.reload_objects()
 
 
 def text_changed(main_window:MainWindow,text):
-    if main_window.pset_table.findItems(text, Qt.MatchFlag.MatchExactly):
+    if main_window.pset_model.find_row(text) >= 0:
         main_window.ui.button_Pset_add.setEnabled(False)
     else:
         main_window.ui.button_Pset_add.setEnabled(True)
@@ -148,8 +151,8 @@ def set_enable(main_window, value: bool):
         modify_title(main_window, main_window.ui.tab_code, "Code")
         modify_title(main_window, main_window.ui.tab_property_set, "PropertySet")
 
-        main_window.pset_table.setRowCount(0)
-        main_window.ui.attribute_widget.setRowCount(0)
+        main_window.pset_model.set_object(None)
+        main_window.attribute_model.set_property_set(None)
         main_window.ui.lineEdit_pSet_name.setText("")
 
 
@@ -158,57 +161,30 @@ def fill_table(main_window, obj: classes.Object):
     modify_title(main_window, main_window.ui.tab_code, f"{obj.name}: Code")
     modify_title(main_window, main_window.ui.tab_property_set, f"{obj.name}: PropertySets")
 
-    main_window.pset_table.setRowCount(0)
-    own_psets = main_window.active_object.property_sets
-    table_length = len(own_psets)
-
-    # find inherited Psets
-
-    main_window.pset_table.setRowCount(table_length)  # Prepare Table
-
-    for i, pset in enumerate(own_psets):
-        pset: classes.PropertySet = pset
-        table_item = QTableWidgetItem(pset.name)
-        table_item.setData(constants.DATA_POS, pset)
-        main_window.pset_table.setItem(i, 0, table_item)
-        if pset.is_child:
-            if pset.parent.object is not None:
-                table_item = QTableWidgetItem(pset.parent.object.name)
-            else:
-                table_item = QTableWidgetItem(constants.INHERITED_TEXT)
-            main_window.pset_table.setItem(i, 1, table_item)
-
-    current_row = len(own_psets)
-
+    main_window.pset_model.set_object(obj)
     main_window.pset_table.resizeColumnsToContents()
 
 
-def left_click(main_window, item: QListWidgetItem):
+def left_click(main_window, index: QModelIndex):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
 
-    table_widget = ui.tableWidget_inherited
-
-    item = table_widget.item(table_widget.row(item), 0)
-
-    property_set: PropertySet = item.data(constants.DATA_POS)
+    property_set: PropertySet = classes.PropertySetModel.property_set_of(index)
 
     fill_attribute_table(main_window.active_object,ui.attribute_widget,property_set)
     main_window.ui.lineEdit_pSet_name.setText(property_set.name)
 
-def attribute_double_click(main_window,item:classes.CustomTableItem):
+def attribute_double_click(main_window,index:QModelIndex):
 
-    item: QTableWidgetItem = item.tableWidget().item(item.row(), 0)
-    attribute:classes.Attribute = item.item
+    attribute:classes.Attribute = classes.AttributeModel.attribute_of(index)
     property_set = attribute.property_set
     main_window.pset_window:PropertySetWindow = main_window.open_pset_window(property_set, main_window.active_object, None)
-    main_window.pset_window.list_clicked(item)
-    pass
+    main_window.pset_window.list_clicked(main_window.pset_window.attribute_model.index(
+        main_window.pset_window.attribute_model.row_of(attribute), 0))
 
 
-def double_click(main_window, item: QTableWidgetItem):
-    main_window.list_object_clicked(item)
-    item = main_window.pset_table.item(item.row(), 0)
-    property_set: PropertySet = item.data(constants.DATA_POS)
+def double_click(main_window, index: QModelIndex):
+    main_window.list_object_clicked(index)
+    property_set: PropertySet = classes.PropertySetModel.property_set_of(index)
 
     # Open New Window
     main_window.pset_window = main_window.open_pset_window(property_set, main_window.active_object, None)
@@ -224,36 +200,18 @@ def open_pset_window(main_window, property_set: PropertySet, active_object: clas
 def add_pset(main_window:MainWindow):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     name = main_window.ui.lineEdit_pSet_name.text()
-    obj = main_window.active_object
-
-
 
     inherited = False
-    if name in predefined_pset_list(main_window):
+    if is_predefined_name(main_window, name):
         inherited = popups.req_merge_pset()
 
-    item = QTableWidgetItem(name)
-    new_row_count = main_window.pset_table.rowCount() + 1
-    main_window.pset_table.setRowCount(new_row_count)
-    main_window.pset_table.setItem(new_row_count - 1, 0, item)
-
     parent = get_parent_by_name(main_window.active_object, name)
-    if inherited:
-        property_set = PropertySet(name)
-        if parent is not None:
-            parent.add_child(property_set)
-
-        if parent.object is not None:
-            item2 = QTableWidgetItem(parent.object.name)
-        else:
-            item2 = QTableWidgetItem(constants.INHERITED_TEXT)
-        main_window.pset_table.setItem(new_row_count - 1, 1, item2)
+    property_set = PropertySet(name)
+    if inherited and parent is not None:
+        parent.add_child(property_set)
 
-    else:
-        property_set = PropertySet(name)
-
-    obj.add_property_set(property_set)
-    item.setData(constants.DATA_POS, property_set)
+    main_window.pset_model.add_property_set(property_set)
+    main_window.undo_stack.push(undo.PropertySetAdded(main_window.active_object, property_set), "Add PropertySet")
     #main_window.pset_window = main_window.open_pset_window(property_set, main_window.active_object, None)
     main_window.text_changed(main_window.ui.lineEdit_pSet_name.text())
     main_window.pset_table.resizeColumnsToContents()
@@ -265,6 +223,4 @@ def reload(main_window):
         fill_table(main_window, main_window.active_object)
 
 def clear_attribute_table(main_window):
-    ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-    table_widget = ui.attribute_widget
-    table_widget.setRowCount(0)
\ No newline at end of file
+    main_window.attribute_model.set_property_set(None)
\ No newline at end of file
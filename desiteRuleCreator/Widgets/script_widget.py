@@ -1,9 +1,13 @@
-from PySide6.QtCore import Slot, Qt, QRect, QSize
-from PySide6.QtGui import QColor, QPainter, QTextFormat
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable
+
+from PySide6.QtCore import Slot, Qt, QRect, QSize, QTimer, Signal, QObject
+from PySide6.QtGui import QColor, QPainter, QTextFormat, QFocusEvent
 from PySide6.QtWidgets import QPlainTextEdit, QWidget, QTextEdit
 
 from desiteRuleCreator.QtDesigns import ui_mainwindow
-from desiteRuleCreator.data import classes
+from desiteRuleCreator.data import classes, constants, js_lint, undo
 from desiteRuleCreator.Windows import popups
 
 
@@ -22,6 +26,7 @@ def init(main_window):
     ui.code_edit = CodeEditor()
     ui.verticalLayout_2.addWidget(ui.code_edit)
     ui.code_edit.show()
+    main_window.script_linter = ScriptLinter(main_window)
     connect()
     set_enable(main_window, False)
 
@@ -50,9 +55,8 @@ def selection_changed(main_window):
 def clicked(main_window, item: classes.Script):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     ui.code_edit.setEnabled(True)
-    edit: QPlainTextEdit = ui.code_edit
-    edit.setPlainText(item.code)
-    # ui.code_edit.setText(item.code)
+    edit: CodeEditor = ui.code_edit
+    edit.set_script(item)
 
     for button in code_buttons(main_window):
         button.setEnabled(True)
@@ -92,11 +96,11 @@ def code_buttons(main_window):
 
 def show(main_window):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-    tree_item: classes.CustomTreeItem = main_window.selected_object()
-    if tree_item is not None:
-        obj = tree_item.object
+    obj: classes.Object = main_window.selected_object()
+    if obj is not None:
         for script in obj.scripts:
             ui.listWidget_scripts.addItem(script)
+            main_window.script_linter.lint(script)
 
 
 def delete_objects(main_window):
@@ -106,14 +110,24 @@ def delete_objects(main_window):
 
     delete_request = popups.msg_del_items(string_list)
     if delete_request:
-
-        for script in ui.listWidget_scripts.selectedItems():
-            item: classes.Script = ui.listWidget_scripts.takeItem(ui.listWidget_scripts.indexFromItem(script).row())
-            item.object.delete_script(item)
-        ui.code_edit.clear()
+        with main_window.undo_stack.record("Delete Script"):
+            for script in ui.listWidget_scripts.selectedItems():
+                item: classes.Script = ui.listWidget_scripts.takeItem(ui.listWidget_scripts.indexFromItem(script).row())
+                main_window.undo_stack.apply(undo.ScriptRemoved(item))
+        ui.code_edit.set_script(None)
         selection_changed(main_window)
 
 
+def reload(main_window):
+    """ refill the script list, e.g. after an undo step added or removed Scripts"""
+    ui: ui_mainwindow.Ui_MainWindow = main_window.ui
+    for i in reversed(range(ui.listWidget_scripts.count())):
+        ui.listWidget_scripts.takeItem(i)
+    ui.code_edit.set_script(None)
+    show(main_window)
+    selection_changed(main_window)
+
+
 def set_enable(main_window, value: bool):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     ui.tab_code.setEnabled(value)
@@ -121,7 +135,7 @@ def set_enable(main_window, value: bool):
         ui.tabWidget.setTabText(ui.tabWidget.indexOf(ui.tab_code), "Code")
         for i in reversed(range(ui.listWidget_scripts.count())):
             ui.listWidget_scripts.takeItem(i)
-        ui.code_edit.clear()
+        ui.code_edit.set_script(None)
 
     if ui.listWidget_scripts.count() < 1:
         code_value = False
@@ -138,6 +152,7 @@ def set_enable(main_window, value: bool):
 def add_script(main_window):
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
     script = classes.Script("NewScript", main_window.active_object)
+    main_window.undo_stack.push(undo.ScriptAdded(script), "Add Script")
     ui.listWidget_scripts.addItem(script)
     ui.listWidget_scripts.setCurrentItem(script)
     selection_changed(main_window)
@@ -145,15 +160,52 @@ def add_script(main_window):
 
 
 def update_script(main_window):
+    """ copy pending editor changes into the Script, called when typing pauses and before save / export"""
     ui: ui_mainwindow.Ui_MainWindow = main_window.ui
-    script_list = main_window.ui.listWidget_scripts
-    selected_items = script_list.selectedItems()
-
-    if len(selected_items) == 1:
-        item: classes.Script = selected_items[0]
-        item.code = ui.code_edit.toPlainText()
+    edit: CodeEditor = ui.code_edit
+    item = edit.script
+    if edit.sync() and item is not None:
         ui.label_script_name.setText(item.name)
         ui.label_script_name.setEnabled(True)
+        main_window.script_linter.lint(item)
+
+
+class ScriptLinter(QObject):
+    """ Syntax check of Scripts on a worker thread, the result is handed back to the GUI thread via signal"""
+    finished = Signal(object, object)
+    ran = Signal(object, object)
+
+    def __init__(self, parent=None) -> None:
+        super(ScriptLinter, self).__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.finished.connect(self.apply)
+        self.ran.connect(self.call)
+
+    def run(self, function: Callable[[], Any], callback: Callable[[Any], None]) -> None:
+        """ runs function on the worker thread and hands its result to callback in the GUI thread"""
+        future = self.executor.submit(function)
+        future.add_done_callback(lambda done: self.ran.emit(callback, done))
+
+    def lint(self, script: classes.Script) -> None:
+        code = script.code
+        if js_lint.is_cached(code):
+            script.set_lint_error(js_lint.check(code))
+            return
+        future = self.executor.submit(js_lint.check, code)
+        future.add_done_callback(lambda done: self.finished.emit(script, (code, done)))
+
+    @Slot(object, object)
+    def apply(self, script: classes.Script, result: tuple[str, Future]) -> None:
+        code, future = result
+        if script.code == code and future.exception() is None:  # ignore results for outdated code
+            script.set_lint_error(future.result())
+
+    @Slot(object, object)
+    def call(self, callback: Callable[[Any], None], future: Future) -> None:
+        if future.exception() is not None:
+            logging.error(f"Syntaxprüfung fehlgeschlagen: {future.exception()}")
+            return
+        callback(future.result())
 
 
 class LineNumberArea(QWidget):
@@ -169,9 +221,17 @@ class LineNumberArea(QWidget):
 
 
 class CodeEditor(QPlainTextEdit):
+    editing_paused = Signal()
+
     def __init__(self):
         super().__init__()
         self.line_number_area = LineNumberArea(self)
+        self.script: classes.Script | None = None
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(constants.SCRIPT_SYNC_DELAY)
+        self.sync_timer.timeout.connect(self.editing_paused)
+        self.document().contentsChanged.connect(self.sync_timer.start)
 
         self.blockCountChanged[int].connect(self.update_line_number_area_width)
         self.updateRequest[QRect, int].connect(self.update_line_number_area)
@@ -180,6 +240,28 @@ class CodeEditor(QPlainTextEdit):
         self.update_line_number_area_width(0)
         self.highlight_current_line()
 
+    def set_script(self, script: classes.Script | None) -> None:
+        self.sync()
+        self.script = script
+        self.setPlainText(script.code if script is not None else "")
+        self.document().setModified(False)
+        self.sync_timer.stop()
+
+    def sync(self) -> bool:
+        """ write the text into script if the document was modified since the last sync"""
+        self.sync_timer.stop()
+        if self.script is None or not self.document().isModified():
+            return False
+        self.script.code = self.toPlainText()
+        self.script.changed = True
+        self.document().setModified(False)
+        return True
+
+    def focusOutEvent(self, e: QFocusEvent) -> None:
+        super().focusOutEvent(e)
+        if self.document().isModified():
+            self.editing_paused.emit()
+
     def line_number_area_width(self):
         digits = 1
         max_num = max(1, self.blockCount())
@@ -1,8 +1,8 @@
 from __future__ import annotations  # make own class referencable
 
-from typing import Iterator, List,Set
+from typing import Iterator, List
 
-from PySide6.QtCore import Qt, QRectF, QPointF,QEvent
+from PySide6.QtCore import Qt, QRectF, QPointF,QEvent,QVariantAnimation
 from PySide6.QtGui import QShowEvent, QWheelEvent, QPainterPath, QHideEvent,QMouseEvent,QContextMenuEvent,QCursor,QBrush,QColor,QPen
 from PySide6.QtWidgets import QPushButton, QHBoxLayout, QWidget, QGraphicsScene, QGraphicsView, \
     QApplication, QGraphicsProxyWidget, QGraphicsSceneMouseEvent, QGraphicsPathItem, QComboBox, QGraphicsRectItem, \
@@ -11,7 +11,7 @@ from PySide6.QtWidgets import QPushButton, QHBoxLayout, QWidget, QGraphicsScene,
 from desiteRuleCreator import icons
 from desiteRuleCreator.QtDesigns import ui_GraphWindow, ui_ObjectGraphWidget
 from desiteRuleCreator.Widgets import property_widget
-from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.data import aggregation, classes, constants
 from desiteRuleCreator.Windows import popups
 
 def item_to_name(item : Node | classes.Object) -> str:
@@ -187,6 +187,54 @@ class DrawTree(object):
         return self.__str__()
 
 
+## Incremental Tree Positions
+def merge_contours(offsets: list[float], contours: list[tuple[list[float], list[float]]]) -> (list[float], list[float]):
+    """Combine the contours of sibling subtrees placed at offsets into one contour per side"""
+    left = list()
+    right = list()
+    for offset, (child_left, child_right) in zip(offsets, contours):
+        for depth in range(len(left), len(child_left)):
+            left.append(offset + child_left[depth])
+        for depth, value in enumerate(child_right):
+            if depth < len(right):
+                right[depth] = offset + value
+            else:
+                right.append(offset + value)
+    return left, right
+
+
+def place_children(contours: list[tuple[list[float], list[float]]], distance: float = 1.) -> list[float]:
+    """Pack sibling subtrees from left to right based on their cached contours (same spacing rules as buchheim)"""
+
+    def spread(owner: int, index: int, shift: float) -> None:
+        # move smaller subtrees between owner and index evenly like move_subtree does
+        moves = {k: shift * (k - owner) / (index - owner) for k in range(owner + 1, index)}
+        for k, move in moves.items():
+            positions[k] += move
+        for entry in right_contour:
+            entry[0] += moves.get(entry[1], 0.)
+
+    positions: list[float] = list()
+    right_contour: list[list[float, int]] = list()  # [x, index of owning sibling] per depth
+
+    for index, (left, right) in enumerate(contours):
+        x = positions[-1] + distance if positions else 0.
+        for depth in range(min(len(left), len(right_contour))):
+            gap = right_contour[depth][0] + distance - (x + left[depth])
+            if gap > 0:
+                x += gap
+                spread(right_contour[depth][1], index, gap)
+        positions.append(x)
+
+        for depth, value in enumerate(right):
+            if depth < len(right_contour):
+                right_contour[depth] = [x + value, index]
+            else:
+                right_contour.append([x + value, index])
+
+    return positions
+
+
 class MainView(QGraphicsView):
     def __init__(self,graph_window:GraphWindow) -> None:
         super(MainView, self).__init__()
@@ -396,21 +444,13 @@ class PopUp(QWidget):
                 node.setX(pos.x())
                 add_children(node)
 
-        def get_children(obj:classes.Object) -> None:
-            for child in obj.aggregates_to:
-                child_names.append(item_to_name(child))
-                get_children(child)
-
         text = self.combo_box.currentText()
         obj = self.graph_window.object_dict.get(text)
 
         if obj is None:
             return  #ToDo: Add Error Message
 
-        child_names = list()
-        get_children(obj)
-
-        if item_to_name(self.clicked_node) in child_names:
+        if aggregation.get_graph().creates_cycle(self.clicked_node.object, obj):
             popups.msg_recursion()
         else:
 
@@ -424,6 +464,7 @@ class PopUp(QWidget):
             pos.setY(node.y())
             add_children(node)
             self.clicked_node.graph_window.update_combo_list()
+            self.graph_window.relayout(self.scene.root_node)
 
         self.scene.removeItem(self.parent())
         self.deleteLater()
@@ -465,8 +506,10 @@ class Node(QGraphicsProxyWidget):
         self.parent_box = None
         self.main_window = graph_window.main_window
         self.app = self.main_window.app
-        self.children: Set[Node] = set()
+        self.children: dict[Node, None] = dict()  # ordered set, the layout packs siblings in this order
         self.connections: List[Connection] = list()
+        self.contour: tuple[list[float], list[float]] | None = None  # cached layout of subtree relative to self
+        self.offset = 0.  # x position relative to parent_box in layout units
         self.show()
         self.rect.show()
         # self.proxy = Proxy(self)
@@ -515,13 +558,14 @@ class Node(QGraphicsProxyWidget):
         return PopUp(self, relative_origin)
 
     def add_child(self, child: Node, connect=True) -> Node:
-        self.children.add(child)
+        self.children[child] = None
         child.parent_box = self
         if connect:
             self.connect_to_node(child)
 
         child_obj = child.object
         self.object.add_aggregation(child_obj)
+        self.invalidate_layout()
 
         return child
 
@@ -538,14 +582,14 @@ class Node(QGraphicsProxyWidget):
 
     def remove_child(self,child:Node) -> None:
 
-        self.children.remove(child)
+        del self.children[child]
         self._registry.remove(child)
-        for item in child.children.copy():
+        for item in list(child.children):
             child.remove_child(item)
 
         self.object.remove_aggregation(child.object)
         self.scene().removeItem(child)
-
+        self.invalidate_layout()
 
 
     def delete_clicked(self):
@@ -567,10 +611,19 @@ class Node(QGraphicsProxyWidget):
             if self.is_root:
                 self.graph_window.clear_scene(self.scene())
             else:
+                root = self.scene().root_node
                 self.parent_box.remove_child(self)
+                self.graph_window.relayout(root)
+
+    def invalidate_layout(self) -> None:
+        """Drop the cached contour of this Node and its parents so the next relayout recomputes them"""
+        node = self
+        while node is not None and node.contour is not None:
+            node.contour = None
+            node = node.parent_box
 
     def remove_all_children(self) -> None:
-        for child in self.children.copy():
+        for child in list(self.children):
                 self.remove_child(child)
 
     def select_list_item(self,selected_item):
@@ -701,6 +754,8 @@ class GraphWindow(QWidget):
         self.nodes: list[Node] = list()
         self.scenes: list[GraphScene] = list()
         self.drawn_scenes: list[GraphScene] = list()
+        self.move_animation: QVariantAnimation | None = None
+        self.moves: list[tuple[Node, QPointF, QPointF]] = list()
         if show:
             self.show()
 
@@ -830,15 +885,17 @@ class GraphWindow(QWidget):
         def create_nodes() -> None:
             """create Nodes and add them to Scenes"""
 
-            def iterate_nodes(children: list[classes.Object], parent: Node, level: int) -> None:
-                """ Recursivly Add ChildNodes to Node"""
+            def iterate_nodes(children: list[classes.Object], parent: Node, level: int, path: set[classes.Object]) -> None:
+                """ Recursivly Add ChildNodes to Node, Objects already in path would lead to an endless cycle"""
 
                 for obj in children:
+                    if obj in path:
+                        continue
                     node = Node(obj, self,parent.scene())
                     self.nodes.append(node)
                     parent.add_child(node)
                     node.setY(node.base_y)
-                    iterate_nodes(obj.aggregates_to, node, level + 1)
+                    iterate_nodes(obj.aggregates_to, node, level + 1, path | {obj})
 
             for obj in self.root_objects:
                 scene = GraphScene(obj,self)
@@ -846,7 +903,7 @@ class GraphWindow(QWidget):
                 self.scenes.append(scene)
                 self.nodes.append(node)
                 scene.addItem(node)
-                iterate_nodes(obj.aggregates_to, node, 1)
+                iterate_nodes(obj.aggregates_to, node, 1, {obj})
 
         create_nodes()
         self.update_combo_list()
@@ -859,7 +916,7 @@ class GraphWindow(QWidget):
                 x = draw_child.x * (constants.BOX_WIDHT + constants.BOX_MARGIN)
                 child.setX(x)
                 child.setY(child.base_y)
-                if child not in root.scene().items():
+                if child.scene() is not root.scene():
                     root.scene().addItem(child)
                     for connection in child.connections:
                         connection.add_to_scene(root.scene())
@@ -867,9 +924,16 @@ class GraphWindow(QWidget):
                 iter_x_pos(child, draw_child)
 
 
-        self.active_scene = root.scene()
-
+        def seed_layout(node: Node) -> None:  # cache contours of the buchheim result for relayout
+            children = list(node.children)
+            for child in children:
+                seed_layout(child)
+                child.offset = (child.x() - node.x()) / (constants.BOX_WIDHT + constants.BOX_MARGIN)
+            left, right = merge_contours([child.offset for child in children], [child.contour for child in children])
+            node.contour = ([0.] + left, [0.] + right)
 
+        self.finish_moves()
+        self.active_scene = root.scene()
 
         draw_tree = DrawTree(root)
         draw_tree = buchheim(draw_tree)
@@ -878,11 +942,81 @@ class GraphWindow(QWidget):
         root.setY(root.base_y)
         root.show()
         iter_x_pos(root, draw_tree)
+        seed_layout(root)
         self.fit_in()
         for node in root.scene().items():
             if isinstance(node,Connection):
                 node.update_line()
 
+    def relayout(self, root: Node) -> None:
+        """Recompute only invalidated subtrees and the shifts of their parents, then animate all moved Nodes at once"""
+
+        def layout(node: Node) -> None:
+            children = list(node.children)
+            for child in children:
+                if child.contour is None:
+                    layout(child)
+
+            relaid.add(node)
+            positions = place_children([child.contour for child in children])
+            mid = (positions[0] + positions[-1]) / 2 if positions else 0.
+            for child, x in zip(children, positions):
+                child.offset = x - mid
+            left, right = merge_contours([child.offset for child in children], [child.contour for child in children])
+            node.contour = ([0.] + left, [0.] + right)
+
+        def collect_moves(node: Node, x: float, level: int) -> None:
+            target = QPointF(x * unit, level * (constants.BOX_HEIGHT + constants.BOX_MARGIN))
+            moved = node.pos() != target
+            if moved:
+                self.moves.append((node, node.pos(), target))
+            if moved or node in relaid:  # untouched subtrees keep their positions
+                for child in node.children:
+                    collect_moves(child, x + child.offset, level + 1)
+
+        self.finish_moves()
+        unit = constants.BOX_WIDHT + constants.BOX_MARGIN
+        relaid: set[Node] = set()
+        if root.contour is None:
+            layout(root)
+        collect_moves(root, root.x() / unit, 0)
+
+        for node, start, target in self.moves:
+            if node.scene() is None:
+                root.scene().addItem(node)
+                for connection in node.connections:
+                    connection.add_to_scene(root.scene())
+            node.show()
+
+        if len(self.moves) > constants.MAX_ANIMATED_NODES:
+            self.finish_moves()
+            self.fit_in()
+            return
+
+        self.move_animation = QVariantAnimation(self)
+        self.move_animation.setStartValue(0.)
+        self.move_animation.setEndValue(1.)
+        self.move_animation.setDuration(constants.MOVE_ANIMATION_DURATION)
+        self.move_animation.valueChanged.connect(self.step_moves)
+        self.move_animation.finished.connect(self.finish_moves)
+        self.move_animation.finished.connect(self.fit_in)
+        self.move_animation.start()
+
+    def step_moves(self, progress: float) -> None:
+        for node, start, target in self.moves:
+            node.setX(start.x() + (target.x() - start.x()) * progress)
+            node.setY(start.y() + (target.y() - start.y()) * progress)
+
+    def finish_moves(self) -> None:
+        """Stop a running move animation and put all Nodes on their target positions"""
+        if self.move_animation is not None:
+            self.move_animation.valueChanged.disconnect(self.step_moves)
+            self.move_animation.stop()
+            self.move_animation.deleteLater()
+            self.move_animation = None
+        self.step_moves(1.)
+        self.moves = list()
+
     def fit_in(self) -> None:
         if self.active_scene is None:
             return
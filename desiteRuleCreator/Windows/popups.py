@@ -162,7 +162,7 @@ def msg_del_items(string_list):
 def req_boq_pset(main_window,words):
     input_dialog = QInputDialog(main_window)
     input_dialog.setWindowTitle("Bill of Quantities")
-    input_dialog.setLabelText("BoQ PropertySet Name")
+    input_dialog.setLabelText("BoQ PropertySet Names (comma separated, * for all)")
     input_dialog.setTextValue("BoQ")
     line_edit:QLineEdit = input_dialog.findChild(QLineEdit)
 
@@ -170,6 +170,45 @@ def req_boq_pset(main_window,words):
     line_edit.setCompleter(completer)
     ok = input_dialog.exec()
     if ok ==1:
-        return True,input_dialog.textValue()
+        text = input_dialog.textValue().strip()
+        if text == "*":
+            return True,None
+        return True,[name.strip() for name in text.split(",") if name.strip()]
     else:
-        return False,None
\ No newline at end of file
+        return False,None
+
+
+def msg_merge_conflicts(conflicts):
+    icon = icons.get_icon()
+    msg_box = QMessageBox()
+    msg_box.setText(f"Merge finished with {len(conflicts)} conflict(s), the local values were kept.")
+    msg_box.setDetailedText("\n".join(str(conflict) for conflict in conflicts))
+    msg_box.setWindowTitle("Merge")
+    msg_box.setIcon(QMessageBox.Icon.Warning)
+    msg_box.setWindowIcon(icon)
+    msg_box.exec()
+
+
+def msg_differences(differences):
+    icon = icons.get_icon()
+    msg_box = QMessageBox()
+    if differences:
+        msg_box.setText(f"{len(differences)} difference(s) found.")
+        msg_box.setDetailedText("\n".join(str(difference) for difference in differences))
+    else:
+        msg_box.setText("No differences found.")
+    msg_box.setWindowTitle("Compare")
+    msg_box.setIcon(QMessageBox.Icon.Information)
+    msg_box.setWindowIcon(icon)
+    msg_box.exec()
+
+
+def msg_check_results(counts, path):
+    icon = icons.get_icon()
+    msg_box = QMessageBox()
+    msg_box.setText(", ".join(f"{count} {state}" for state, count in counts.items()))
+    msg_box.setInformativeText(f"Results written to {path}")
+    msg_box.setWindowTitle("Check Property Dump")
+    msg_box.setIcon(QMessageBox.Icon.Information)
+    msg_box.setWindowIcon(icon)
+    msg_box.exec()
@@ -3,12 +3,12 @@ import os
 
 from PySide6 import QtWidgets, QtGui
 from PySide6.QtCore import QModelIndex, Qt
-from PySide6.QtWidgets import QTableWidgetItem, QHBoxLayout, QLineEdit, QMessageBox, QMenu,QTableWidgetItem
+from PySide6.QtWidgets import QHBoxLayout, QLineEdit, QMessageBox, QMenu, QTableView
 
 from desiteRuleCreator import icons
 from desiteRuleCreator.QtDesigns import ui_widget,ui_mainwindow
 from desiteRuleCreator.Windows import popups
-from desiteRuleCreator.data import constants,classes
+from desiteRuleCreator.data import constants,classes, undo
 from desiteRuleCreator.data.classes import PropertySet, Attribute
 from desiteRuleCreator import icons
 
@@ -31,10 +31,12 @@ class PropertySetWindow(QtWidgets.QWidget):
         self.mainWindow = main_window
         self.property_set = property_set
         self.active_object = active_object
+        self.attribute_model = classes.AttributeModel(self)
+        self.widget.table_widget.setModel(self.attribute_model)
         fill_attribute_table(self.active_object,self.widget.table_widget,self.property_set)
         self.widget.button_add_line.clicked.connect(self.new_line)
         self.input_lines = {self.widget.layout_input: self.widget.lineEdit_input}
-        self.widget.table_widget.itemClicked.connect(self.list_clicked)
+        self.widget.table_widget.clicked.connect(self.list_clicked)
         self.widget.combo_type.currentTextChanged.connect(self.combo_change)
         self.old_state = self.widget.combo_type.currentText()
         self.widget.lineEdit_name.textChanged.connect(self.text_changed)
@@ -52,39 +54,33 @@ class PropertySetWindow(QtWidgets.QWidget):
 
 
 
+    def selected_attributes(self) -> list[Attribute]:
+        indexes = self.widget.table_widget.selectionModel().selectedRows(0)
+        return [self.attribute_model.attribute_of(index) for index in indexes]
+
     def delete_selection(self):
-        selected_items = self.widget.table_widget.selectedItems()
-
-        string_list = list()
-
-        selected_rows = []
-        for items in selected_items:
-            row = items.row()
-            if row not in selected_rows:
-                name = self.widget.table_widget.item(row, 0).text()
-                string_list.append(name)
-                if attribute_is_identifier(self.active_object,self.get_attribute_by_name(name)):
-                    popups.msg_mod_ident()
-                    return
-                else:
-                    selected_rows.append(items.row())
+        attributes = self.selected_attributes()
 
+        for attribute in attributes:
+            if attribute_is_identifier(self.active_object,attribute):
+                popups.msg_mod_ident()
+                return
 
+        string_list = [attribute.name for attribute in attributes]
         delete_request = popups.msg_del_items(string_list)
 
         if delete_request:
-
-            selected_rows.sort(reverse=True)
-
-
-
-            for row in selected_rows:
-                name = self.widget.table_widget.item(row, 0).text()
-                self.widget.table_widget.removeRow(row)
-                attribute = self.get_attribute_by_name(name)
-                attribute.delete()
-
-            pass
+            with self.mainWindow.undo_stack.record("Delete Attribute"):
+                for attribute in attributes:
+                    self.remove_attribute(attribute)
+
+    def remove_attribute(self, attribute: Attribute):
+        """ removes attribute and the Attributes inheriting from it as one undo step"""
+        changes = [undo.AttributeRemoved(item) for item in reversed(undo.with_descendants(attribute))]
+        self.attribute_model.remove_attribute(attribute)
+        with self.mainWindow.undo_stack.record("Delete Attribute"):
+            for change in changes:
+                self.mainWindow.undo_stack.push(change)
 
     def open_menu(self, position):
         menu = QMenu()
@@ -102,35 +98,24 @@ class PropertySetWindow(QtWidgets.QWidget):
         return False
 
     def rename_selection(self):  # TODO: check for existing Name
-        selected_items = self.widget.table_widget.selectedItems()
-        selected_rows = []
-        for items in selected_items:
-            row = items.row()
-            if row not in selected_rows:
-                name = self.widget.table_widget.item(row, 0).text()
-                if attribute_is_identifier(self.active_object,self.get_attribute_by_name(name)):
-                    popups.msg_mod_ident()
-                    return
-                else:
-                    selected_rows.append(items.row())
-
-        selected_rows.sort(reverse=True)
+        attributes = self.selected_attributes()
+        for attribute in attributes:
+            if attribute_is_identifier(self.active_object,attribute):
+                popups.msg_mod_ident()
+                return
 
-        if len(selected_rows) == 1:
+        if len(attributes) == 1:
             new_name, fulfilled = popups.req_new_name(self)
             if fulfilled:
-                name = self.widget.table_widget.item(row, 0).text()
-                attribute: Attribute = self.get_attribute_by_name(name)
-                attribute.name = new_name
-                self.widget.table_widget.item(row, 0).setText(new_name)
+                attribute: Attribute = attributes[0]
+                self.mainWindow.undo_stack.apply(undo.NameChange(attribute, new_name), "Rename Attribute")
+                self.attribute_model.attribute_changed(attribute)
 
     def delete_attribute(self):
 
         attribute: Attribute = self.get_attribute_by_name(self.widget.lineEdit_name.text())
         if attribute:
-            attribute.delete()
-            row = self.widget.table_widget.findItems(attribute.name, Qt.MatchFlag.MatchExactly)[0].row()
-            self.widget.table_widget.removeRow(row)
+            self.remove_attribute(attribute)
 
         self.clear_lines()
 
@@ -156,20 +141,6 @@ class PropertySetWindow(QtWidgets.QWidget):
             self.widget.button_add.setText("Add")
 
     def add_button_pressed(self):
-        def fill_table_line(row, attribute: Attribute):
-            table = self.widget.table_widget
-            table.item(row, 0).setText(attribute.name)
-            table.item(row, 1).setText(attribute.data_type)
-            table.item(row, 2).setText(constants.VALUE_TYPE_LOOKUP[attribute.value_type])
-            table.item(row, 3).setText(str(attribute.value))
-
-        def add_table_line(row, attribute: Attribute):
-            table = self.widget.table_widget
-            table.setItem(row, 0, QTableWidgetItem(attribute.name))
-            table.setItem(row, 1, QTableWidgetItem(attribute.data_type))
-            table.setItem(row, 2, QTableWidgetItem(constants.VALUE_TYPE_LOOKUP[attribute.value_type]))
-            table.setItem(row, 3, QTableWidgetItem(str(attribute.value)))
-
         def get_values():
             values = []
 
@@ -208,11 +179,9 @@ class PropertySetWindow(QtWidgets.QWidget):
                 attribute.data_type = self.widget.combo_data_type.currentText()
                 attribute.child_inherits_values = self.widget.check_box_inherit.isChecked()
             values = get_values()
-            attribute.value = values
-
-            item: QTableWidgetItem = self.widget.table_widget.findItems(attribute.name, Qt.MatchFlag.MatchExactly)[0]
-            row = item.row()
-            fill_table_line(row, attribute)
+            change = undo.ValueChange(attribute, Attribute.normalize_value(values))
+            self.mainWindow.undo_stack.apply(change, "Edit Attribute")
+            self.attribute_model.attribute_changed(attribute)
             return attribute
         def add_attribute():
             name = self.widget.lineEdit_name.text()
@@ -222,11 +191,11 @@ class PropertySetWindow(QtWidgets.QWidget):
                 value_type = self.widget.combo_type.currentText()
                 data_type = self.widget.combo_data_type.currentText()
 
-                attribute = Attribute(self.property_set, name, values, value_type, data_type)
+                attribute = self.attribute_model.add_attribute(name, values, value_type, data_type)
                 attribute.child_inherits_values = self.widget.check_box_inherit.isChecked()
-                rows = self.widget.table_widget.rowCount() + 1
-                self.widget.table_widget.setRowCount(rows)
-                add_table_line(rows - 1, attribute)
+                with self.mainWindow.undo_stack.record("Add Attribute"):
+                    for item in undo.with_descendants(attribute):
+                        self.mainWindow.undo_stack.push(undo.AttributeAdded(item))
                 return attribute
             else:
                 popups.msg_missing_input()
@@ -319,10 +288,9 @@ class PropertySetWindow(QtWidgets.QWidget):
                 items.setText("")
         self.widget.layout_input.addWidget(self.widget.button_add_line)
 
-    def list_clicked(self, tree_item:QTableWidgetItem|classes.CustomTableItem ):
+    def list_clicked(self, index: QModelIndex):
 
-        item: QTableWidgetItem = self.widget.table_widget.item(tree_item.row(), 0)
-        attribute: Attribute = self.get_attribute_by_name(item.text())
+        attribute: Attribute = self.attribute_model.attribute_of(index)
         # if attribute_is_identifier(self.active_object,attribute):
         #     popups.msg_mod_ident()
         #     return
@@ -349,35 +317,10 @@ class PropertySetWindow(QtWidgets.QWidget):
         # set Editable
         self.widget.check_box_inherit.setChecked(attribute.child_inherits_values)
 
-def fill_attribute_table(active_object,table_widget,property_set):
-    def reformat_identifier(row):
-        brush = QtGui.QBrush()
-        brush.setColor(Qt.GlobalColor.lightGray)
-        brush.setStyle(Qt.BrushStyle.SolidPattern)
-        for column in range(4):
-            item = table_widget.item(row, column)
-            item.setBackground(brush)
-
-    table_widget.setRowCount(len(property_set.attributes))
-
-    link_item = icons.get_link_icon()
-
-    for i, attribute in enumerate(property_set.attributes):
-        attribute: Attribute = attribute
-        value_item = classes.CustomTableItem(attribute)
-        value_item.setText(attribute.name)
-
-        if attribute.is_child:
-            value_item.setIcon(link_item)
-        table_widget.setItem(i, 0, value_item)
-        table_widget.setItem(i, 1, QTableWidgetItem(attribute.data_type))
-        table_widget.setItem(i, 2, QTableWidgetItem(constants.VALUE_TYPE_LOOKUP[attribute.value_type]))
-        table_widget.setItem(i, 3, QTableWidgetItem(str(attribute.value)))
-
-        if attribute_is_identifier(active_object,attribute):
-            reformat_identifier(i)
-
-        table_widget.resizeColumnsToContents()
+def fill_attribute_table(active_object,table_view:QTableView,property_set):
+    model: classes.AttributeModel = table_view.model()
+    model.set_property_set(property_set, active_object)
+    table_view.resizeColumnsToContents()
 
 def attribute_is_identifier(active_object, attribute):
     if active_object is not None:
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+from desiteRuleCreator.data import classes
+
+
+class AggregationGraph(object):
+    """ Precomputed view on Object.aggregates_to / Object.aggregates_from
+
+    Strongly connected components are found with Tarjan's algorithm. The condensation is a DAG which is walked
+    once in topological order to store the transitive closure per component as a bitset, so reachability queries
+    are O(1). The Object sets for a query are built on first access and cached.
+    """
+
+    def __init__(self, objects: Iterable[classes.Object]) -> None:
+        self.objects: list[classes.Object] = list(objects)
+        self.components: list[list[classes.Object]] = tarjan(self.objects)
+        self.component_of: dict[classes.Object, int] = {obj: index for index, component in
+                                                        enumerate(self.components) for obj in component}
+        self._descendant_bits: list[int] = list()
+        self._ancestor_bits: list[int] = list()
+        self._descendants: dict[int, frozenset[classes.Object]] = dict()
+        self._ancestors: dict[int, frozenset[classes.Object]] = dict()
+        self.build_closure()
+
+    def build_closure(self) -> None:
+        def closure(order: Iterable[int], direction: str) -> list[int]:
+            result = [0] * len(self.components)
+            for index in order:
+                bits = 1 << index if self.is_cyclic(index) else 0
+                for obj in self.components[index]:
+                    for item in getattr(obj, direction):
+                        item_index = self.component_of.get(item)
+                        if item_index is not None and item_index != index:
+                            bits |= (1 << item_index) | result[item_index]
+                result[index] = bits
+            return result
+
+        # tarjan returns components in reverse topological order (sinks first)
+        order = range(len(self.components))
+        self._descendant_bits = closure(order, "aggregates_to")
+        self._ancestor_bits = closure(reversed(order), "aggregates_from")
+
+    def objects_of(self, bits: int) -> frozenset[classes.Object]:
+        objects = set()
+        for index, bit in enumerate(reversed(bin(bits)[2:])):
+            if bit == "1":
+                objects.update(self.components[index])
+        return frozenset(objects)
+
+    def is_cyclic(self, index: int) -> bool:
+        component = self.components[index]
+        return len(component) > 1 or component[0] in component[0].aggregates_to
+
+    @property
+    def cycles(self) -> list[list[classes.Object]]:
+        return [component for index, component in enumerate(self.components) if self.is_cyclic(index)]
+
+    def descendants(self, obj: classes.Object) -> frozenset[classes.Object]:
+        """all Objects that obj aggregates directly or indirectly"""
+        index = self.component_of.get(obj)
+        if index is None:
+            return frozenset()
+        if index not in self._descendants:
+            self._descendants[index] = self.objects_of(self._descendant_bits[index])
+        return self._descendants[index]
+
+    def ancestors(self, obj: classes.Object) -> frozenset[classes.Object]:
+        """all Objects that aggregate obj directly or indirectly"""
+        index = self.component_of.get(obj)
+        if index is None:
+            return frozenset()
+        if index not in self._ancestors:
+            self._ancestors[index] = self.objects_of(self._ancestor_bits[index])
+        return self._ancestors[index]
+
+    def is_reachable(self, start: classes.Object, target: classes.Object) -> bool:
+        start_index = self.component_of.get(start)
+        target_index = self.component_of.get(target)
+        if start_index is None or target_index is None:
+            return False
+        return bool(self._descendant_bits[start_index] >> target_index & 1)
+
+    def creates_cycle(self, parent: classes.Object, child: classes.Object) -> bool:
+        """check if parent.add_aggregation(child) would close a cycle"""
+        return parent == child or self.is_reachable(child, parent)
+
+
+def tarjan(objects: Iterable[classes.Object]) -> list[list[classes.Object]]:
+    """ Iterative Tarjan SCC, components are returned in reverse topological order"""
+    index_dict: dict[classes.Object, int] = dict()
+    low_link: dict[classes.Object, int] = dict()
+    on_stack: set[classes.Object] = set()
+    stack: list[classes.Object] = list()
+    components: list[list[classes.Object]] = list()
+    counter = 0
+
+    for start in objects:
+        if start in index_dict:
+            continue
+
+        work = [(start, iter(start.aggregates_to))]
+        index_dict[start] = low_link[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+
+        while work:
+            obj, children = work[-1]
+            for child in children:
+                if child not in index_dict:
+                    index_dict[child] = low_link[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(child.aggregates_to)))
+                    break
+                elif child in on_stack:
+                    low_link[obj] = min(low_link[obj], index_dict[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[obj])
+
+                if low_link[obj] == index_dict[obj]:
+                    component = list()
+                    while True:
+                        item = stack.pop()
+                        on_stack.remove(item)
+                        component.append(item)
+                        if item == obj:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def get_graph() -> AggregationGraph:
+    """returns the cached AggregationGraph of all Objects, it gets rebuilt after aggregations changed"""
+    if classes.Object.aggregation_graph is None:
+        classes.Object.aggregation_graph = AggregationGraph(classes.Object)
+    return classes.Object.aggregation_graph
+
+
+def report_cycles() -> list[list[classes.Object]]:
+    cycles = get_graph().cycles
+    for cycle in cycles:
+        names = ", ".join(obj.name for obj in cycle)
+        logging.error(f"Aggregation: Zyklus gefunden [{names}]")
+    return cycles
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from desiteRuleCreator.data import classes, undo
+
+
+class BulkEdit(object):
+    """ Transaction for changing many Objects at once
+
+    Changes are only recorded until commit(), which runs automatically at the end of a with block. Values get
+    normalized once per call instead of once per Attribute, renames are applied to the topmost item of each
+    inheritance subtree only (Hirarchy.name passes them on to the children) and the ObjectModel is refreshed
+    with a single signal at the end. With an UndoStack the whole commit becomes one undo step.
+
+        with BulkEdit(main_window.object_model) as edit:
+            edit.rename_objects(objects, "Wand")
+            edit.set_attribute_value(objects, "Allgemein", "Material", ["Beton"])
+    """
+
+    def __init__(self, model: classes.ObjectModel = None, undo_stack: undo.UndoStack = None,
+                 text: str = "Bulk Edit") -> None:
+        self.model = model
+        self.undo_stack = undo_stack
+        self.text = text
+        self.created_property_sets: list[classes.PropertySet] = list()
+        self._names: dict[classes.Hirarchy, str] = dict()
+        self._values: dict[classes.Attribute, list] = dict()
+        self._new_property_sets: list[tuple[classes.Object, str, classes.PropertySet | None]] = list()
+        self._removed_property_sets: dict[classes.PropertySet, classes.Object] = dict()
+        self._parents: dict[classes.Object, classes.Object | None] = dict()
+        self._fields: dict[tuple[object, str], object] = dict()
+        self._aggregations: dict[tuple[classes.Object, classes.Object], bool] = dict()
+        self._factories: list[Callable[[], list[undo.Change]]] = list()
+        self._removed: list[classes.Attribute | classes.Object] = list()  # removed after all other changes
+
+    def __enter__(self) -> BulkEdit:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        return False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self._names or self._values or self._new_property_sets or self._removed_property_sets
+                    or self._parents or self._fields or self._aggregations or self._factories or self._removed)
+
+    # recording
+
+    def rename_objects(self, objects: Iterable[classes.Object], name: str) -> None:
+        for obj in objects:
+            self._names[obj] = name
+
+    def rename(self, item: classes.Hirarchy, name: str) -> None:
+        self._names[item] = name
+
+    def set_value(self, attribute: classes.Attribute, value: list) -> None:
+        self._values[attribute] = classes.Attribute.normalize_value(value)
+
+    def set_field(self, item, field: str, value) -> None:
+        """ any other property, e.g. Attribute.data_type or Script.code"""
+        self._fields[(item, field)] = value
+
+    def set_aggregation(self, obj: classes.Object, child: classes.Object, aggregated: bool) -> None:
+        self._aggregations[(obj, child)] = aggregated
+
+    def create(self, factory: Callable[[], list[undo.Change]]) -> None:
+        """ factory runs during commit, it creates new items and returns the already applied Changes"""
+        self._factories.append(factory)
+
+    def remove(self, item: classes.Attribute | classes.PropertySet | classes.Object) -> None:
+        """ Attributes without inheriting children, PropertySets of Objects or Objects without children and
+        aggregations"""
+        if isinstance(item, classes.PropertySet):
+            self._removed_property_sets[item] = item.object
+        else:
+            self._removed.append(item)
+
+    def set_identifier(self, objects: Iterable[classes.Object], property_set_name: str = None,
+                       attribute_name: str = None, value: list = None) -> None:
+        """ None keeps the current text, concepts have no identifier and are skipped"""
+        if value is not None:
+            value = classes.Attribute.normalize_value(value)
+        for obj in objects:
+            if obj.is_concept:
+                continue
+            ident: classes.Attribute = obj.ident_attrib
+            if property_set_name is not None:
+                self._names[ident.property_set] = property_set_name
+            if attribute_name is not None:
+                self._names[ident] = attribute_name
+            if value is not None:
+                self._values[ident] = value
+
+    def set_attribute_value(self, objects: Iterable[classes.Object], property_set_name: str, attribute_name: str,
+                            value: list) -> int:
+        """ returns the number of Objects that own the Attribute"""
+        value = classes.Attribute.normalize_value(value)
+        count = 0
+        for obj in objects:
+            property_set = obj.get_property_set_by_name(property_set_name)
+            if property_set is None:
+                continue
+            attribute = property_set.get_attribute_by_name(attribute_name)
+            if attribute is not None:
+                self._values[attribute] = value
+                count += 1
+        return count
+
+    def rename_property_set(self, objects: Iterable[classes.Object], old_name: str, new_name: str) -> None:
+        for obj in objects:
+            property_set = obj.get_property_set_by_name(old_name)
+            if property_set is not None:
+                self._names[property_set] = new_name
+
+    def add_property_set(self, objects: Iterable[classes.Object], name: str,
+                         parent: classes.PropertySet = None) -> None:
+        for obj in objects:
+            if obj.get_property_set_by_name(name) is None:
+                self._new_property_sets.append((obj, name, parent))
+
+    def remove_property_set(self, objects: Iterable[classes.Object], name: str) -> None:
+        for obj in objects:
+            property_set = obj.get_property_set_by_name(name)
+            if property_set is not None and (obj.is_concept or property_set != obj.ident_attrib.property_set):
+                self._removed_property_sets[property_set] = obj
+
+    def set_parent(self, objects: Iterable[classes.Object], parent: classes.Object | None) -> None:
+        for obj in objects:
+            if not classes.ObjectModel.is_ancestor(obj, parent):
+                self._parents[obj] = parent
+
+    # applying
+
+    def apply(self, change: undo.Change) -> None:
+        if self.undo_stack is None:
+            change.redo()
+        else:
+            self.undo_stack.apply(change)
+
+    def commit(self) -> None:
+        if self.undo_stack is None:
+            self.apply_changes()
+        else:
+            with self.undo_stack.record(self.text):
+                self.apply_changes()
+
+    def apply_changes(self) -> None:
+        layout_changes = self.model is not None and bool(self._parents or self._names or self._factories
+                                                         or self._removed)
+        if layout_changes:
+            self.model.begin_layout_change()  # renamed rows may move because of the sorting
+
+        for property_set, obj in self._removed_property_sets.items():
+            self.apply(undo.PropertySetRemoved(obj, property_set))
+
+        self.created_property_sets = list()
+        for obj, name, parent in self._new_property_sets:
+            property_set = classes.PropertySet(name)
+            if parent is not None:
+                parent.add_child(property_set)
+            obj.add_property_set(property_set)
+            self.created_property_sets.append(property_set)
+            if self.undo_stack is not None:
+                self.undo_stack.push(undo.PropertySetAdded(obj, property_set))
+
+        for factory in self._factories:
+            for change in factory():
+                if self.undo_stack is not None:
+                    self.undo_stack.push(change)
+
+        for item in subtree_roots(self._names):
+            self.apply(undo.NameChange(item, self._names[item]))
+
+        for attribute, value in self._values.items():
+            self.apply(undo.ValueChange(attribute, list(value)))
+
+        for obj, parent in self._parents.items():
+            if obj.parent == parent or classes.ObjectModel.is_ancestor(obj, parent):
+                continue
+            self.apply(undo.ParentChange(obj, obj.parent, parent))
+
+        for (item, field), value in self._fields.items():
+            if getattr(item, field) != value:
+                self.apply(undo.FieldChange(item, field, value))
+
+        for (obj, child), aggregated in self._aggregations.items():
+            if (child in obj.aggregates_to) != aggregated:
+                self.apply(undo.AggregationChange(obj, child, aggregated))
+
+        for item in self._removed:
+            if isinstance(item, classes.Attribute):
+                self.apply(undo.AttributeRemoved(item))
+            else:
+                self.apply(undo.ObjectRemoved(item))
+
+        if layout_changes:
+            self.model.end_layout_change()
+        elif self.model is not None and not self.is_empty:
+            self.model.refresh()
+
+        self._names = dict()
+        self._values = dict()
+        self._new_property_sets = list()
+        self._removed_property_sets = dict()
+        self._parents = dict()
+        self._fields = dict()
+        self._aggregations = dict()
+        self._factories = list()
+        self._removed = list()
+
+
+def subtree_roots(names: dict[classes.Hirarchy, str]) -> list[classes.Hirarchy]:
+    """ items whose parents don't get the same name anyway"""
+    roots = list()
+    for item, name in names.items():
+        parent = item.parent
+        while parent is not None and names.get(parent) != name:
+            parent = parent.parent
+        if parent is None:
+            roots.append(item)
+    return roots
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import copy
-from typing import Iterator, Type,TYPE_CHECKING
+import bisect
+import weakref
+from typing import Callable, Iterator, Type,TYPE_CHECKING
 from uuid import uuid4
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QDropEvent
-from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem, QAbstractItemView, QListWidgetItem,QTableWidgetItem
+from PySide6.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex, QMimeData, QByteArray, \
+    QSortFilterProxyModel, QStringListModel, Signal
+from PySide6.QtGui import QBrush
+from PySide6.QtWidgets import QTreeView, QListWidgetItem
+
+from desiteRuleCreator import icons
+from desiteRuleCreator.data import constants
 
 if TYPE_CHECKING:
     from desiteRuleCreator.Windows import graphs_window
@@ -90,6 +96,7 @@ class Project(object):
 
 
 class Hirarchy(object, metaclass=IterRegistry):
+    observers: list[Callable[[Hirarchy, bool], None]] = list()  # called after changes that affect the search index
 
     def __init__(self, name: str) -> None:
 
@@ -108,6 +115,7 @@ class Hirarchy(object, metaclass=IterRegistry):
         for child in self.children:
             child.name = value
         self.changed = True
+        self.notify()
 
     @property
     def parent(self) -> Type[Hirarchy]:
@@ -148,6 +156,11 @@ class Hirarchy(object, metaclass=IterRegistry):
     def delete(self) -> None:
         if self in self._registry:
             self._registry.remove(self)
+        self.notify(removed=True)
+
+    def notify(self, removed: bool = False) -> None:
+        for observer in Hirarchy.observers:
+            observer(self, removed)
 
 
 class PropertySet(Hirarchy):
@@ -162,6 +175,7 @@ class PropertySet(Hirarchy):
         if self.identifier is None:
             self.identifier = str(uuid4())
         self.changed = True
+        self.notify()
 
     @property
     def is_predefined(self) -> bool:
@@ -226,9 +240,12 @@ class PropertySet(Hirarchy):
     def add_attribute(self, value: Attribute) -> None:
         self._attributes.append(value)
         self.changed = True
+        value.notify()
         for child in self.children:
             attrib: Attribute = copy.copy(value)
             attrib.identifier = str(uuid4())
+            attrib._children = list()  # a shallow copy would share the child list and PropertySet of value
+            attrib._propertySet = child
             value.add_child(attrib)
             child.add_attribute(attrib)
 
@@ -239,6 +256,7 @@ class PropertySet(Hirarchy):
                 if attribute.parent == value:
                     child.remove_attribute(attribute)
         self.changed = True
+        value.notify(removed=True)
 
     def get_attribute_by_name(self, name: str):
         for attribute in self.attributes:
@@ -300,6 +318,7 @@ class Attribute(Hirarchy):
         self._name = value
         for child in self.children:
             child.name = value
+        self.notify()
 
     @property
     def value(self) -> list:
@@ -307,14 +326,10 @@ class Attribute(Hirarchy):
 
     @value.setter
     def value(self, value: list) -> None:
-        def can_be_changed() -> bool:
-            change_bool = True
-            if self.is_child:
-                parent: Attribute = self.parent
-                if parent.child_inherits_values:
-                    change_bool = False
-            return change_bool
+        self.assign_value(self.normalize_value(value))
 
+    @staticmethod
+    def normalize_value(value: list) -> list:
         new_value = []
 
         for el in value:
@@ -327,10 +342,22 @@ class Attribute(Hirarchy):
                     new_value.append(el)
             else:
                 new_value.append(el)
+        return new_value
+
+    def assign_value(self, value: list) -> None:
+        """ set an already normalized value"""
+        def can_be_changed() -> bool:
+            change_bool = True
+            if self.is_child:
+                parent: Attribute = self.parent
+                if parent.child_inherits_values:
+                    change_bool = False
+            return change_bool
 
         if can_be_changed():
-            self._value = new_value
+            self._value = value
             self.changed = True
+            self.notify()
 
     @property
     def value_type(self) -> int:
@@ -342,11 +369,13 @@ class Attribute(Hirarchy):
         if not self.is_child:
             self._value_type = value
             self.changed = True
+            self.notify()
 
         if self.is_parent:
             for child in self.children:
                 child._value_type = value
                 self.changed = True
+                child.notify()
 
     @property
     def data_type(self) -> str:
@@ -357,11 +386,13 @@ class Attribute(Hirarchy):
         if not self.is_child:
             self._data_type = value
             self.changed = True
+            self.notify()
 
         if self.is_parent:
             for child in self.children:
                 child._data_type = value
                 self.changed = True
+                child.notify()
 
     @property
     def property_set(self) -> PropertySet:
@@ -392,11 +423,13 @@ class Attribute(Hirarchy):
     def delete(self) -> None:
         self.property_set.remove_attribute(self)
         for child in self.children:
-            child.delete()
+            if child in child.property_set.attributes:  # remove_attribute takes most of them along already
+                child.delete()
 
 
 class Object(Hirarchy):
     _registry: list[Object] = list()
+    aggregation_graph = None  # cached aggregation.AggregationGraph, reset whenever an aggregation changes
 
     def __init__(self, name: str, ident_attrib: [Attribute, str], identifier: str = None) -> None:
         super(Object, self).__init__(name=name)
@@ -414,6 +447,7 @@ class Object(Hirarchy):
             self.identifier = str(uuid4())
         else:
             self.identifier = identifier
+        self.notify()
 
     @property
     def nodes(self) -> set[graphs_window.Node]:  # Todo: add nodes functionality to graphs_window
@@ -461,6 +495,7 @@ class Object(Hirarchy):
     def ident_attrib(self, value: Attribute) -> None:
         self._ident_attrib = value
         self.changed = True
+        self.notify()
 
     @property
     def property_sets(self) -> list[PropertySet]:
@@ -469,10 +504,12 @@ class Object(Hirarchy):
     def add_property_set(self, property_set: PropertySet) -> None:
         self._property_sets.append(property_set)
         property_set.object = self
+        property_set.notify()
 
     def remove_property_set(self, property_set: PropertySet) -> None:
         if property_set in self._property_sets:
             self._property_sets.remove(property_set)
+            property_set.notify(removed=True)
 
     def get_attributes(self, inherit: bool = False) -> list[Attribute]:
         attributes = list()
@@ -496,6 +533,7 @@ class Object(Hirarchy):
 
     def delete(self) -> None:
         super(Object, self).delete()
+        Object.aggregation_graph = None
         pset: PropertySet
         for pset in self.property_sets:
             pset.delete()
@@ -509,13 +547,23 @@ class Object(Hirarchy):
     def add_aggregation(self, value: Object) -> None:
         self.aggregates_to.add(value)
         value.aggregates_from.add(self)
+        Object.aggregation_graph = None
 
     def remove_aggregation(self, value: Object, recursion: bool = False) -> None:
         self.aggregates_to.remove(value)
         value.aggregates_from.remove(self)
+        Object.aggregation_graph = None
         if recursion:
-            for item in value.aggregates_to:
-                value.remove_aggregation(item, recursion)
+            stack = [value]
+            visited = {value}
+            while stack:
+                obj = stack.pop()
+                for item in list(obj.aggregates_to):
+                    obj.aggregates_to.remove(item)
+                    item.aggregates_from.remove(obj)
+                    if item not in visited:
+                        visited.add(item)
+                        stack.append(item)
 
 
 class Script(QListWidgetItem):
@@ -526,6 +574,7 @@ class Script(QListWidgetItem):
         self._object = obj
         obj.add_script(self)
         self._name = title
+        self.lint_error = None  # js_lint.LintError of the last syntax check
         self.setFlags(self.flags() | Qt.ItemIsEditable)
 
     @property
@@ -548,52 +597,343 @@ class Script(QListWidgetItem):
         self._name = value
         self.changed = True
 
-
-class CustomTree(QTreeWidget):
-    def __init__(self, layout) -> None:
-        super(CustomTree, self).__init__(layout)
-
-    def dropEvent(self, event: QDropEvent) -> None:
-
-        selected_items = self.selectedItems()
-        droped_on_item = self.itemFromIndex(self.indexAt(event.pos()))
-
-        if self.dropIndicatorPosition() == QAbstractItemView.DropIndicatorPosition.OnItem:
-            super(CustomTree, self).dropEvent(event)
-            parent = droped_on_item.object
-
+    def set_lint_error(self, error) -> None:
+        self.lint_error = error
+        if error is None:
+            self.setData(Qt.ForegroundRole, None)
+            self.setToolTip("")
         else:
-            super(CustomTree, self).dropEvent(event)
-            parent = droped_on_item.object.parent
+            self.setForeground(QBrush(Qt.GlobalColor.red))
+            self.setToolTip(str(error))
+
+
+class ObjectModel(QAbstractItemModel):
+    """ Item model over the Object hierarchy
+
+    Child lists are copied from Object.children the first time a parent gets expanded and are handed to the view
+    in batches of constants.TREE_FETCH_SIZE. Structural changes have to go through insert_object, move_object and
+    remove_object so only the affected rows get signalled.
+    """
+
+    HEADERS = ("Objects", "Identifier")
+    MIME_TYPE = "application/x-desiterulecreator-objects"
+    object_moved = Signal(object, object, object)  # Object, old parent, new parent
+
+    def __init__(self, parent=None) -> None:
+        super(ObjectModel, self).__init__(parent)
+        self._children: dict[Object | None, list[Object]] = dict()
+        self._rows: dict[Object | None, dict[Object, int]] = dict()
+        self._fetched: dict[Object | None, int] = dict()
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+        self._drag_objects: list[Object] = list()
+        self._layout_items = None
+
+    # helpers
+
+    @staticmethod
+    def text(obj: Object, column: int) -> str:
+        if column == 0:
+            return obj.name
+        if obj.is_concept:
+            return ""
+        return str(obj.ident_attrib.value)
+
+    def sort_key(self, obj: Object) -> str:
+        return self.text(obj, self._sort_column)
+
+    def child_list(self, parent: Object | None) -> list[Object]:
+        if parent not in self._children:
+            if parent is None:
+                children = [obj for obj in Object if obj.parent is None]
+            else:
+                children = list(dict.fromkeys(parent.children))
+            children.sort(key=self.sort_key, reverse=self._sort_order == Qt.DescendingOrder)
+            self._children[parent] = children
+            self._fetched[parent] = 0
+        return self._children[parent]
+
+    def row_of(self, obj: Object) -> int:
+        parent = obj.parent
+        if parent not in self._rows:
+            self._rows[parent] = {child: row for row, child in enumerate(self.child_list(parent))}
+        return self._rows[parent].get(obj, -1)
+
+    def is_loaded(self, obj: Object | None) -> bool:
+        """ check if the view knows about obj"""
+        while obj is not None:
+            parent = obj.parent
+            if parent not in self._children or not 0 <= self.row_of(obj) < self._fetched[parent]:
+                return False
+            obj = parent
+        return True
+
+    def index_of(self, obj: Object | None, column: int = 0) -> QModelIndex:
+        if obj is None or not self.is_loaded(obj):
+            return QModelIndex()
+        return self.createIndex(self.row_of(obj), column, obj)
+
+    def load(self, obj: Object) -> QModelIndex:
+        """ fetch the rows up to obj, so it can be selected even if its parents were never expanded"""
+        parent = obj.parent
+        parent_index = QModelIndex() if parent is None else self.load(parent)
+        row = self.row_of(obj)
+        while self._fetched[parent] <= row and self.canFetchMore(parent_index):
+            self.fetchMore(parent_index)
+        return self.index_of(obj)
+
+    @staticmethod
+    def object_of(index: QModelIndex) -> Object | None:
+        if not index.isValid():
+            return None
+        return index.internalPointer()
+
+    # QAbstractItemModel
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        parent_obj = self.object_of(parent)
+        children = self.child_list(parent_obj)
+        if not 0 <= row < self._fetched[parent_obj] or not 0 <= column < len(self.HEADERS):
+            return QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        obj = self.object_of(index)
+        if obj is None or obj.parent is None:
+            return QModelIndex()
+        return self.createIndex(self.row_of(obj.parent), 0, obj.parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        parent_obj = self.object_of(parent)
+        self.child_list(parent_obj)
+        return self._fetched[parent_obj]
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        parent_obj = self.object_of(parent)
+        if parent_obj is None:
+            return bool(self.child_list(None))
+        return parent.column() <= 0 and bool(parent_obj.children)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        parent_obj = self.object_of(parent)
+        return self._fetched.get(parent_obj, 0) < len(self.child_list(parent_obj))
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        parent_obj = self.object_of(parent)
+        children = self.child_list(parent_obj)
+        start = self._fetched[parent_obj]
+        end = min(len(children), start + constants.TREE_FETCH_SIZE)
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        self._fetched[parent_obj] = end
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        obj = self.object_of(index)
+        if obj is None:
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.text(obj, index.column())
+        return None
 
-        for el in selected_items:
-            obj = el.object
-            if parent is not None:
-                obj.parent = parent
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        self.begin_layout_change()
+        self._sort_column = column
+        self._sort_order = order
+        self.end_layout_change()
+
+    def begin_layout_change(self) -> None:
+        """ call before changing many parents or names at once, end_layout_change re-reads the child lists of
+        every loaded parent. Selection and expanded rows survive as long as their Objects are still loaded"""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        self._layout_items = (old_indexes, [(self.object_of(index), index.column()) for index in old_indexes])
+
+    def end_layout_change(self) -> None:
+        old_indexes, old_items = self._layout_items
+        self._layout_items = None
+        old_fetched = self._fetched
+        old_counts = {parent: len(children) for parent, children in self._children.items()}
+        self._children = dict()
+        self._rows = dict()
+        self._fetched = dict()
+        for parent, fetched in old_fetched.items():
+            children = self.child_list(parent)
+            if fetched and fetched >= old_counts[parent]:
+                self._fetched[parent] = len(children)  # fully fetched lists show new rows right away
             else:
-                obj.parent = None
+                self._fetched[parent] = min(fetched, len(children))
+        new_indexes = [self.index_of(obj, column) for obj, column in old_items]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
 
+    # Drag & Drop
 
-class CustomTreeItem(QTreeWidgetItem):
-    def __init__(self, tree: QTreeWidget, obj: Object) -> None:
-        super(CustomTreeItem, self).__init__(tree)
-        self._object = obj
-        self.update()
+    def supportedDropActions(self) -> Qt.DropActions:
+        return Qt.MoveAction
 
-    def addChild(self, child: QTreeWidgetItem) -> None:
-        super(CustomTreeItem, self).addChild(child)
-        self.object.add_child(child.object)
+    def supportedDragActions(self) -> Qt.DropActions:
+        return Qt.MoveAction
 
-    @property
-    def object(self) -> Object:
-        return self._object
+    def mimeTypes(self) -> list[str]:
+        return [self.MIME_TYPE]
 
-    def update(self) -> None:
-        self.setText(0, self.object.name)
-        if self.object.is_concept:
-            self.setText(1, "")
+    def mimeData(self, indexes: list[QModelIndex]) -> QMimeData:
+        objects = list(dict.fromkeys(self.object_of(index) for index in indexes if index.isValid()))
+        self._drag_objects = [obj for obj in objects if not any(self.is_ancestor(item, obj.parent) for item in objects)]
+        mime_data = QMimeData()
+        mime_data.setData(self.MIME_TYPE, QByteArray())
+        return mime_data
+
+    def dropMimeData(self, data: QMimeData, action: Qt.DropAction, row: int, column: int,
+                     parent: QModelIndex) -> bool:
+        if action != Qt.MoveAction or not data.hasFormat(self.MIME_TYPE):
+            return False
+        new_parent = self.object_of(parent)
+        objects = [obj for obj in self._drag_objects if obj.parent != new_parent
+                   and not self.is_ancestor(obj, new_parent)]
+        self._drag_objects = list()
+        for obj in objects:
+            self.move_object(obj, new_parent)
+        return bool(objects)
+
+    @staticmethod
+    def is_ancestor(obj: Object, item: Object | None) -> bool:
+        """ check if obj is item or one of its parents"""
+        while item is not None:
+            if item == obj:
+                return True
+            item = item.parent
+        return False
+
+    # editing
+
+    def reset(self) -> None:
+        """ rebuild from the Object registry"""
+        self.beginResetModel()
+        self._children = dict()
+        self._rows = dict()
+        self._fetched = dict()
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._children = {None: list()}
+        self._rows = dict()
+        self._fetched = {None: 0}
+        self.endResetModel()
+
+    def insert_object(self, obj: Object, parent: Object | None = None) -> None:
+        if parent is not None:
+            parent.add_child(obj)
+        else:
+            obj.parent = None
+
+        if parent not in self._children:
+            if parent is not None and self.is_loaded(parent):
+                self.object_changed(parent)  # new expand indicator
+            return
+
+        children = self._children[parent]
+        key = self.sort_key(obj)
+        if self._sort_order == Qt.DescendingOrder:
+            # bisect only handles ascending lists: behind the last child whose key isn't smaller
+            row, high = 0, len(children)
+            while row < high:
+                middle = (row + high) // 2
+                if key > self.sort_key(children[middle]):
+                    high = middle
+                else:
+                    row = middle + 1
         else:
-            self.setText(1, str(self.object.ident_attrib.value))
+            row = bisect.bisect_right(children, key, key=self.sort_key)
+        visible = self.is_loaded(parent) and row <= self._fetched[parent]
+        if visible:
+            self.beginInsertRows(self.index_of(parent), row, row)
+        children.insert(row, obj)
+        self._rows.pop(parent, None)
+        if visible:
+            self._fetched[parent] += 1
+            self.endInsertRows()
+
+    def take_object(self, obj: Object) -> None:
+        """ detach obj from its parent, the subtree itself stays untouched"""
+        parent = obj.parent
+        if parent in self._children:
+            row = self.row_of(obj)
+            if row >= 0:
+                visible = self.is_loaded(parent) and row < self._fetched[parent]
+                if visible:
+                    self.beginRemoveRows(self.index_of(parent), row, row)
+                del self._children[parent][row]
+                self._rows.pop(parent, None)
+                if visible:
+                    self._fetched[parent] -= 1
+                    self.endRemoveRows()
+
+        if parent is not None:
+            if obj in parent.children:
+                parent.children.remove(obj)
+            if not parent.children and self.is_loaded(parent):
+                self.object_changed(parent)
+        obj.parent = None
+
+    def move_object(self, obj: Object, new_parent: Object | None) -> None:
+        if obj.parent == new_parent or self.is_ancestor(obj, new_parent):
+            return
+        old_parent = obj.parent
+        self.take_object(obj)
+        self.insert_object(obj, new_parent)
+        self.object_moved.emit(obj, old_parent, new_parent)
+
+    def remove_object(self, obj: Object) -> None:
+        """ delete obj, its children move to the top level"""
+        for child in list(dict.fromkeys(obj.children)):
+            self.move_object(child, None)
+        self.take_object(obj)
+        self._children.pop(obj, None)
+        self._rows.pop(obj, None)
+        self._fetched.pop(obj, None)
+        obj.delete()
+
+    def object_changed(self, obj: Object) -> None:
+        if self.is_loaded(obj):
+            self.dataChanged.emit(self.index_of(obj, 0), self.index_of(obj, len(self.HEADERS) - 1))
+
+    def refresh(self) -> None:
+        """ repaint every row the view has fetched"""
+        last_column = len(self.HEADERS) - 1
+        for parent, count in list(self._fetched.items()):
+            if count and self.is_loaded(parent):
+                parent_index = self.index_of(parent)
+                self.dataChanged.emit(self.index(0, 0, parent_index), self.index(count - 1, last_column, parent_index))
+
+
+class ObjectTree(QTreeView):
+    def __init__(self, parent=None) -> None:
+        super(ObjectTree, self).__init__(parent)
+
+    def object_model(self) -> ObjectModel:
+        return self.model()
+
+    def selected_objects(self) -> list[Object]:
+        return [ObjectModel.object_of(index) for index in self.selectionModel().selectedRows(0)]
 
 
 class CustomListItem(QListWidgetItem):
@@ -609,7 +949,305 @@ class CustomListItem(QListWidgetItem):
     def update(self) -> None:
         self.setText(self.property_set.name)
 
-class CustomTableItem(QTableWidgetItem):
-    def __init__(self,item:Object|PropertySet|Attribute):
-        super(CustomTableItem, self).__init__()
-        self.item = item
\ No newline at end of file
+class PropertySetModel(QAbstractTableModel):
+    """ Table model over the live property_sets list of one Object. Read only, renaming goes through
+    property_widget.rename so it lands on the undo stack"""
+
+    HEADERS = ("PropertySet", "InheritedBy")
+
+    def __init__(self, parent=None) -> None:
+        super(PropertySetModel, self).__init__(parent)
+        self.object: Object | None = None
+
+    @property
+    def property_sets(self) -> list[PropertySet]:
+        if self.object is None:
+            return list()
+        return self.object.property_sets
+
+    def set_object(self, obj: Object | None) -> None:
+        self.beginResetModel()
+        self.object = obj
+        self.endResetModel()
+
+    @staticmethod
+    def property_set_of(index: QModelIndex) -> PropertySet | None:
+        """ works for proxy indexes as well"""
+        return index.data(Qt.UserRole)
+
+    def row_of(self, property_set: PropertySet) -> int:
+        if property_set in self.property_sets:
+            return self.property_sets.index(property_set)
+        return -1
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.property_sets)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        property_set = self.property_sets[index.row()]
+        if role == Qt.UserRole:
+            return property_set
+        if role != Qt.DisplayRole:
+            return None
+        if index.column() == 0:
+            return property_set.name
+        if not property_set.is_child:
+            return ""
+        if property_set.parent.object is not None:
+            return property_set.parent.object.name
+        return constants.INHERITED_TEXT
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def find_row(self, name: str) -> int:
+        for row, property_set in enumerate(self.property_sets):
+            if property_set.name == name:
+                return row
+        return -1
+
+    def add_property_set(self, property_set: PropertySet) -> None:
+        row = len(self.property_sets)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.object.add_property_set(property_set)
+        self.endInsertRows()
+
+    def remove_property_set(self, property_set: PropertySet) -> None:
+        row = self.row_of(property_set)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        if property_set.is_child:
+            property_set.parent.remove_child(property_set)
+        else:
+            property_set.delete()
+        self.object.remove_property_set(property_set)
+        self.endRemoveRows()
+
+    def property_set_changed(self, property_set: PropertySet) -> None:
+        row = self.row_of(property_set)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+
+class AttributeModel(QAbstractTableModel):
+    """ Table model over the live attributes list of one PropertySet, the identifier of active_object is greyed out.
+    Read only, Attributes are edited in the PropertySetWindow over the undo stack and the changes are signalled to
+    every AttributeModel showing the same PropertySet"""
+
+    HEADERS = ("Name", "Data Format", "Format", "Value")
+    _instances: weakref.WeakSet[AttributeModel] = weakref.WeakSet()
+
+    def __init__(self, parent=None) -> None:
+        super(AttributeModel, self).__init__(parent)
+        self.property_set: PropertySet | None = None
+        self.active_object: Object | None = None
+        self._link_icon = None
+        self._instances.add(self)
+
+    def models(self) -> list[AttributeModel]:
+        return [model for model in self._instances if model.property_set == self.property_set]
+
+    @classmethod
+    def reload_all(cls) -> None:
+        """ reset every instance, e.g. after an undo step added or removed Attributes behind their back"""
+        for model in list(cls._instances):
+            model.set_property_set(model.property_set, model.active_object)
+
+    @property
+    def attributes(self) -> list[Attribute]:
+        if self.property_set is None:
+            return list()
+        return self.property_set.attributes
+
+    def set_property_set(self, property_set: PropertySet | None, active_object: Object | None = None) -> None:
+        self.beginResetModel()
+        self.property_set = property_set
+        self.active_object = active_object
+        self.endResetModel()
+
+    @staticmethod
+    def attribute_of(index: QModelIndex) -> Attribute | None:
+        return index.data(Qt.UserRole)
+
+    def row_of(self, attribute: Attribute) -> int:
+        if attribute in self.attributes:
+            return self.attributes.index(attribute)
+        return -1
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.attributes)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        attribute = self.attributes[index.row()]
+        column = index.column()
+        if role == Qt.UserRole:
+            return attribute
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return attribute.name
+            if column == 1:
+                return attribute.data_type
+            if column == 2:
+                return constants.VALUE_TYPE_LOOKUP[attribute.value_type]
+            return str(attribute.value)
+        if role == Qt.DecorationRole and column == 0 and attribute.is_child:
+            if self._link_icon is None:
+                self._link_icon = icons.get_link_icon()
+            return self._link_icon
+        if role == Qt.BackgroundRole and self.active_object is not None:
+            if self.active_object.ident_attrib == attribute:
+                return QBrush(Qt.GlobalColor.lightGray)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def add_attribute(self, name: str, value: list, value_type: str, data_type: str) -> Attribute:
+        models = self.models()
+        row = len(self.attributes)
+        for model in models:
+            model.beginInsertRows(QModelIndex(), row, row)
+        attribute = Attribute(self.property_set, name, value, value_type, data_type)
+        for model in models:
+            model.endInsertRows()
+        return attribute
+
+    def remove_attribute(self, attribute: Attribute) -> None:
+        row = self.row_of(attribute)
+        if row < 0:
+            return
+        models = self.models()
+        for model in models:
+            model.beginRemoveRows(QModelIndex(), row, row)
+        attribute.delete()
+        for model in models:
+            model.endRemoveRows()
+
+    def attribute_changed(self, attribute: Attribute) -> None:
+        row = self.row_of(attribute)
+        if row >= 0:
+            for model in self.models():
+                model.dataChanged.emit(model.index(row, 0), model.index(row, len(self.HEADERS) - 1))
+
+
+class PropertySetNameModel(QStringListModel):
+    """ Sorted names of all PropertySets, kept up to date through Hirarchy.notify
+
+    For every name the PropertySets are counted per owning Object (None for predefined PropertySets), so rows
+    only get inserted or removed when a name appears or disappears and owners() answers scope queries directly.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super(PropertySetNameModel, self).__init__(parent)
+        self._names: list[str] = list()
+        self._owners: dict[str, dict[Object | None, int]] = dict()
+        self._keys: dict[PropertySet, tuple[Object | None, str]] = dict()
+        self.rebuild()
+        Hirarchy.observers.append(self.update)
+
+    def owners(self, name: str) -> dict[Object | None, int]:
+        return self._owners.get(name, dict())
+
+    def rebuild(self) -> None:
+        self._owners.clear()
+        self._keys.clear()
+        for property_set in PropertySet:
+            key = (property_set.object, property_set.name)
+            self._keys[property_set] = key
+            owners = self._owners.setdefault(property_set.name, dict())
+            owners[key[0]] = owners.get(key[0], 0) + 1
+        self._names = sorted(self._owners)
+        self.setStringList(self._names)
+
+    def update(self, item: Hirarchy, removed: bool = False) -> None:
+        if not isinstance(item, PropertySet):
+            return
+        old_key = self._keys.pop(item, None)
+        new_key = None if removed or not item.name else (item.object, item.name)
+        if old_key == new_key:
+            if new_key is not None:
+                self._keys[item] = new_key
+            return
+        if old_key is not None:
+            self.decrement(*old_key)
+        if new_key is not None:
+            self._keys[item] = new_key
+            self.increment(*new_key)
+
+    def increment(self, owner: Object | None, name: str) -> None:
+        owners = self._owners.get(name)
+        row = bisect.bisect_left(self._names, name)
+        if owners is None:
+            owners = self._owners[name] = dict()
+            self._names.insert(row, name)
+            self.insertRows(row, 1)
+            self.setData(self.index(row), name)
+        owners[owner] = owners.get(owner, 0) + 1
+        if owners[owner] == 1:
+            self.dataChanged.emit(self.index(row), self.index(row))  # lets scoped filters re-check the row
+
+    def decrement(self, owner: Object | None, name: str) -> None:
+        owners = self._owners[name]
+        row = bisect.bisect_left(self._names, name)
+        owners[owner] -= 1
+        if owners[owner]:
+            return
+        del owners[owner]
+        if owners:
+            self.dataChanged.emit(self.index(row), self.index(row))
+        else:
+            del self._owners[name]
+            del self._names[row]
+            self.removeRows(row, 1)
+
+
+class PropertySetNameFilter(QSortFilterProxyModel):
+    """ PropertySet names visible from one Object: predefined PropertySets and those of its parent Objects"""
+
+    def __init__(self, source_model: PropertySetNameModel, parent=None) -> None:
+        super(PropertySetNameFilter, self).__init__(parent)
+        self._scope: list[Object | None] = [None]
+        self.setSourceModel(source_model)
+
+    def set_scope(self, obj: Object | None) -> None:
+        scope = [None]
+        parent = obj.parent if obj is not None else None
+        while parent is not None:
+            scope.append(parent)
+            parent = parent.parent
+        if scope != self._scope:
+            self._scope = scope
+            self.invalidateFilter()
+
+    def contains(self, name: str) -> bool:
+        owners = self.sourceModel().owners(name)
+        return any(owner in owners for owner in self._scope)
+
+    def names(self) -> set[str]:
+        return {self.index(row, 0).data() for row in range(self.rowCount())}
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return self.contains(self.sourceModel().index(source_row, 0, source_parent).data())
@@ -3,6 +3,18 @@ BOX_WIDHT = 300
 BOX_HEIGHT = 200
 BOX_MARGIN = 50
 BOX_BOTTOM_DISTANCE = 30
+MOVE_ANIMATION_DURATION = 250
+MAX_ANIMATED_NODES = 500
+TREE_FETCH_SIZE = 500
+SCRIPT_SYNC_DELAY = 500  # ms without typing until the editor text is copied into Script.code
+UNDO_DEPTH = 100
+UNDO_MEMORY = 16 * 1024 * 1024  # estimated bytes held by the undo stack before the oldest steps are dropped
+RULE_CACHE_SUFFIX = ".rulecache.json"  # stored next to the project, holds the rendered rules of the last export
+BOQ_IMPORT_SUFFIX = "_import.js"  # Desite import script written next to the exported BoQ csv
+BOQ_CHUNK_SIZE = 1000  # rows per csv.writer.writerows call
+EXPORT_QUEUE_SIZE = 1000  # records an export sink may fall behind the model walk
+DUMP_RESULT_SUFFIX = "_result.csv"  # results of the offline rule check, written next to the property dump
+IFC_CHUNK_SIZE = 64 * 1024 * 1024  # bytes per worker process when reading IFC files
 
 VALUE = "Value"
 FORMAT = "Format"
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+
+from desiteRuleCreator.data import classes
+
+IdentKey = tuple[str, str, tuple]
+
+
+def freeze(value: list) -> tuple:
+    """ hashable copy of an Attribute value, ranges become nested tuples"""
+    return tuple(tuple(item) if isinstance(item, list) else item for item in value)
+
+
+def make_key(property_set_name: str, attribute_name: str, value: list) -> IdentKey:
+    return property_set_name, attribute_name, freeze(value)
+
+
+def key_of(obj: classes.Object) -> IdentKey | None:
+    if obj.is_concept:
+        return None
+    ident: classes.Attribute = obj.ident_attrib
+    return make_key(ident.property_set.name, ident.name, ident.value)
+
+
+def key_to_text(key: IdentKey) -> str:
+    property_set_name, attribute_name, value = key
+    return f"{property_set_name} : {attribute_name} = {'|'.join(str(item) for item in value)}"
+
+
+class IdentifierIndex(object):
+    """ Hash index from (ident PropertySet name, ident Attribute name, value) to the Objects using it
+
+    Objects are re-keyed through Hirarchy.notify whenever the Object, its identifier Attribute or the PropertySet
+    holding that Attribute changes, so uniqueness checks are O(1) instead of a scan over all Objects.
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[classes.Object, IdentKey] = dict()
+        self._objects: dict[IdentKey, list[classes.Object]] = dict()
+        self._sources: dict[classes.Object, tuple[classes.Attribute, classes.PropertySet]] = dict()
+        self._owners: dict[classes.Hirarchy, set[classes.Object]] = dict()
+
+    def attach(self) -> None:
+        if self.update not in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.append(self.update)
+
+    def detach(self) -> None:
+        if self.update in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.remove(self.update)
+
+    def rebuild(self) -> None:
+        for obj in list(self._keys):
+            self.remove(obj)
+        for obj in classes.Object:
+            self.add(obj)
+
+    def update(self, item: classes.Hirarchy, removed: bool = False) -> None:
+        if isinstance(item, classes.Object):
+            self.remove(item)
+            if not removed:
+                self.add(item)
+            return
+        for obj in list(self._owners.get(item, ())):
+            self.remove(obj)
+            self.add(obj)
+
+    def add(self, obj: classes.Object) -> None:
+        key = key_of(obj)
+        if key is None:
+            return
+        self._keys[obj] = key
+        self._objects.setdefault(key, list()).append(obj)
+        ident: classes.Attribute = obj.ident_attrib
+        self._sources[obj] = (ident, ident.property_set)
+        for source in self._sources[obj]:
+            self._owners.setdefault(source, set()).add(obj)
+
+    def remove(self, obj: classes.Object) -> None:
+        key = self._keys.pop(obj, None)
+        if key is None:
+            return
+        objects = self._objects[key]
+        objects.remove(obj)
+        if not objects:
+            del self._objects[key]
+        for source in self._sources.pop(obj):
+            owners = self._owners[source]
+            owners.discard(obj)
+            if not owners:
+                del self._owners[source]
+
+    def objects_with(self, key: IdentKey) -> list[classes.Object]:
+        return list(self._objects.get(key, ()))
+
+    def exists(self, key: IdentKey) -> bool:
+        return key in self._objects
+
+    def duplicates(self) -> dict[IdentKey, list[classes.Object]]:
+        return {key: list(objects) for key, objects in self._objects.items() if len(objects) > 1}
+
+
+_index: IdentifierIndex | None = None
+
+
+def get_index() -> IdentifierIndex:
+    """ returns the IdentifierIndex of all Objects, it is built on first use and kept up to date afterwards"""
+    global _index
+    if _index is None:
+        _index = IdentifierIndex()
+        _index.attach()
+        _index.rebuild()
+    return _index
+
+
+def reset() -> None:
+    global _index
+    if _index is not None:
+        _index.detach()
+    _index = None
+
+
+def exists(property_set_name: str, attribute_name: str, value: list) -> bool:
+    return get_index().exists(make_key(property_set_name, attribute_name, value))
+
+
+def check_unique(obj: classes.Object) -> bool:
+    key = key_of(obj)
+    if key is None:
+        return True
+    others = [other for other in get_index().objects_with(key) if other is not obj]
+    if others:
+        names = ", ".join(other.name for other in others)
+        logging.error(f"[{obj.name}] Identifier {key_to_text(key)} bereits vergeben an [{names}]")
+        return False
+    return True
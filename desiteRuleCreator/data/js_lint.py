@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple
+
+import esprima
+
+# Desite runs rule scripts as function bodies, so top level return statements are allowed
+WRAPPER_START = "function desite_rule() {\n"
+WRAPPER_END = "\n}"
+PROCESS_THRESHOLD = 50  # below this many unknown scripts starting worker processes costs more than it saves
+
+# string and number literals don't change the syntax, so scripts rendered from the same template collapse
+# into a handful of shapes which have to be parsed only once. Literals which can be invalid themselves (strings
+# with escapes, numbers next to a dot or a name) stay in the shape, so their errors aren't hidden. The tokens
+# don't cover regex and template literals, scripts which might contain them have no shape
+TOKEN_PATTERN = re.compile(r"""
+    (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<number>(?<![\w.$])\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w.$]))
+""", re.VERBOSE | re.DOTALL)
+
+
+class LintError(NamedTuple):
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Zeile {self.line}, Spalte {self.column}: {self.message}"
+
+
+_cache: dict[str, LintError | None] = dict()
+_shape_cache: dict[str, bool] = dict()
+
+
+def content_hash(code: str | None) -> str:
+    return hashlib.sha1((code or "").encode("utf-8")).hexdigest()
+
+
+def shape_of(code: str) -> str | None:
+    """ code with collapsed literals, None if a / or ` is left outside comments and strings"""
+    def replace(match: re.Match) -> str:
+        kind = match.lastgroup
+        if kind == "string":
+            return match.group() if "\\" in match.group() else "''"
+        if kind == "number":
+            return "0"
+        if kind == "block_comment" and "\n" in match.group():
+            return "\n"  # keeps automatic semicolon insertion intact
+        return " "
+
+    shape = TOKEN_PATTERN.sub(replace, code)
+    if "/" in shape or "`" in shape:  # a regex or template literal may have been read as comment or string
+        return None
+    return shape
+
+
+def parse(code: str) -> LintError | None:
+    """ uncached syntax check, runs inside the worker processes"""
+    try:
+        esprima.parseScript(WRAPPER_START + code + WRAPPER_END)
+    except esprima.Error as error:
+        message = error.message.split(": ", 1)[-1]
+        return LintError(max(error.lineNumber - 1, 1), error.column, message)
+    except RecursionError:
+        return LintError(1, 1, "Verschachtelung zu tief")
+    return None
+
+
+def parse_all(codes: list[str], max_workers: int = None) -> list[LintError | None]:
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if len(codes) > PROCESS_THRESHOLD and max_workers > 1:
+        chunk_size = max(1, len(codes) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(parse, codes, chunksize=chunk_size))
+    return [parse(code) for code in codes]
+
+
+def is_cached(code: str | None) -> bool:
+    return content_hash(code) in _cache
+
+
+def check(code: str | None) -> LintError | None:
+    return check_all([code])[0]
+
+
+def check_all(codes: Iterable[str | None], max_workers: int = None) -> list[LintError | None]:
+    """ syntax check of many scripts. Results are cached by content hash, scripts that only differ in literals
+    share one parse. Only scripts whose shape fails or which have no shape get parsed individually to find the
+    exact error position. None is an empty script, like an empty <script/> in a DRCxml file"""
+    codes = [code or "" for code in codes]
+    keys = [content_hash(code) for code in codes]
+    todo = {key: code for key, code in zip(keys, codes) if key not in _cache}
+
+    shapes = {key: shape_of(code) for key, code in todo.items()}
+    shape_keys = {key: content_hash(shape) for key, shape in shapes.items() if shape is not None}
+    unknown_shapes = dict()
+    for key, shape_key in shape_keys.items():
+        if shape_key not in _shape_cache:
+            unknown_shapes[shape_key] = shapes[key]
+    results = parse_all(list(unknown_shapes.values()), max_workers)
+    for shape_key, error in zip(unknown_shapes, results):
+        _shape_cache[shape_key] = error is None
+
+    broken = [key for key in todo if key not in shape_keys or not _shape_cache[shape_keys[key]]]
+    for key in todo:
+        _cache[key] = None
+    _cache.update(zip(broken, parse_all([todo[key] for key in broken], max_workers)))
+    return [_cache[key] for key in keys]
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from desiteRuleCreator.data import classes
+
+if TYPE_CHECKING:
+    from desiteRuleCreator.Filehandling import merge
+
+DIGEST_SIZE = 16
+SEPARATOR = b"\x1f"
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def freeze(value: list) -> tuple:
+    """ hashable copy of an Attribute value. Values are compared as text, because ranges of old files may still
+    contain floats"""
+    return tuple(tuple(str(v) for v in item) if isinstance(item, list) else str(item) for item in value)
+
+
+def digest(kind: str, fields: Iterable[str], children: Iterable[bytes] = ()) -> bytes:
+    """ children are sorted, so the hash doesn't depend on the order of PropertySets and Attributes"""
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    hasher.update(kind.encode())
+    for field in fields:
+        hasher.update(SEPARATOR)
+        hasher.update(str(field).encode())
+    hasher.update(SEPARATOR)
+    for child in sorted(children):
+        hasher.update(child)
+    return hasher.digest()
+
+
+def attribute_digest(name: str, value_type: str, data_type: str, value: tuple) -> bytes:
+    return digest("A", (name, value_type, data_type, repr(value)))
+
+
+def property_set_digest(name: str, attribute_digests: Iterable[bytes]) -> bytes:
+    return digest("P", (name,), attribute_digests)
+
+
+def object_digest(name: str, property_set_digests: Iterable[bytes]) -> bytes:
+    return digest("O", (name,), property_set_digests)
+
+
+def project_digest(digests: Iterable[bytes]) -> bytes:
+    return digest("R", (), digests)
+
+
+class Difference(NamedTuple):
+    kind: str  # ADDED, REMOVED or CHANGED
+    path: str
+    old: object = None
+    new: object = None
+
+    def __str__(self) -> str:
+        if self.kind == CHANGED:
+            return f"{self.kind} [{self.path}]: {self.old!r} -> {self.new!r}"
+        return f"{self.kind} [{self.path}]"
+
+
+class HashCache(object):
+    """ Merkle hashes of the loaded project: Attribute (name, value_type, data_type, value) -> PropertySet -> Object
+
+    Hashes are computed on demand and kept until Hirarchy.notify reports a change, which drops the hash of the
+    changed item and of everything above it. After changing one Attribute only its PropertySet, Object and the
+    project hash have to be recomputed.
+    """
+
+    def __init__(self) -> None:
+        self._digests: dict[classes.Hirarchy, bytes] = dict()
+        self._root: bytes | None = None
+
+    def attach(self) -> None:
+        if self.update not in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.append(self.update)
+
+    def detach(self) -> None:
+        if self.update in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.remove(self.update)
+
+    def clear(self) -> None:
+        self._digests.clear()
+        self._root = None
+
+    def update(self, item: classes.Hirarchy, removed: bool = False) -> None:
+        self._root = None
+        while item is not None:
+            self._digests.pop(item, None)
+            if isinstance(item, classes.Attribute):
+                item = item.property_set
+            elif isinstance(item, classes.PropertySet):
+                item = item.object
+            else:
+                item = None
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def digest(self, item: classes.Hirarchy) -> bytes:
+        result = self._digests.get(item)
+        if result is not None:
+            return result
+        if isinstance(item, classes.Attribute):
+            result = attribute_digest(item.name, item.value_type, item.data_type, freeze(item.value))
+        elif isinstance(item, classes.PropertySet):
+            result = property_set_digest(item.name, [self.digest(attribute) for attribute in item.attributes])
+        else:
+            result = object_digest(item.name, [self.digest(pset) for pset in item.property_sets])
+        self._digests[item] = result
+        return result
+
+    def project_digest(self) -> bytes:
+        if self._root is None:
+            self._root = project_digest([self.digest(item) for item in roots()])
+        return self._root
+
+
+def roots() -> list[classes.Object | classes.PropertySet]:
+    return [pset for pset in classes.PropertySet if pset.is_predefined] + list(classes.Object)
+
+
+_cache: HashCache | None = None
+
+
+def get_cache() -> HashCache:
+    """ returns the HashCache of the loaded project, it is created on first use and kept up to date afterwards"""
+    global _cache
+    if _cache is None:
+        _cache = HashCache()
+        _cache.attach()
+    return _cache
+
+
+def reset() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.detach()
+    _cache = None
+
+
+# trees which can be compared by diff
+
+class ProjectTree(object):
+    """ the loaded project, hashed through the HashCache"""
+
+    def __init__(self, cache: HashCache = None) -> None:
+        self.cache = get_cache() if cache is None else cache
+
+    @property
+    def digest(self) -> bytes:
+        return self.cache.project_digest()
+
+    def roots(self) -> dict[str, classes.Hirarchy]:
+        return {str(item.identifier): item for item in roots()}
+
+    def node_digest(self, item: classes.Hirarchy) -> bytes:
+        return self.cache.digest(item)
+
+    @staticmethod
+    def children(item: classes.Hirarchy) -> dict[str, classes.Hirarchy]:
+        if isinstance(item, classes.Object):
+            return {str(pset.identifier): pset for pset in item.property_sets}
+        if isinstance(item, classes.PropertySet):
+            return {str(attribute.identifier): attribute for attribute in item.attributes}
+        return dict()
+
+    @staticmethod
+    def fields(item: classes.Hirarchy) -> dict[str, object]:
+        if isinstance(item, classes.Attribute):
+            return {"name": item.name, "value_type": item.value_type, "data_type": item.data_type,
+                    "value": freeze(item.value)}
+        return {"name": item.name}
+
+
+class SnapshotTree(object):
+    """ a project read with merge.load_snapshot, all hashes are computed once"""
+
+    def __init__(self, snapshot: merge.Snapshot) -> None:
+        self.snapshot = snapshot
+        self._digests: dict[str, bytes] = dict()
+        for record in snapshot.predefined.values():
+            self.hash_property_set(record)
+        for record in snapshot.objects.values():
+            self._digests[record.identifier] = object_digest(
+                record.name, [self.hash_property_set(pset) for pset in record.property_sets.values()])
+        self.digest = project_digest(self._digests[identifier] for identifier in self.roots())
+
+    def hash_property_set(self, record: merge.PropertySetRecord) -> bytes:
+        attribute_digests = list()
+        for attribute in record.attributes.values():
+            attribute_hash = attribute_digest(attribute.name, attribute.value_type, attribute.data_type,
+                                              attribute.value)
+            self._digests[attribute.identifier] = attribute_hash
+            attribute_digests.append(attribute_hash)
+        self._digests[record.identifier] = property_set_digest(record.name, attribute_digests)
+        return self._digests[record.identifier]
+
+    def roots(self) -> dict[str, object]:
+        return {**self.snapshot.predefined, **self.snapshot.objects}
+
+    def node_digest(self, record) -> bytes:
+        return self._digests[record.identifier]
+
+    @staticmethod
+    def children(record) -> dict[str, object]:
+        if hasattr(record, "property_sets"):
+            return record.property_sets
+        if hasattr(record, "attributes"):
+            return record.attributes
+        return dict()
+
+    @staticmethod
+    def fields(record) -> dict[str, object]:
+        if hasattr(record, "value"):
+            return {"name": record.name, "value_type": record.value_type, "data_type": record.data_type,
+                    "value": record.value}
+        return {"name": record.name}
+
+
+def diff(old: ProjectTree | SnapshotTree, new: ProjectTree | SnapshotTree) -> list[Difference]:
+    """ items are matched by identifier. Only subtrees with different hashes are visited, so the effort depends on
+    the number of changes and not on the size of the project"""
+    differences: list[Difference] = list()
+    if old.digest == new.digest:
+        return differences
+
+    def compare(old_items: dict, new_items: dict, path: str) -> None:
+        for identifier, old_item in old_items.items():
+            new_item = new_items.get(identifier)
+            if new_item is None:
+                differences.append(Difference(REMOVED, f"{path}{old_item.name}"))
+                continue
+            if old.node_digest(old_item) == new.node_digest(new_item):
+                continue
+            old_fields = old.fields(old_item)
+            new_fields = new.fields(new_item)
+            item_path = f"{path}{new_fields['name']}"
+            for field, old_value in old_fields.items():
+                if old_value != new_fields[field]:
+                    differences.append(Difference(CHANGED, f"{item_path} : {field}", old_value, new_fields[field]))
+            compare(old.children(old_item), new.children(new_item), f"{item_path} : ")
+        for identifier, new_item in new_items.items():
+            if identifier not in old_items:
+                differences.append(Difference(ADDED, f"{path}{new_item.name}"))
+
+    compare(old.roots(), new.roots(), "")
+    return differences
@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+JS_FLOAT = re.compile(r"[+-]?(?:Infinity|\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)")
+JS_QUANTIFIER = re.compile(r"\{(\d+)(,(\d*))?\}")
+JS_GROUP_NAME = re.compile(r"\(\?<(?![=!])([^>]*)>")
+HEX_DIGITS = set("0123456789abcdefABCDEF")
+
+
+# JavaScript number semantics used by the check functions
+
+def parse_float(text: str) -> float:
+    """ parseFloat: the longest numeric prefix, NaN if there is none"""
+    match = JS_FLOAT.match(text.lstrip())
+    return float(match.group()) if match is not None else math.nan
+
+
+def to_number(text: str) -> float:
+    """ Number(text), used by the comparison operators: the whole trimmed text has to be numeric, "" is 0"""
+    text = text.strip()
+    if not text:
+        return 0.
+    if text[:2].lower() in ("0x", "0o", "0b"):
+        try:
+            return float(int(text, 0))
+        except ValueError:
+            return math.nan
+    return float(text) if JS_FLOAT.fullmatch(text) is not None else math.nan
+
+
+def number_text(number: float) -> str:
+    """ String(number)"""
+    if math.isnan(number):
+        return "NaN"
+    if math.isinf(number):
+        return "Infinity" if number > 0 else "-Infinity"
+    if number == int(number) and abs(number) < 1e21:
+        return str(int(number))
+    if 1e-7 <= abs(number) < 1e21:
+        return format(Decimal(repr(number)), "f")
+    mantissa, exponent = repr(number).split("e")
+    exponent = int(exponent)
+    return f"{mantissa}e{'+' if exponent > 0 else '-'}{abs(exponent)}"
+
+
+# RANGE
+
+class CompiledRange(NamedTuple):
+    """ the [from, to] pairs of a RANGE Attribute as sorted bounds
+
+    counts holds the number of pairs containing a value for every gap and bound: counts[2 * i] is the open gap
+    below bounds[i], counts[2 * i + 1] bounds[i] itself and counts[-1] everything above the last bound. Neighbours
+    with the same count are merged, so a lookup is a single binary search. Pairs with an empty or missing bound
+    only match their values exactly (check_for_single in start_check_range.js), numbers holds them by
+    String(number), texts by their text.
+    """
+    bounds: tuple[float, ...]
+    counts: tuple[int, ...]
+    numbers: dict[str, int]
+    texts: dict[str, int]
+
+    def hits(self, value: float | str) -> int:
+        """ number of pairs containing value, the check passes for exactly one"""
+        number = value if isinstance(value, float) else to_number(value)
+        hits = 0
+        if not math.isnan(number):
+            index = bisect_left(self.bounds, number)
+            if index < len(self.bounds) and self.bounds[index] == number:
+                hits = self.counts[2 * index + 1]
+            else:
+                hits = self.counts[2 * index]
+        if isinstance(value, float):
+            return hits + self.numbers.get(number_text(value), 0)
+        return hits + self.texts.get(value, 0)
+
+    def literal(self) -> str:
+        """ JavaScript object literal for range_hits() in start_check_range.js"""
+        return json.dumps({"bounds": self.bounds, "counts": self.counts, "numbers": self.numbers,
+                           "texts": self.texts}, ensure_ascii=False)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_range(pairs: tuple[tuple[str, ...], ...]) -> CompiledRange:
+    intervals: list[tuple[float, float]] = list()
+    numbers: Counter[str] = Counter()
+    texts: Counter[str] = Counter()
+    for pair in pairs:
+        if "" in pair or len(pair) < 2:
+            for item in pair:
+                texts[item] += 1
+                number = to_number(item)
+                if not math.isnan(number):
+                    numbers[number_text(number)] += 1
+        lower = parse_float(pair[0].replace(",", ".", 1)) if pair else math.nan
+        upper = parse_float(pair[1].replace(",", ".", 1)) if len(pair) > 1 else math.nan
+        if lower <= upper:  # False for NaN, such pairs never match
+            intervals.append((lower, upper))
+
+    bounds = sorted({bound for interval in intervals for bound in interval})
+    counts = [0]
+    for index, bound in enumerate(bounds):
+        counts.append(sum(lower <= bound <= upper for lower, upper in intervals))
+        if index + 1 < len(bounds):
+            following = bounds[index + 1]
+            counts.append(sum(lower <= bound and upper >= following for lower, upper in intervals))
+    counts.append(0)
+
+    merged_bounds: list[float] = list()
+    merged_counts = [counts[0]]
+    for index, bound in enumerate(bounds):
+        point, above = counts[2 * index + 1], counts[2 * index + 2]
+        if merged_counts[-1] == point == above:
+            continue
+        merged_bounds.append(bound)
+        merged_counts += [point, above]
+    return CompiledRange(tuple(merged_bounds), tuple(merged_counts), dict(numbers), dict(texts))
+
+
+def freeze_range(value: list) -> tuple[tuple[str, ...], ...]:
+    return tuple(tuple(str(item) for item in pair) if isinstance(pair, (list, tuple)) else (str(pair),)
+                 for pair in value)
+
+
+def range_literal(value: list) -> str:
+    """ compiled RANGE value of an Attribute for the exported rules"""
+    return compile_range(freeze_range(value)).literal()
+
+
+# FORMAT
+
+class CompiledFormat(NamedTuple):
+    """ all valid patterns of a FORMAT Attribute as one case insensitive alternation"""
+    source: str | None  # None if no pattern is valid
+    regex: re.Pattern | None
+    errors: tuple[str, ...]
+
+    def test(self, value: str) -> bool:
+        """ RegExp.test: the value matches any of the patterns"""
+        return self.regex is not None and self.regex.search(value) is not None
+
+    def literal(self) -> str:
+        """ JavaScript regex literal, null if no pattern is valid"""
+        if self.source is None:
+            return "null"
+        return f"/{js_regex_source(self.source)}/i"
+
+
+def js_regex_source(source: str) -> str:
+    """ escapes the characters which would end a regex literal"""
+    result = list()
+    escaped = False
+    for char in source:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "/":
+            result.append("\\")
+        if char in "\n\r\u2028\u2029":
+            char = {"\n": "n", "\r": "r", "\u2028": "u2028", "\u2029": "u2029"}[char]
+            if not escaped:
+                result.append("\\")
+            escaped = False
+        result.append(char)
+    return "".join(result) or "(?:)"
+
+
+class JsRegexError(ValueError):
+    """ pattern which the JavaScript RegExp doesn't accept, the message follows the one of V8"""
+
+
+def capture_groups(pattern: str) -> tuple[int, list[str]]:
+    """ number of capturing groups and the group names, JavaScript numbers named groups as well"""
+    count = 0
+    names = list()
+    in_class = False
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            match = JS_GROUP_NAME.match(pattern, index)
+            if match is not None:
+                names.append(match.group(1))
+            if match is not None or not pattern.startswith("?", index + 1):
+                count += 1
+        index += 1
+    return count, names
+
+
+def legacy_escape(pattern: str, index: int) -> tuple[int | None, str, str, int]:
+    """ escape at index which isn't a back reference, group name reference or character class escape.
+    Returns (character code or None, JavaScript text, Python text, index after the escape). Octal escapes are
+    written as hex escapes, they would turn into back references after merging with patterns that have groups"""
+    char = pattern[index + 1]
+    if char in "fnrtv":
+        return ord({"f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}[char]), "\\" + char, "\\" + char, index + 2
+    if char in "01234567":  # legacy octal escape, at most \377
+        end = index + 2
+        while end < len(pattern) and end - index < (4 if char in "0123" else 3) and pattern[end] in "01234567":
+            end += 1
+        value = int(pattern[index + 1:end], 8)
+        return value, f"\\x{value:02x}", f"\\x{value:02x}", end
+    if char in "xu":
+        length = 2 if char == "x" else 4
+        digits = pattern[index + 2:index + 2 + length]
+        if len(digits) == length and set(digits) <= HEX_DIGITS:
+            return int(digits, 16), pattern[index:index + 2 + length], pattern[index:index + 2 + length], \
+                index + 2 + length
+    if char == "c":
+        if index + 2 < len(pattern) and pattern[index + 2].isascii() and pattern[index + 2].isalpha():
+            value = ord(pattern[index + 2]) % 32
+            return value, pattern[index:index + 3], f"\\x{value:02x}", index + 3
+        return None, "\\c", "\\\\c", index + 2  # a backslash followed by c
+    if char == "k":  # \k would be a group name reference after merging with a pattern which has named groups
+        return ord(char), char, char, index + 2
+    return ord(char), "\\" + char, re.escape(char), index + 2  # identity escape
+
+
+def translate_class(pattern: str, index: int) -> tuple[str, str, int]:
+    """ character class starting at index. Returns (JavaScript text, Python text, index after the class)"""
+    def atom(position: int) -> tuple[int | None, str, str, int]:
+        char = pattern[position]
+        if char != "\\":
+            return ord(char), char, "\\[" if char == "[" else char, position + 1
+        if position + 1 == len(pattern):
+            raise JsRegexError("\\ at end of pattern")
+        escaped = pattern[position + 1]
+        if escaped in "dDwWsS":
+            return None, "\\" + escaped, "\\" + escaped, position + 2
+        if escaped == "b":
+            return 8, "\\b", "\\x08", position + 2
+        if escaped in "89":
+            return ord(escaped), "\\" + escaped, escaped, position + 2
+        return legacy_escape(pattern, position)
+
+    start = index
+    index += 1
+    negated = pattern.startswith("^", index)
+    if negated:
+        index += 1
+    if pattern.startswith("]", index):  # [] never matches, [^] matches everything
+        return pattern[start:index + 1], "[\\s\\S]" if negated else "(?!)", index + 1
+
+    python = ["[^" if negated else "["]
+    while index < len(pattern) and pattern[index] != "]":
+        first, first_js, first_python, index = atom(index)
+        if index + 1 < len(pattern) and pattern[index] == "-" and pattern[index + 1] != "]":
+            last, last_js, last_python, index = atom(index + 1)
+            if first is None or last is None:  # a class escape makes the "-" a character of its own
+                python.append(f"{first_python}\\-{last_python}")
+            elif first > last:
+                raise JsRegexError("Range out of order in character class")
+            else:
+                python.append(f"{first_python}-{last_python}")
+        else:
+            python.append(first_python)
+    if index == len(pattern):
+        raise JsRegexError("Unterminated character class")
+    python.append("]")
+    return pattern[start:index + 1], "".join(python), index + 1
+
+
+def translate_pattern(pattern: str, number: int = 0, offset: int = 0) -> tuple[str, str]:
+    """ checks pattern against the syntax of the JavaScript RegExp without u flag, including the web compatibility
+    rules of Annex B, and returns the (JavaScript, Python) source of it. Groups are renamed after number and back
+    references shifted by offset, so translated patterns can be merged into one alternation. Raises
+    JsRegexError"""
+    count, names = capture_groups(pattern)
+    if len(set(names)) < len(names):
+        raise JsRegexError("Duplicate capture group name")
+    renamed = {name: f"n{number}_{position}" for position, name in enumerate(names)}
+
+    javascript: list[str] = list()
+    python: list[str] = list()
+    groups: list[str] = list()  # kinds of the open groups
+    can_repeat = False
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            if index + 1 == len(pattern):
+                raise JsRegexError("\\ at end of pattern")
+            escaped = pattern[index + 1]
+            can_repeat = escaped not in "bB"
+            if escaped in "dDwWsSbB":
+                text = "\\" + escaped
+                javascript.append(text)
+                python.append(text)
+                index += 2
+            elif escaped == "k" and names:
+                match = re.compile(r"<([^>]*)>").match(pattern, index + 2)
+                if match is None:
+                    raise JsRegexError("Invalid named reference")
+                if match.group(1) not in renamed:
+                    raise JsRegexError("Invalid named capture referenced")
+                name = renamed[match.group(1)]
+                javascript.append(f"\\k<{name}>")
+                python.append(f"(?P={name})")
+                index = match.end()
+            elif escaped in "123456789" and int(re.match(r"\d+", pattern[index + 1:]).group()) <= count:
+                digits = re.match(r"\d+", pattern[index + 1:]).group()
+                text = f"(?:\\{int(digits) + offset})"
+                javascript.append(text)
+                python.append(text)
+                index += 1 + len(digits)
+            elif escaped in "89":
+                javascript.append(escaped)
+                python.append(escaped)
+                index += 2
+            else:
+                _, javascript_text, python_text, index = legacy_escape(pattern, index)
+                javascript.append(javascript_text)
+                python.append(python_text)
+            continue
+
+        if char == "[":
+            javascript_text, python_text, index = translate_class(pattern, index)
+            javascript.append(javascript_text)
+            python.append(python_text)
+            can_repeat = True
+            continue
+
+        if char in "*+?" or (char == "{" and JS_QUANTIFIER.match(pattern, index)):
+            if not can_repeat:
+                raise JsRegexError("Nothing to repeat")
+            match = JS_QUANTIFIER.match(pattern, index)
+            if match is not None and match.group(3) and int(match.group(3)) < int(match.group(1)):
+                raise JsRegexError("numbers out of order in {} quantifier")
+            end = index + 1 if match is None else match.end()
+            if pattern.startswith("?", end):  # lazy
+                end += 1
+            javascript.append(pattern[index:end])
+            python.append(pattern[index:end])
+            can_repeat = False
+            index = end
+            continue
+
+        if char == "(":
+            match = JS_GROUP_NAME.match(pattern, index)
+            if match is not None:
+                if not (match.group(1).replace("$", "_").isidentifier()):
+                    raise JsRegexError("Invalid capture group name")
+                name = renamed[match.group(1)]
+                javascript.append(f"(?<{name}>")
+                python.append(f"(?P<{name}>")
+                groups.append("capture")
+                index = match.end()
+            else:
+                for prefix, kind in [("(?:", "group"), ("(?=", "lookahead"), ("(?!", "lookahead"),
+                                     ("(?<=", "lookbehind"), ("(?<!", "lookbehind"), ("(?", None), ("(", "capture")]:
+                    if pattern.startswith(prefix, index):
+                        break
+                if kind is None:
+                    raise JsRegexError("Invalid group")
+                javascript.append(prefix)
+                python.append(prefix)
+                groups.append(kind)
+                index += len(prefix)
+            can_repeat = False
+            continue
+
+        if char == ")":
+            if not groups:
+                raise JsRegexError("Unmatched ')'")
+            can_repeat = groups.pop() != "lookbehind"  # Annex B allows quantified lookaheads
+        elif char in "^$|":
+            can_repeat = False
+        else:
+            can_repeat = True
+        javascript.append(char)
+        python.append("\\" + char if char in "{}" else char)  # a { which isn't a quantifier is a character
+        index += 1
+
+    if groups:
+        raise JsRegexError("Unterminated group")
+    return "".join(javascript), "".join(python)
+
+
+def validate_pattern(pattern: str) -> str | None:
+    """ error message if pattern can't be compiled by the JavaScript RegExp or its translation by Python"""
+    try:
+        _, python = translate_pattern(pattern)
+        re.compile(python, re.IGNORECASE)
+    except (JsRegexError, re.error) as error:
+        return str(error)
+    return None
+
+
+def format_key(patterns: tuple[str, ...]) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for pattern in patterns:
+        hasher.update(pattern.encode())
+        hasher.update(b"\x1f")
+    return hasher.hexdigest()
+
+
+_formats: dict[str, CompiledFormat] = dict()  # format_key -> CompiledFormat
+
+
+def compile_format(patterns: Iterable[str]) -> CompiledFormat:
+    """ validates every pattern once and merges the valid ones, results are cached by content"""
+    patterns = tuple(str(pattern) for pattern in patterns)
+    key = format_key(patterns)
+    compiled = _formats.get(key)
+    if compiled is not None:
+        return compiled
+
+    valid = list()
+    errors = list()
+    for pattern in patterns:
+        error = validate_pattern(pattern)
+        if error is None:
+            valid.append(pattern)
+        else:
+            errors.append(f"Ungültiges Format '{pattern}': {error}")
+    source = None
+    regex = None
+    if valid:
+        javascript = list()
+        python = list()
+        offset = 0
+        for number, pattern in enumerate(valid):
+            javascript_source, python_source = translate_pattern(pattern, number, offset)
+            javascript.append(javascript_source)
+            python.append(python_source)
+            offset += capture_groups(pattern)[0]
+        if len(valid) == 1:
+            source, python_source = javascript[0], python[0]
+        else:
+            source = "|".join(f"(?:{text})" for text in javascript)
+            python_source = "|".join(f"(?:{text})" for text in python)
+        regex = re.compile(python_source, re.IGNORECASE)
+    compiled = CompiledFormat(source, regex, tuple(errors))
+    _formats[key] = compiled
+    return compiled
+
+
+def format_literal(value: list) -> str:
+    """ compiled FORMAT value of an Attribute for the exported rules"""
+    return compile_format(value).literal()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from typing import Iterable, NamedTuple
+
+from desiteRuleCreator.data import classes, constants
+from desiteRuleCreator.data.rule_compiler import compile_range, freeze_range, parse_float, to_number, number_text
+
+PASSED = "passed"
+WARNING = "warning"
+FAILED = "failed"
+IGNORED = "ignored"
+UNTESTED = "untested"  # no rule matches the element, the End checkrun marks it as "Ungeprüft"
+EXISTS = "Exists"  # LIST without values, the template calls check_exist
+NUMERIC_TYPES = ("xs:double", "xs:float", "xs:decimal", "xs:int", "xs:integer", "xs:long")
+
+ERROR_CODE = re.compile(r"\[Fehler (\d+)]")
+
+
+class Check(NamedTuple):
+    """ one attribute check of the template"""
+    property: str  # pSet + name like the JavaScript reads it
+    kind: str  # constants.LIST, RANGE, FORMAT or EXISTS
+    data_type: str
+    values: tuple
+
+
+class ElementResult(NamedTuple):
+    element: str
+    object: str | None
+    state: str
+    checked: int  # zu_pruefende_eigenschaften
+    failed: int  # fehlerhafte_eigenschaften
+    messages: tuple[str, ...]
+
+    @property
+    def codes(self) -> list[int]:
+        return [int(code) for message in self.messages for code in ERROR_CODE.findall(message)]
+
+
+class Coverage(NamedTuple):
+    elements: int  # elements assigned to the Object
+    properties: dict[str, int]  # checked property -> elements with a value
+
+
+class PropertyDump(object):
+    """ property values of the model elements, stored per property so one check reads one column"""
+
+    def __init__(self) -> None:
+        self.elements: dict[str, None] = dict()  # ordered set
+        self.columns: dict[str, dict[str, str | None]] = dict()
+        self.data_types: dict[str, dict[str, str]] = dict()
+
+    def add(self, element: str, property_name: str, value: str | None, data_type: str | None = None) -> None:
+        self.elements[element] = None
+        self.columns.setdefault(property_name, dict())[element] = None if value == "" else value
+        if data_type:
+            self.data_types.setdefault(property_name, dict())[element] = data_type
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+
+def compile_object(obj: classes.Object) -> list[Check]:
+    checks = list()
+    for property_set in obj.property_sets:
+        pset_name = "" if property_set.name == constants.IGNORE_PSET else f"{property_set.name}:"
+        for attribute in property_set.attributes:
+            kind = attribute.value_type
+            if kind == constants.LIST and not attribute.value:
+                kind = EXISTS
+            if kind == constants.RANGE:
+                values = freeze_range(attribute.value)
+            else:
+                values = tuple(str(value) for value in attribute.value)
+            checks.append(Check(pset_name + attribute.name, kind, attribute.data_type, values))
+    return checks
+
+
+def missing_message(check: Check) -> str:
+    if check.kind in (constants.LIST, constants.RANGE):
+        return f'Eigenschaft "{check.property}" nicht vorhanden! [Fehler 3]'
+    return f"Eigenschaft {check.property} nicht vorhanden! [Fehler 3]"
+
+
+def check_list(check: Check, value: str) -> tuple[int, str | None]:
+    if value in check.values:
+        return 0, None
+    if "," in value:
+        parts = value.split(",")
+    elif "/" in value:
+        parts = value.split("/")
+    else:
+        parts = [value]
+    for part in parts:
+        if part.strip() not in check.values:
+            return 1, f'Eigenschaft "{check.property}" ({value})  entspricht nicht den Vorgaben in MEM![Fehler 1]'
+    return 0, None
+
+
+def check_range(check: Check, text: str) -> tuple[int, str | None]:
+    value: float | str = text
+    if check.data_type == "xs:string":
+        parsed = parse_float(text.replace(",", ".", 1))
+        if not math.isnan(parsed):
+            value = parsed
+    elif check.data_type in NUMERIC_TYPES:
+        value = to_number(text)  # getPropertyValue already returns a number
+    if compile_range(check.values).hits(value) != 1:
+        value_text = number_text(value) if isinstance(value, float) else value
+        return 1, (f'Eigenschaft "{check.property}" liegt außerhalb des vorgegebenen Wertebereichs in MEM! '
+                   f'" ( Wert ist : {value_text})[Fehler 2]')
+    return 0, None
+
+
+def evaluate_value(check: Check, value: str | None, data_type: str | None) -> tuple[int, str | None]:
+    """ (failed, message) of check for one value, like the JavaScript function of check.kind"""
+    if data_type is None and value is not None and check.data_type in NUMERIC_TYPES and math.isnan(to_number(value)):
+        data_type = "xs:string"  # text which Desite can't convert to a number
+    if data_type is not None and data_type != check.data_type:
+        value = None  # getPropertyValue doesn't return values of another data type
+    if value is None:
+        if data_type is not None and data_type != check.data_type:
+            message = f"Eigenschaft {check.property} besitzt den falschen Datentyp! [Fehler 5]"
+        else:
+            message = missing_message(check)
+        # check_format compares against format_list.lenght, which is undefined, and never reports a failure
+        return (0 if check.kind == constants.FORMAT else 1), message
+    if check.kind == constants.LIST:
+        return check_list(check, value)
+    if check.kind == constants.RANGE:
+        return check_range(check, value)
+    return 0, None
+
+
+def is_true(value: str | None) -> bool:
+    return value is not None and value.strip().lower() in ("true", "1")
+
+
+class RuleEngine(object):
+    """ evaluates the rules of the project against a PropertyDump without Desite
+
+    Elements are assigned to Objects by their identifier like the filters of the exported checkruns, then every
+    check runs over the whole column of its property for all elements of an Object. Results are memoized per
+    distinct value, so repeated values (the usual case in a model) are checked once. States, messages and
+    "Fehler" codes are the ones template.txt and start_check_*.js produce.
+
+        results = RuleEngine().evaluate(property_dump.load(path))
+    """
+
+    def __init__(self, objects: Iterable[classes.Object] = None) -> None:
+        objects = classes.Object if objects is None else objects
+        self.rules: dict[str, dict[str, classes.Object]] = dict()  # identifier property -> value -> Object
+        self.checks: dict[classes.Object, list[Check]] = dict()
+        for obj in sorted(objects, key=lambda item: item.name):
+            if obj.is_concept:
+                continue
+            values = self.rules.setdefault(self.ident_property(obj), dict())
+            value = str(obj.ident_attrib.value[0]) if obj.ident_attrib.value else ""
+            if value in values:
+                logging.warning(f"[{obj.name}] Identifier {value} mehrfach vergeben, Regel wird nicht geprüft")
+                continue
+            values[value] = obj
+            self.checks[obj] = compile_object(obj)
+        self._memo: dict[Check, dict[tuple[str | None, str | None], tuple[int, str | None]]] = dict()
+
+    @staticmethod
+    def ident_property(obj: classes.Object) -> str:
+        pset_name = obj.ident_attrib.property_set.name
+        if pset_name == constants.IGNORE_PSET:
+            return obj.ident_attrib.name
+        return f"{pset_name}:{obj.ident_attrib.name}"
+
+    def assign(self, dump: PropertyDump) -> dict[classes.Object, list[str]]:
+        """ elements per Object, the first identifier property with a matching value wins"""
+        groups: dict[classes.Object, list[str]] = dict()
+        assigned: set[str] = set()
+        for property_name, values in self.rules.items():
+            column = dump.columns.get(property_name, dict())
+            for element, value in column.items():
+                if element in assigned or value not in values:
+                    continue
+                assigned.add(element)
+                groups.setdefault(values[value], list()).append(element)
+        return groups
+
+    def coverage(self, dump: PropertyDump) -> dict[classes.Object, Coverage]:
+        """ how many elements each Object matches and how many of them have a value for each checked property"""
+        groups = self.assign(dump)
+        coverage = dict()
+        for obj, checks in self.checks.items():
+            elements = groups.get(obj, list())
+            properties = dict()
+            for check in checks:
+                column = dump.columns.get(check.property, dict())
+                properties[check.property] = sum(column.get(element) is not None for element in elements)
+            coverage[obj] = Coverage(len(elements), properties)
+        return coverage
+
+    def evaluate_object(self, checks: list[Check], elements: list[str],
+                        dump: PropertyDump) -> tuple[list[int], list[list[str]]]:
+        failed = [0] * len(elements)
+        messages: list[list[str]] = [list() for _ in elements]
+        for check in checks:
+            column = dump.columns.get(check.property, dict())
+            data_types = dump.data_types.get(check.property, dict())
+            memo = self._memo.setdefault(check, dict())
+            for position, element in enumerate(elements):
+                key = (column.get(element), data_types.get(element))
+                result = memo.get(key)
+                if result is None:
+                    result = evaluate_value(check, *key)
+                    memo[key] = result
+                failed[position] += result[0]
+                if result[1] is not None:
+                    messages[position].append(result[1])
+        return failed, messages
+
+    def evaluate(self, dump: PropertyDump) -> list[ElementResult]:
+        """ one result per element of the dump, in the order of the dump"""
+        results: dict[str, ElementResult] = dict()
+        containers = dump.columns.get("cpIsContainer", dict())
+        composites = dump.columns.get("cpIsComposite", dict())
+        for obj, elements in self.assign(dump).items():
+            checks = self.checks[obj]
+            tested = list()
+            for element in elements:
+                if is_true(containers.get(element)) and not is_true(composites.get(element)):
+                    results[element] = ElementResult(element, obj.name, IGNORED, 0, 0, ("Container was ignored.",))
+                else:
+                    tested.append(element)
+            failed, messages = self.evaluate_object(checks, tested, dump)
+            count = len(checks)
+            for element, failed_count, element_messages in zip(tested, failed, messages):
+                if failed_count == count:
+                    state = FAILED
+                    element_messages.append("Keine der geforderten Eigenschaften vorhanden!")
+                elif failed_count == 0:
+                    state = PASSED
+                else:
+                    state = WARNING
+                results[element] = ElementResult(element, obj.name, state, count, failed_count,
+                                                 tuple(element_messages))
+
+        return [results.get(element, ElementResult(element, None, UNTESTED, 0, 0, ())) for element in
+                dump.elements]
+
+
+def summary(results: Iterable[ElementResult]) -> dict[str, int]:
+    counts = {state: 0 for state in (PASSED, WARNING, FAILED, IGNORED, UNTESTED)}
+    for result in results:
+        counts[result.state] += 1
+    return counts
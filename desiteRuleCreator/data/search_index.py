@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Iterable
+
+from desiteRuleCreator.data import classes
+
+WORD_START = "\x02"  # marks the beginning of a word, so one and two letter queries match word prefixes
+WORD_PATTERN = re.compile(r"\w+")
+SEARCH_LIMIT = 200
+KIND_ORDER = {classes.Object: 0, classes.PropertySet: 1, classes.Attribute: 2}
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def grams_of(term: str) -> set[str]:
+    grams = trigrams(term)
+    for word in WORD_PATTERN.findall(term):
+        grams.add(WORD_START * 2 + word[0])
+        if len(word) > 1:
+            grams.add(WORD_START + word[:2])
+    return grams
+
+
+def terms_of(item: classes.Hirarchy) -> set[str]:
+    """ searchable texts of an item: names of Objects and PropertySets, name and values of Attributes"""
+    texts = [item.name]
+    if isinstance(item, classes.Attribute):
+        texts += [str(value) for value in item.value]
+    return {text.lower() for text in texts if text}
+
+
+class SearchIndex(object):
+    """ Inverted index from lowercase texts to items plus a trigram index from grams to texts
+
+    The index is kept up to date through Hirarchy.notify, so a query never walks the registries. A query word
+    with three or more letters matches anywhere inside a text, shorter words match the beginning of a word.
+    """
+
+    def __init__(self) -> None:
+        self._terms: dict[classes.Hirarchy, set[str]] = dict()
+        self._items: dict[str, set[classes.Hirarchy]] = defaultdict(set)
+        self._grams: dict[str, set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def attach(self) -> None:
+        if self.update not in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.append(self.update)
+
+    def detach(self) -> None:
+        if self.update in classes.Hirarchy.observers:
+            classes.Hirarchy.observers.remove(self.update)
+
+    def clear(self) -> None:
+        self._terms.clear()
+        self._items.clear()
+        self._grams.clear()
+
+    def rebuild(self) -> None:
+        self.clear()
+        for obj in classes.Object:
+            self.add(obj)
+            for property_set in obj.property_sets:
+                self.add(property_set)
+                for attribute in property_set.attributes:
+                    self.add(attribute)
+        for property_set in classes.PropertySet:
+            if property_set.is_predefined:
+                self.add(property_set)
+                for attribute in property_set.attributes:
+                    self.add(attribute)
+
+    def update(self, item: classes.Hirarchy, removed: bool = False) -> None:
+        self.remove(item)
+        if not removed:
+            self.add(item)
+
+    def add(self, item: classes.Hirarchy) -> None:
+        terms = terms_of(item)
+        self._terms[item] = terms
+        for term in terms:
+            items = self._items[term]
+            if not items:
+                for gram in grams_of(term):
+                    self._grams[gram].add(term)
+            items.add(item)
+
+    def remove(self, item: classes.Hirarchy) -> None:
+        for term in self._terms.pop(item, ()):
+            items = self._items[term]
+            items.discard(item)
+            if items:
+                continue
+            del self._items[term]
+            for gram in grams_of(term):
+                terms = self._grams[gram]
+                terms.discard(term)
+                if not terms:
+                    del self._grams[gram]
+
+    def matching_terms(self, word: str) -> Iterable[str]:
+        if len(word) == 1:
+            return self._grams.get(WORD_START * 2 + word, ())
+        if len(word) == 2:
+            return self._grams.get(WORD_START + word, ())
+
+        term_sets = list()
+        for gram in trigrams(word):
+            terms = self._grams.get(gram)
+            if not terms:
+                return ()
+            term_sets.append(terms)
+        term_sets.sort(key=len)
+        candidates = term_sets[0].intersection(*term_sets[1:])
+        return [term for term in candidates if word in term]
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> list[classes.Hirarchy]:
+        """ items matching every word of text. Shorter texts rank first, so exact matches come before the rest.
+        The items are collected along the sorted texts of the most selective word, which allows stopping early"""
+
+        term_lists = [self.matching_terms(word) for word in set(text.lower().split())]
+        if not term_lists:
+            return list()
+        term_lists.sort(key=lambda terms: sum(len(self._items[term]) for term in terms))
+
+        allowed = None
+        for terms in term_lists[1:]:
+            items = set().union(*(self._items[term] for term in terms))
+            allowed = items if allowed is None else allowed & items
+            if not allowed:
+                return list()
+
+        hits = dict()
+        for term in sorted(term_lists[0], key=lambda term: (len(term), term)):
+            for item in sorted(self._items[term], key=sort_key):
+                if allowed is None or item in allowed:
+                    hits[item] = None
+            if len(hits) >= limit:
+                break
+        return list(hits)[:limit]
+
+
+def sort_key(item: classes.Hirarchy) -> tuple[int, str]:
+    return KIND_ORDER[type(item)], item.name.lower()
+
+
+def describe(item: classes.Hirarchy) -> str:
+    """ text for the search results: Object, Object : PropertySet or Object : PropertySet : Attribute = Value"""
+    if isinstance(item, classes.Object):
+        return item.name
+    if isinstance(item, classes.Attribute):
+        return f"{describe(item.property_set)} : {item.name} = {'|'.join(str(v) for v in item.value)}"
+    if item.object is None:
+        return f"Predefined Pset : {item.name}"
+    return f"{item.object.name} : {item.name}"
+
+
+def object_of(item: classes.Hirarchy) -> classes.Object | None:
+    if isinstance(item, classes.Attribute):
+        item = item.property_set
+    if isinstance(item, classes.PropertySet):
+        item = item.object
+    return item
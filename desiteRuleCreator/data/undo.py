@@ -0,0 +1,492 @@
+from __future__ import annotations
+
+import sys
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+from desiteRuleCreator.data import classes, constants
+
+
+def size_of(value) -> int:
+    """ rough memory estimate of an Attribute value, the items themselves are counted one level deep"""
+    size = sys.getsizeof(value)
+    if isinstance(value, list):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class Change(object):
+    """ Inverse-able step on the data model. Only the changed fields are stored, never a copy of the project"""
+    __slots__ = ()
+
+    def redo(self) -> None:
+        raise NotImplementedError
+
+    def undo(self) -> None:
+        raise NotImplementedError
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self)
+
+
+class NameChange(Change):
+    __slots__ = ("item", "new", "old_names")
+
+    def __init__(self, item: classes.Hirarchy, new: str) -> None:
+        self.item = item
+        self.new = new
+        # Hirarchy.name passes the name on to the children, so their names have to be restored as well
+        old_names = list()
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            old_names.append((node, node.name))
+            stack.extend(node.children)
+        self.old_names = tuple(old_names)
+
+    def redo(self) -> None:
+        self.item.name = self.new
+
+    def undo(self) -> None:
+        for node, name in self.old_names:
+            node._name = name
+            node.changed = True
+            node.notify()
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.old_names) + sum(
+            sys.getsizeof(name) for _, name in self.old_names)
+
+
+class ValueChange(Change):
+    __slots__ = ("attribute", "old", "new")
+
+    def __init__(self, attribute: classes.Attribute, new: list) -> None:
+        self.attribute = attribute
+        self.old = attribute.value
+        self.new = new
+
+    def redo(self) -> None:
+        self.attribute.assign_value(self.new)
+
+    def undo(self) -> None:
+        self.attribute.assign_value(self.old)
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self) + size_of(self.old) + size_of(self.new)
+
+
+class ParentChange(Change):
+    __slots__ = ("obj", "old", "new")
+
+    def __init__(self, obj: classes.Object, old: classes.Object | None, new: classes.Object | None) -> None:
+        self.obj = obj
+        self.old = old
+        self.new = new
+
+    @staticmethod
+    def move(obj: classes.Object, parent: classes.Object | None) -> None:
+        if obj.parent is not None and obj in obj.parent.children:
+            obj.parent.children.remove(obj)
+        if parent is None:
+            obj.parent = None
+        else:
+            parent.add_child(obj)
+
+    def redo(self) -> None:
+        self.move(self.obj, self.new)
+
+    def undo(self) -> None:
+        self.move(self.obj, self.old)
+
+
+class FieldChange(Change):
+    """ plain property of an item, like Attribute.value_type or Script.code"""
+    __slots__ = ("item", "field", "old", "new")
+
+    def __init__(self, item, field: str, new) -> None:
+        self.item = item
+        self.field = field
+        self.old = getattr(item, field)
+        self.new = new
+
+    def redo(self) -> None:
+        setattr(self.item, self.field, self.new)
+
+    def undo(self) -> None:
+        setattr(self.item, self.field, self.old)
+
+
+class AggregationChange(Change):
+    __slots__ = ("obj", "child", "added")
+
+    def __init__(self, obj: classes.Object, child: classes.Object, added: bool) -> None:
+        self.obj = obj
+        self.child = child
+        self.added = added
+
+    def set(self, added: bool) -> None:
+        if added:
+            self.obj.add_aggregation(self.child)
+        elif self.child in self.obj.aggregates_to:
+            self.obj.remove_aggregation(self.child)
+
+    def redo(self) -> None:
+        self.set(self.added)
+
+    def undo(self) -> None:
+        self.set(not self.added)
+
+
+def link(item: classes.Hirarchy, parent: classes.Hirarchy | None) -> None:
+    """ restore an inheritance link without the side effects of Hirarchy.add_child"""
+    if parent is not None and item not in parent.children:
+        parent.children.append(item)
+    item._parent = parent
+
+
+def unlink(item: classes.Hirarchy) -> None:
+    if item.parent is not None and item in item.parent.children:
+        item.parent.children.remove(item)
+
+
+def with_descendants(item: classes.Hirarchy) -> list[classes.Hirarchy]:
+    """ item and everything inheriting from it, parents before their children. Every item is visited once, even if
+    it is reachable over more than one parent"""
+    items = {item: None}
+    queue = deque([item])
+    while queue:
+        for child in queue.popleft().children:
+            if child not in items:
+                items[child] = None
+                queue.append(child)
+    return list(items)
+
+
+def register(item: classes.Hirarchy) -> None:
+    if item not in item._registry:
+        item._registry.append(item)
+
+
+def unregister(item: classes.Hirarchy) -> None:
+    if item in item._registry:
+        item._registry.remove(item)
+
+
+class PropertySetChange(Change):
+    """ base for adding and removing a PropertySet of an Object, including its link to a parent PropertySet.
+    Predefined PropertySets have no Object"""
+    __slots__ = ("obj", "property_set", "parent", "row")
+
+    def __init__(self, obj: classes.Object | None, property_set: classes.PropertySet) -> None:
+        self.obj = obj
+        self.property_set = property_set
+        self.parent = property_set.parent
+        self.row = None
+        if obj is not None and property_set in obj.property_sets:
+            self.row = obj.property_sets.index(property_set)
+
+    def attach(self) -> None:
+        property_set = self.property_set
+        register(property_set)
+        if self.parent is not None and property_set not in self.parent.children:
+            self.parent.add_child(property_set)
+        if self.obj is not None:
+            row = len(self.obj.property_sets) if self.row is None else self.row
+            self.obj.property_sets.insert(row, property_set)
+            property_set.object = self.obj
+        property_set.notify()
+
+    def detach(self) -> None:
+        if self.property_set.is_child:
+            self.property_set.parent.remove_child(self.property_set)
+        else:
+            self.property_set.delete()
+        if self.obj is not None:
+            self.obj.remove_property_set(self.property_set)
+
+
+class PropertySetAdded(PropertySetChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.attach()
+
+    def undo(self) -> None:
+        self.detach()
+
+
+class PropertySetRemoved(PropertySetChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.detach()
+
+    def undo(self) -> None:
+        self.attach()
+
+
+class ScriptChange(Change):
+    """ base for adding and removing a Script, it keeps its position in the script list of the Object"""
+    __slots__ = ("script", "obj", "row")
+
+    def __init__(self, script: classes.Script) -> None:
+        self.script = script
+        self.obj = script.object
+        scripts = self.obj.scripts
+        self.row = scripts.index(script) if script in scripts else None
+
+    def attach(self) -> None:
+        if self.script not in self.obj.scripts:
+            row = len(self.obj.scripts) if self.row is None else self.row
+            self.obj.scripts.insert(row, self.script)
+
+    def detach(self) -> None:
+        if self.script in self.obj.scripts:
+            self.obj.delete_script(self.script)
+
+
+class ScriptAdded(ScriptChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.attach()
+
+    def undo(self) -> None:
+        self.detach()
+
+
+class ScriptRemoved(ScriptChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.detach()
+
+    def undo(self) -> None:
+        self.attach()
+
+
+class AttributeChange(Change):
+    """ base for adding and removing an Attribute which isn't inherited by other Attributes. Inherited Attributes
+    get a change of their own, see with_descendants"""
+    __slots__ = ("attribute", "property_set", "parent", "row")
+
+    def __init__(self, attribute: classes.Attribute) -> None:
+        self.attribute = attribute
+        self.property_set = attribute.property_set
+        self.parent = attribute.parent
+        attributes = self.property_set.attributes
+        self.row = attributes.index(attribute) if attribute in attributes else None
+
+    def attach(self) -> None:
+        attribute = self.attribute
+        register(attribute)
+        link(attribute, self.parent)
+        row = len(self.property_set.attributes) if self.row is None else self.row
+        self.property_set.attributes.insert(row, attribute)
+        self.property_set.changed = True
+        attribute.notify()
+
+    def detach(self) -> None:
+        attribute = self.attribute
+        unlink(attribute)
+        unregister(attribute)
+        if attribute in self.property_set.attributes:
+            self.property_set.attributes.remove(attribute)
+        self.property_set.changed = True
+        attribute.notify(removed=True)
+
+
+class AttributeAdded(AttributeChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.attach()
+
+    def undo(self) -> None:
+        self.detach()
+
+
+class AttributeRemoved(AttributeChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.detach()
+
+    def undo(self) -> None:
+        self.attach()
+
+
+class ObjectChange(Change):
+    """ base for adding and removing an Object together with its PropertySets and Attributes. The Object must not
+    have children or aggregations, those are separate changes"""
+    __slots__ = ("obj", "parent", "links")
+
+    def __init__(self, obj: classes.Object) -> None:
+        self.obj = obj
+        self.parent = obj.parent
+        self.links = tuple((item, item.parent) for item in self.items())
+
+    def items(self) -> Iterator[classes.Hirarchy]:
+        for property_set in self.obj.property_sets:
+            yield property_set
+            yield from property_set.attributes
+
+    def attach(self) -> None:
+        register(self.obj)
+        link(self.obj, self.parent)
+        for item, parent in self.links:
+            register(item)
+            link(item, parent)
+        classes.Object.aggregation_graph = None
+        self.obj.notify()
+        for item in self.items():
+            item.notify()
+
+    def detach(self) -> None:
+        for item, _ in self.links:
+            unlink(item)
+            unregister(item)
+            item.notify(removed=True)
+        unlink(self.obj)
+        unregister(self.obj)
+        classes.Object.aggregation_graph = None
+        self.obj.notify(removed=True)
+
+
+class ObjectAdded(ObjectChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.attach()
+
+    def undo(self) -> None:
+        self.detach()
+
+
+class ObjectRemoved(ObjectChange):
+    __slots__ = ()
+
+    def redo(self) -> None:
+        self.detach()
+
+    def undo(self) -> None:
+        self.attach()
+
+
+class Command(object):
+    """ one user action, its changes are undone in reverse order"""
+    __slots__ = ("text", "changes", "size")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.changes: list[Change] = list()
+        self.size = sys.getsizeof(self)
+
+    def add(self, change: Change) -> None:
+        self.changes.append(change)
+        self.size += change.size + 8  # list slot
+
+    def redo(self) -> None:
+        for change in self.changes:
+            change.redo()
+
+    def undo(self) -> None:
+        for change in reversed(self.changes):
+            change.undo()
+
+
+class UndoStack(object):
+    """ Command based undo history with a maximum number of steps and an estimated memory limit
+
+    Changes pushed while a record() block is open are grouped into one Command, so a bulk edit is undone in one
+    step. Undoing costs O(number of changes) of the Command.
+    """
+
+    def __init__(self, max_depth: int = constants.UNDO_DEPTH, max_memory: int = constants.UNDO_MEMORY) -> None:
+        self.max_depth = max_depth
+        self.max_memory = max_memory
+        self._undo: deque[Command] = deque()
+        self._redo: list[Command] = list()
+        self._memory = 0
+        self._recording: Command | None = None
+        self._record_depth = 0
+
+    @property
+    def memory(self) -> int:
+        return self._memory
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self._memory = 0
+
+    @contextmanager
+    def record(self, text: str) -> Iterator[UndoStack]:
+        if self._record_depth == 0:
+            self._recording = Command(text)
+        self._record_depth += 1
+        try:
+            yield self
+        finally:
+            self._record_depth -= 1
+            if self._record_depth == 0:
+                command, self._recording = self._recording, None
+                if command.changes:
+                    self.push_command(command)
+
+    def push(self, change: Change, text: str = "") -> None:
+        """ store a change that has already been applied"""
+        if self._recording is not None:
+            self._recording.add(change)
+            return
+        command = Command(text)
+        command.add(change)
+        self.push_command(command)
+
+    def apply(self, change: Change, text: str = "") -> None:
+        change.redo()
+        self.push(change, text)
+
+    def push_command(self, command: Command) -> None:
+        self._undo.append(command)
+        self._memory += command.size
+        for redo_command in self._redo:
+            self._memory -= redo_command.size
+        self._redo.clear()
+        self.trim()
+
+    def trim(self) -> None:
+        while self._undo and (len(self._undo) > self.max_depth or self._memory > self.max_memory):
+            self._memory -= self._undo.popleft().size
+
+    def undo(self) -> Command | None:
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.undo()
+        self._redo.append(command)
+        return command
+
+    def redo(self) -> Command | None:
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.redo()
+        self._undo.append(command)
+        return command
@@ -4,15 +4,16 @@ import copy
 import sys,os,logging,logging.config
 
 from PySide6 import QtCore, QtGui
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QCompleter,QDialog
+from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QDialog
 
 from desiteRuleCreator import icons
-from desiteRuleCreator.Filehandling import open_file, desite_export, excel,save_file
+from desiteRuleCreator.Filehandling import open_file, desite_export, excel,save_file, graph_export, merge, \
+    export_pipeline, property_dump
 from desiteRuleCreator.QtDesigns import ui_project_settings
 from desiteRuleCreator.QtDesigns.ui_mainwindow import Ui_MainWindow
 from desiteRuleCreator.Widgets import script_widget, property_widget, object_widget
 from desiteRuleCreator.Windows import predefined_psets_window,graphs_window
-from desiteRuleCreator.data import classes
+from desiteRuleCreator.data import classes, identifiers, merkle
 from desiteRuleCreator.data.classes import Object, PropertySet
 from desiteRuleCreator import logs
 
@@ -50,23 +51,28 @@ class MainWindow(QMainWindow):
 
         # init object and ProertyWidget
         object_widget.init(self)
-        property_widget.init(self)
         script_widget.init(self)
+        property_widget.init(self)
 
         # connect Menubar signals
         self.ui.action_file_Open.triggered.connect(self.open_file_dialog)
         self.ui.action_file_new.triggered.connect(self.new_file)
         self.ui.action_file_Save.triggered.connect(self.save_clicked)
         self.ui.action_file_Save_As.triggered.connect(self.save_as_clicked)
+        self.ui.action_file_compare.triggered.connect(self.compare_file)
         self.ui.action_desite_export.triggered.connect(self.export_desite_rules)
+        self.ui.action_desite_export_dispatcher.triggered.connect(self.export_desite_dispatcher)
         self.ui.action_show_list.triggered.connect(self.open_pset_list)
         self.ui.action_settings.triggered.connect(self.open_settings)
         self.ui.action_export_bs.triggered.connect(self.export_bs)
         self.ui.action_export_bookmarks.triggered.connect(self.export_bookmarks)
         self.ui.action_export_boq.triggered.connect(self.export_boq)
+        self.ui.action_export_all.triggered.connect(self.export_all)
+        self.ui.action_check_dump.triggered.connect(self.check_property_dump)
         self.ui.action_show_graphs.triggered.connect(self.open_graph)
+        self.ui.action_export_graphs.triggered.connect(self.export_graphs)
 
-        self.ui.code_edit.textChanged.connect(self.update_script)
+        self.ui.code_edit.editing_paused.connect(self.update_script)
         self.ui.tree.resizeColumnToContents(0)
         self.save_path = None
 
@@ -95,6 +101,9 @@ class MainWindow(QMainWindow):
     def export_desite_rules(self):
         desite_export.export_modelcheck(self)
 
+    def export_desite_dispatcher(self):
+        desite_export.export_modelcheck(self, dispatcher=True)
+
     def closeEvent(self, event):
         action = save_file.close_event(self, event)
 
@@ -128,8 +137,11 @@ class MainWindow(QMainWindow):
     def open_file_dialog(self, path=False):
         open_file.open_file_dialog(self, path)
 
-    def merge_new_file(self):
-        open_file.merge_new_file(self)
+    def merge_new_file(self, path=""):
+        merge.merge_new_file(self, path)
+
+    def compare_file(self):
+        merge.compare_file(self)
 
     def open_pset_menu(self,position):
         property_widget.open_menu(self,position)
@@ -159,6 +171,12 @@ class MainWindow(QMainWindow):
         classes.Object._registry = list()
         classes.PropertySet._registry = list()
         classes.Attribute._registry= list()
+        classes.Object.aggregation_graph = None
+        identifiers.reset()
+        merkle.reset()
+        self.pset_name_model.rebuild()
+        self.undo_stack.clear()
+        self.search_index.clear()
 
     # ObjectWidget
     def reload_objects(self):
@@ -182,10 +200,20 @@ class MainWindow(QMainWindow):
     def multi_selection(self):
         object_widget.multi_selection(self)
 
+    def apply_multi_selection(self):
+        object_widget.apply_multi_selection(self)
+
+    def object_moved(self, obj: Object, old_parent: Object, new_parent: Object):
+        object_widget.object_moved(self, obj, old_parent, new_parent)
+
+    def undo(self):
+        object_widget.undo_step(self)
+
+    def redo(self):
+        object_widget.undo_step(self, redo=True)
+
     def update_completer(self):
-        completer = QCompleter(property_widget.predefined_pset_list(self), self)
-        self.ui.lineEdit_ident_pSet.setCompleter(completer)
-        self.ui.lineEdit_pSet_name.setCompleter(completer)
+        property_widget.update_completer(self)
 
     def object_clicked(self, item):
         object_widget.single_click(self, item)
@@ -205,7 +233,13 @@ class MainWindow(QMainWindow):
     def add_object(self):
         object_widget.add_object(self)
 
-    def add_object_to_tree(self, obj: Object, parent=None):
+    def search(self, text: str):
+        object_widget.search(self, text)
+
+    def search_result_activated(self, index: QtCore.QModelIndex):
+        object_widget.search_result_activated(self, index)
+
+    def add_object_to_tree(self, obj: Object, parent: Object = None):
         return object_widget.add_object_to_tree(self, obj, parent)
 
     def delete_object(self):
@@ -281,6 +315,9 @@ class MainWindow(QMainWindow):
     def open_graph(self):
         self.load_graph(True)
 
+    def export_graphs(self):
+        graph_export.export_graphs(self)
+
     def load_graph(self, show=True):
 
         if self.graph_window is None:
@@ -294,6 +331,12 @@ class MainWindow(QMainWindow):
     def export_boq(self):
         desite_export.export_boq(self)
 
+    def export_all(self):
+        export_pipeline.export_all(self)
+
+    def check_property_dump(self):
+        property_dump.check_property_dump(self)
+
 def main():
     start_log()
     global app
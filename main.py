@@ -1,3 +1,5 @@
+import multiprocessing
+
 from desiteRuleCreator.main_window import main as run_main
 
 
@@ -7,4 +9,5 @@ def main():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # worker processes of the JavaScript syntax check in the frozen build
     main()
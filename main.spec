@@ -9,7 +9,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('desiteRuleCreator/Template','desiteRuleCreator/Template'),('desiteRuleCreator/icons','desiteRuleCreator/icons'),('desiteRuleCreator/logs','desiteRuleCreator/logs')],
-    hiddenimports=['jinja2','lxml',],
+    hiddenimports=['jinja2','lxml','esprima',],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,45 @@
+""" tests of the parts which have to behave like the JavaScript running in Desite, they compare with node
+
+    python -m pytest tests
+
+Tests which need node are skipped if it isn't installed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from typing import Any, Callable
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def node() -> Callable[[str, Any], Any]:
+    """ runs a node script, data is available as the global `data` and the script prints its result as JSON"""
+    executable = shutil.which("node")
+    if executable is None:
+        pytest.skip("node is not installed")
+
+    def run(script: str, data: Any = None) -> Any:
+        source = f"const data = {json.dumps(data)};\n{script}"  # over stdin, the data doesn't fit in an argument
+        result = subprocess.run([executable], input=source, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+
+    return run
+
+
+@pytest.fixture()
+def application():
+    from PySide6.QtWidgets import QApplication
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(scope="session")
+def main_window():
+    from PySide6.QtWidgets import QApplication
+    from desiteRuleCreator.main_window import MainWindow
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return MainWindow(QApplication.instance() or QApplication([]))
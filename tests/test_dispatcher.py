@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from desiteRuleCreator import Template
+from desiteRuleCreator.Filehandling import desite_export
+from desiteRuleCreator.data import classes, constants
+
+RUN = """
+var messages = [];
+var desiteThis = {ID: function () { return 1 }};
+var desiteResult = {setCheckState: function () {}, addMessage: function (message) { messages.push(message) }};
+var desiteAPI = {getPropertyValue: function (id, name) { return name == 'Allgemein:Code' ? 'C0' : undefined },
+                 setPropertyValue: function () {}};
+function check_list() { return 0 }
+(function () { eval(data) })();
+console.log(JSON.stringify(messages));
+"""
+
+
+def test_broken_scripts_only_disable_themselves(node, application):
+    property_set = classes.PropertySet("Allgemein")
+    ident = classes.Attribute(property_set, "Code", ["C0"], constants.LIST)
+    obj = classes.Object("O", ident)
+    obj.add_property_set(property_set)
+    for name, code in [("syntax", "var a = ;"), ("throws", "null.x;"), ("ok", "desiteResult.addMessage('ok ran');")]:
+        classes.Script(name, obj).code = code
+    try:
+        script = desite_export.render_dispatcher(desite_export.load_template(Template.DISPATCHER_TEMPLATE), [obj])
+        messages = node(RUN, script)
+    finally:
+        obj.delete()
+    assert messages[-1] == "ok ran"
+    assert messages[0].startswith("Script syntax nicht ausgeführt: SyntaxError")
+    assert messages[1].startswith("Script throws abgebrochen: TypeError")
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from desiteRuleCreator.data import js_lint
+
+
+@pytest.mark.parametrize("code", [
+    "var r = /'/; var y = 1 2; var z = /'/;",  # the regex literals would read as one string
+    "var t = `it's`; var y = 1 2; var s = 'x';",  # the template literal would start a string
+    "var r = /\\//; var y = 1 2;",  # the regex literal would start a line comment
+    'var a = "\\x";',
+    "var b = 1.5.3;",
+])
+def test_literals_dont_hide_errors(code):
+    assert js_lint.parse(code) is not None
+    assert js_lint.check(code) == js_lint.parse(code)
+
+
+@pytest.mark.parametrize("code", [None, "", "var r = /'/; var z = /'/;", "var t = `${1 / 2}`;", "return 5"])
+def test_valid_scripts(code):
+    assert js_lint.check(code) is None
+
+
+def test_scripts_share_shapes():
+    codes = [f"var a = 'value {number}'; var b = {number};" for number in range(5)]
+    assert len({js_lint.shape_of(code) for code in codes}) == 1
+    assert js_lint.check_all(codes) == [None] * len(codes)
+    assert js_lint.shape_of("var a = b / c;") is None
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from desiteRuleCreator.data import rule_compiler
+
+JS_VALID = [r"^\d{5}$", r"[A-Z]{2}\d{3}", r"(?<n>a)\k<n>", r"(?<$a>x)", r"(a)\1", r"(a)\2", r"\8", r"\12", r"a{", r"a{,5}",
+            r"}", r"]", r"[]", r"[^]", r"[\d-z]", r"\x4", r"\u12", r"\c1", r"\k", r"\q", r"\A\d+\Z", r"(?=a)*", r"x/y",
+            r"(?:)", r"a{2}?", r"((a)|b)\2", "a\nb"]
+JS_INVALID = [r"(?#c)abc", r"(?(1)b|c)", r"(?P<n>a)", r"(?i)abc", r"(?>a)", r"a*+", r"a**", r"*a", r"(?<=a)*", r"^*",
+              r"a{2,1}", r"x{1}{2}", r"[z-a]", r"(?<n>a)\k", r"(?<n>a)\k<m>", r"(?<n>a)(?<n>b)", r"(?<1a>x)", r"(",
+              r")", r"(?", "\\", r"[a", r"\B*"]
+VALUES = ["aa", "bb", "ab", "xx", "yy", "12345", "AB123", "ab123", "a{", "x/y", "\x0a", "\n", "", "Zz"]
+
+
+def test_javascript_syntax(node):
+    errors = node("console.log(JSON.stringify(data.map(p => { try { new RegExp(p, 'i'); return null }"
+                  " catch (e) { return e.message } })))", JS_VALID + JS_INVALID)
+    assert errors[:len(JS_VALID)] == [None] * len(JS_VALID)
+    assert None not in errors[len(JS_VALID):]
+    for pattern in JS_VALID:
+        assert rule_compiler.validate_pattern(pattern) is None, pattern
+    for pattern in JS_INVALID:
+        assert rule_compiler.validate_pattern(pattern) is not None, pattern
+
+
+@pytest.mark.parametrize("patterns", [JS_VALID, JS_INVALID + [r"^\d{5}$"], [r"(a)\1", r"(b)\1"],
+                                      [r"(?<n>x)\k<n>", r"(?<n>y)\k<n>"], [r"\12", r"(a)(b)(c)"], JS_INVALID])
+def test_literal_matches_like_javascript(node, patterns):
+    """ the emitted literal has to be parsed by JavaScript and the merged regex has to match like its patterns"""
+    compiled = rule_compiler.compile_format(patterns)
+    results = node("console.log(JSON.stringify(data.values.map(v => { const r = eval(data.literal);"
+                   " return r === null ? null : r.test(v) })))", {"literal": compiled.literal(), "values": VALUES})
+    if compiled.source is None:
+        assert results == [None] * len(VALUES)
+    else:
+        assert results == [compiled.test(value) for value in VALUES]
+    assert len(compiled.errors) == sum(pattern in JS_INVALID for pattern in patterns)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import random
+
+from desiteRuleCreator import Template
+from desiteRuleCreator.data import constants, rule_engine
+from desiteRuleCreator.data.rule_compiler import compile_range
+
+NUMBERS = ["0", "1", "2,5", "3", "4", "4.5", "5", "7", "10", "-1", "", "abc", "1e1", " 6", "0x5", "2abc", "Infinity"]
+VALUES = [value for value in NUMBERS if value] + ["8", "5.0", "-0", "  "]
+
+# the loops check_range ran before the compiled bounds, still used when no compiled range is passed
+LOOP = """
+function loop_hits(value, range) {
+    var treffer = check_for_single(value, range);
+    for (var i = 0; i < range.length; i++) {
+        var untere_grenze = parseFloat(range[i][0].replace(",", "."));
+        var obere_grenze = parseFloat(range[i][1].replace(",", "."));
+        if (value >= untere_grenze && value <= obere_grenze) {
+            treffer += 1
+        }
+    }
+    return treffer
+}
+var messages = [];
+var id = 1;
+var desiteResult = {addMessage: function (message) { messages.push(message) }};
+var desiteAPI = {getPropertyUnit: function () { return "" }};
+console.log(JSON.stringify(data.ranges.map(function (range) {
+    var hits = [];
+    for (var k = 0; k < data.values.length; k++) {
+        var text = data.values[k];
+        desiteAPI.getPropertyValue = function () { return text };
+        messages = [];
+        var failed = check_range("R", "P:", "xs:string", range);
+        hits.push([loop_hits(text, range), loop_hits(Number(text), range), failed, messages[0] || null]);
+    }
+    return hits
+})));
+"""
+
+
+def random_ranges(count: int) -> list[tuple[tuple[str, ...], ...]]:
+    """ pairs with a single entry are left out, the loop above fails on them"""
+    rng = random.Random(47)
+    ranges = list()
+    for _ in range(count):
+        pairs = (tuple(rng.choice(NUMBERS) for _ in range(rng.choice([2, 2, 2, 1, 3]))) for _ in
+                 range(rng.randint(0, 4)))
+        ranges.append(tuple(pair for pair in pairs if len(pair) >= 2))
+    return ranges
+
+
+def test_hits_like_the_loop(node):
+    with open(os.path.join(Template.HOME_DIR, constants.FILEPATH_JS, "start_check_range.js"), encoding="utf-8") as f:
+        script = f.read()
+    ranges = random_ranges(300)
+    results = node(script + LOOP, {"ranges": ranges, "values": VALUES})
+    for pairs, hits in zip(ranges, results):
+        compiled = compile_range(pairs)
+        check = rule_engine.Check("P:R", constants.RANGE, "xs:string", pairs)
+        for value, (text_hits, number_hits, failed, message) in zip(VALUES, hits):
+            assert compiled.hits(value) == text_hits, (pairs, value)
+            assert compiled.hits(rule_engine.to_number(value)) == number_hits, (pairs, value)
+            assert rule_engine.evaluate_value(check, value, None) == (failed, message), (pairs, value)
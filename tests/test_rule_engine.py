@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from lxml import etree
+
+from desiteRuleCreator.Filehandling import desite_export
+from desiteRuleCreator.data import classes, constants, rule_engine
+
+# runs the exported checkruns for every element like Desite does, with the element properties as mock API
+RUN = """
+const vm = require("vm");
+const results = [];
+for (const {props, types} of data.elements) {
+    const log = [];
+    const type_of = name => types[name] || (typeof props[name] == "boolean" ? "xs:boolean" : null);
+    const context = {
+        desiteThis: {ID: () => "element"},
+        desiteAPI: {
+            getPropertyUnit: () => "",
+            getPropertyTypeListByObject: (id, name) => name in props ? [{DataType: type_of(name) || "xs:string"}] : [],
+            getPropertyValue: (id, name, format) => {
+                if (!(name in props) || (type_of(name) && type_of(name) != format)) return undefined;
+                if (format == "xs:double") {
+                    const number = Number(props[name]);
+                    return isNaN(number) ? undefined : number;
+                }
+                return props[name];
+            },
+            setPropertyValue: (id, name, format, value) => log.push(["set", name, value])},
+        desiteResult: {setCheckState: state => log.push(["state", state]), addMessage: text => log.push(["msg", text])},
+    };
+    vm.createContext(context);
+    for (const [filter, codes] of data.checkruns) {
+        if (filter && props[filter[0]] !== filter[1]) continue;
+        for (const code of codes) vm.runInContext(code, context);
+    }
+    results.push(log.filter(entry => !(entry[0] == "set" && entry[2] == "Ungeprüft")));
+}
+console.log(JSON.stringify(results));
+"""
+
+POOL = {
+    "Allgemein:A": ["v", "x", "q", "v,x", "v, q", "x/y z", "y z", " v", "v/"],
+    "Allgemein:E": ["1", "abc"],
+    "Allgemein:R": ["3", "4.5", "4,5", "9", "11", "10,5", "0", "7", "abc", "2abc", "25", "-1", " 6", "1e1", "0x5"],
+    "Allgemein:D": ["50", "150", "abc"],
+    "Allgemein:F": ["12", "ab", "x"],
+    "Name": ["n", "m"],
+}
+
+
+@pytest.fixture()
+def objects(application):
+    objects = list()
+    for number in range(4):
+        property_set = classes.PropertySet("Allgemein")
+        ident = classes.Attribute(property_set, "Code", [f"C{number}"], constants.LIST)
+        obj = classes.Object(f"O{number}", ident)
+        obj.add_property_set(property_set)
+        classes.Attribute(property_set, "A", ["v", "x", "y z"], constants.LIST)
+        classes.Attribute(property_set, "E", [], constants.LIST)
+        ranges = [["1", "5"], ["4", "8"], ["10,5", "12"]] if number % 2 else [["0", "3"], ["", "7"], ["20", ""]]
+        classes.Attribute(property_set, "R", ranges, constants.RANGE)
+        classes.Attribute(property_set, "D", [["0", "100"]], constants.RANGE).data_type = "xs:double"
+        classes.Attribute(property_set, "F", ["^\\d+$", "ab"], constants.FORMAT)
+        ignored = classes.PropertySet(constants.IGNORE_PSET)
+        obj.add_property_set(ignored)
+        classes.Attribute(ignored, "Name", ["n"], constants.LIST)
+        objects.append(obj)
+    yield objects
+    for obj in objects:
+        obj.delete()
+
+
+def random_elements(count: int) -> list[dict]:
+    rng = random.Random(46)
+    elements = list()
+    for _ in range(count):
+        props = {"Allgemein:Code": rng.choice(["C0", "C1", "C2", "C3", "ZZ"])}
+        types = dict()
+        for name, values in POOL.items():
+            if rng.random() < 0.8:
+                props[name] = rng.choice(values)
+                if rng.random() < 0.05:
+                    types[name] = "xs:int"
+        if rng.random() < 0.05:
+            props["cpIsContainer"] = True
+            props["cpIsComposite"] = False
+        elements.append({"props": props, "types": types})
+    return elements
+
+
+def exported_checkruns(path: str) -> list[tuple[tuple[str, str] | None, list[str]]]:
+    """ (filter, rule scripts) of every checkrun in the order Desite runs them"""
+    root = etree.parse(path).getroot()
+    filters = dict()
+    for data in root.iter("checkRunData"):
+        xml_filter = data.find("filterList/filter")
+        filters[data.get("refID")] = None if xml_filter is None else (
+            xml_filter.get("name"), xml_filter.get("pattern").strip('"'))
+    checkruns = list()
+    for checkrun in root.iter("checkrun"):
+        codes = [script.find("code").text for script in checkrun.iter("ruleScript")
+                 if script.get("name") != "koordinaten"]
+        checkruns.append((filters.get(checkrun.get("ID")), codes))
+    return checkruns
+
+
+@pytest.mark.parametrize("dispatcher", [False, True])
+def test_results_like_javascript(node, main_window, objects, tmp_path, dispatcher):
+    path = str(tmp_path / "rules.qa.xml")
+    project = classes.Project(main_window, "Test")
+    desite_export.write_modelcheck(path, project, None, dispatcher, objects, mark_scripts=False)
+    elements = random_elements(400)
+    logs = node(RUN, {"checkruns": exported_checkruns(path), "elements": elements})
+
+    dump = rule_engine.PropertyDump()
+    for number, element in enumerate(elements):
+        for name, value in element["props"].items():
+            text = str(value).lower() if isinstance(value, bool) else value
+            dump.add(f"e{number}", name, text, element["types"].get(name))
+    results = rule_engine.RuleEngine(objects).evaluate(dump)
+
+    assert len(results) == len(logs)
+    for element, result, log in zip(elements, results, logs):
+        states = [entry[1] for entry in log if entry[0] == "state"]
+        values = {entry[1]: entry[2] for entry in log if entry[0] == "set"}
+        state = result.state
+        if dispatcher and state == rule_engine.UNTESTED:
+            state = rule_engine.IGNORED  # the dispatcher runs for every element and ignores those without a rule
+        assert (states[-1] if states else rule_engine.UNTESTED) == state, element
+        assert tuple(entry[1] for entry in log if entry[0] == "msg") == result.messages, element
+        if result.state not in (rule_engine.UNTESTED, rule_engine.IGNORED):
+            assert values.get("fehlerhafte_eigenschaften") == result.failed, element
+            assert values.get("zu_pruefende_eigenschaften") == result.checked, element